@@ -0,0 +1,182 @@
+"""
+agent.py
+
+Long-running ITAMCloud agent. Where `python -m src.main` collects once and exits,
+the agent stays resident and keeps the inventory current by reacting to events
+instead of re-running every probe on a timer.
+
+Usage:
+    python -m src.agent --serial ABC123
+"""
+
+import argparse
+import os
+import platform
+import threading
+import time
+
+from src.main import check_serial_no
+from src.lib import db, governor, storage
+from src.lib.collector_registry import get_collector, select_collectors
+
+
+class Agent:
+    """
+    Runs the agent's background services for one asset until stopped.
+    """
+
+    def __init__(self, company_id, asset_id, args):
+        self.company_id = company_id
+        self.asset_id = asset_id
+        self.args = args
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def create_collector(self, name):
+        return get_collector(name).create(self.company_id, self.asset_id)
+
+    def start_service(self, name, target, *args):
+        thread = threading.Thread(target=self._guard, args=(name, target) + args, name=name, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        print(f"▶️ Started {name} service.")
+
+    def _guard(self, name, target, *args):
+        try:
+            target(*args)
+        except Exception as e:
+            print(f"❌ {name} service stopped: {e}")
+
+    def watch_network(self):
+        """
+        Upload the full adapter set once, then follow changes: rtnetlink events on Linux,
+        periodic polling elsewhere.
+        """
+        collector = self.create_collector("network")
+        collector.run()
+        if platform.system() == "Linux":
+            from src.lib.netlink_monitor import NetlinkMonitor
+            NetlinkMonitor(collector, debounce=self.args.network_debounce).run(self.stop_event)
+            return
+        while not self.stop_event.wait(self.args.poll_interval):
+            collector.run()
+
+    def watch_drives(self):
+        """
+        Upload the full drive set once, then follow block hotplug uevents on Linux,
+        periodic polling elsewhere.
+        """
+        collector = self.create_collector("drives")
+        collector.run()
+        if platform.system() == "Linux":
+            from src.lib.uevent_monitor import UeventMonitor
+            UeventMonitor(collector, debounce=self.args.drive_debounce).run(self.stop_event)
+            return
+        while not self.stop_event.wait(self.args.poll_interval):
+            collector.run()
+
+    def sample_utilization(self):
+        from src.lib.utilization_sampler import UtilizationSampler
+        UtilizationSampler(
+            self.asset_id,
+            sample_interval=self.args.sample_interval,
+            rollup_interval=self.args.rollup_interval,
+        ).run(self.stop_event)
+
+    def collect_on_demand(self, command):
+        """
+        Run the collectors a gateway command names (all of them if none), upload the records
+        as a scheduled run would and return them for the gateway.
+        Returns:
+            tuple: (records per collector as dicts, error message or None)
+        """
+        try:
+            specs = select_collectors([get_collector(name).name for name in command.get("collectors") or []])
+        except KeyError as e:
+            return {}, str(e)
+        sections = {}
+        for spec in specs:
+            collector = spec.create(self.company_id, self.asset_id)
+            records = collector.collect()
+            collector.upload(records)
+            sections[spec.name] = [record.as_dict() for record in records]
+        return sections, None
+
+    def serve_gateway(self):
+        from src.lib.gateway import GatewayChannel
+        GatewayChannel(
+            self.args.gateway,
+            self.args.serial,
+            self.collect_on_demand,
+            token=self.args.gateway_token,
+        ).run(self.stop_event)
+
+    def run(self):
+        self.start_service("network", self.watch_network)
+        self.start_service("drives", self.watch_drives)
+        if self.args.sample_interval > 0:
+            self.start_service("utilization", self.sample_utilization)
+        if self.args.gateway:
+            self.start_service("on-demand", self.serve_gateway)
+        try:
+            while not self.stop_event.is_set():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("Stopping agent...")
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=5)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the resident ITAMCloud inventory agent.")
+    parser.add_argument("--serial", required=True, help="Asset serial number")
+    parser.add_argument("--network-debounce", type=float, default=2.0,
+                        help="Seconds of quiet after a network change before it is uploaded")
+    parser.add_argument("--drive-debounce", type=float, default=3.0,
+                        help="Seconds of quiet after a block hotplug event before drives are re-read")
+    parser.add_argument("--sample-interval", type=float, default=10.0,
+                        help="Seconds between utilization samples (0 disables sampling)")
+    parser.add_argument("--rollup-interval", type=float, default=300.0,
+                        help="Seconds of samples reduced to one min/avg/max rollup per metric")
+    parser.add_argument("--poll-interval", type=float, default=900.0,
+                        help="Polling interval (seconds) where event sources are unavailable")
+    parser.add_argument("--gateway", help="Collection gateway URL to long-poll for on-demand collection requests")
+    parser.add_argument("--gateway-token", default=os.environ.get("ITAM_GATEWAY_TOKEN"),
+                        help="Shared gateway token (default: $ITAM_GATEWAY_TOKEN)")
+    parser.add_argument("--backend", choices=storage.BACKENDS, default="mysql",
+                        help="Where records go: the ITAMCloud database, a local SQLite file or a JSON Lines log")
+    parser.add_argument("--store", help="File for the sqlite/jsonl backends (defaults to the cache directory)")
+    parser.add_argument("--shards", help="Shard config routing companies to database servers (default: $ITAM_SHARDS)")
+    parser.add_argument("--governed", action="store_true",
+                        help="Run at idle CPU/I/O priority and hold probes back while the host is busy")
+    parser.add_argument("--max-load", type=float, default=0.7,
+                        help="Governed mode: load average per CPU above which probes wait")
+    parser.add_argument("--cgroup", help="Governed mode: cgroup v2 group to run in")
+    parser.add_argument("--cpu-max", type=float, help="Governed mode: CPU limit in percent of one CPU (cgroup v2)")
+    parser.add_argument("--memory-max", help="Governed mode: memory limit such as 256M (cgroup v2)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.governed:
+        governor.configure(max_load=args.max_load, cgroup=args.cgroup,
+                           cpu_percent=args.cpu_max, memory_max=args.memory_max)
+    backend = storage.configure(args.backend, args.store)
+    if backend.name == "mysql":
+        db.configure_shards(args.shards)
+    asset_info = check_serial_no(args.serial) if backend.name == "mysql" else backend.find_asset(args.serial)
+    if not asset_info:
+        print("No asset found with the provided serial number.")
+        exit(1)
+    asset_id, company_id = asset_info
+    Agent(company_id, asset_id, args).run()
+
+
+if __name__ == "__main__":
+    main()
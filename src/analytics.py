@@ -0,0 +1,104 @@
+"""
+analytics.py
+
+Fleet statistics over an inventory export written by `python -m src.export`
+(see src/lib/analytics.py). Needs requirements-analytics.txt (NumPy); Parquet exports also
+need requirements-parquet.txt (pyarrow).
+
+Usage:
+    python -m src.analytics audit/
+    python -m src.analytics audit/ --report battery --by-company --limit 20
+    python -m src.analytics audit/ --report drives --json
+"""
+
+import argparse
+import json
+import time
+
+from src.lib import analytics
+
+REPORTS = ("ram", "battery", "drives", "speed")
+
+
+def format_value(value):
+    if isinstance(value, float):
+        if value != value:
+            return "-"
+        return f"{int(value):,}" if value.is_integer() else f"{value:,.1f}"
+    return "-" if value is None else str(value)
+
+
+def print_table(title, rows):
+    print(f"\n{title}")
+    if not rows:
+        print("  (none)")
+        return
+    columns = list(rows[0])
+    cells = [[format_value(row[c]) for c in columns] for row in rows]
+    widths = [max(len(c), *(len(line[i]) for line in cells)) for i, c in enumerate(columns)]
+    print("  " + "  ".join(c.rjust(w) for c, w in zip(columns, widths)))
+    for line in cells:
+        print("  " + "  ".join(v.rjust(w) for v, w in zip(line, widths)))
+
+
+def run_report(name, args):
+    """
+    Returns:
+        dict: Report title -> rows (plus totals where the rows are limited).
+    """
+    if name == "ram":
+        return {"RAM per company (GiB)": analytics.ram_by_company(args.directory)}
+    if name == "battery":
+        total, fences, rows = analytics.battery_outliers(
+            args.directory, factor=args.iqr_factor, by_company=args.by_company, limit=args.limit)
+        fence = f", fleet fence {fences[1]:.0f} cycles" if fences else ""
+        return {f"Battery cycle outliers ({total} assets{fence})": rows}
+    if name == "drives":
+        return {f"Drive capacity percentiles (GB) by {args.drive_group}":
+                analytics.drive_percentiles(args.directory, by=args.drive_group)}
+    report = analytics.speed_mismatches(args.directory, ratio=args.link_ratio, limit=args.limit)
+    titles = {
+        "memory_below_rated": "Memory configured below rated speed",
+        "memory_mixed_speeds": "Machines mixing memory speeds",
+        "network_slow_links": f"Links {args.link_ratio:g}x slower than their company's median",
+    }
+    return {f"{titles[key]} ({total})": rows for key, (total, rows) in report.items()}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compute fleet statistics from an inventory export.")
+    parser.add_argument("directory", help="Directory written by python -m src.export")
+    parser.add_argument("--report", action="append", choices=REPORTS, help="Reports to run (repeatable; default all)")
+    parser.add_argument("--limit", type=int, default=20, help="Rows shown per list report")
+    parser.add_argument("--by-company", action="store_true", help="Battery outlier fences per company instead of fleet-wide")
+    parser.add_argument("--iqr-factor", type=float, default=analytics.IQR_FACTOR,
+                        help="Outlier fences in interquartile ranges beyond the quartiles")
+    parser.add_argument("--drive-group", default="interface_type", choices=analytics.DRIVE_GROUPS,
+                        help="Drives column to group percentiles by")
+    parser.add_argument("--link-ratio", type=float, default=analytics.LINK_SPEED_RATIO,
+                        help="How many times slower than the company median a link must be to be listed")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {}
+    for name in args.report or REPORTS:
+        started = time.perf_counter()
+        try:
+            results.update(run_report(name, args))
+        except (FileNotFoundError, LookupError) as e:
+            print(f"[WARN] Skipping {name}: {e}")
+            continue
+        if not args.json:
+            print(f"⏱️ {name}: {time.perf_counter() - started:.2f}s")
+    if args.json:
+        print(json.dumps(results, indent=2, default=str))
+        return
+    for title, rows in results.items():
+        print_table(title, rows)
+
+
+if __name__ == "__main__":
+    main()
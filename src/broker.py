@@ -0,0 +1,40 @@
+"""
+broker.py
+
+Run the privileged probe broker (see src/lib/probe_broker.py) as root, so agents running
+as an ordinary user get dmidecode and lshw results without sudo.
+
+Usage:
+    sudo python -m src.broker --group itam
+    sudo python -m src.broker --socket /run/itamcloud/probe-broker.sock --ttl 86400
+"""
+
+import argparse
+import os
+
+from src.lib import probe_broker
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve allowlisted root-only probes to unprivileged agents.")
+    parser.add_argument("--socket", default=probe_broker.socket_path(), help="UNIX socket to listen on")
+    parser.add_argument("--group", help="Group allowed to connect (the agent's group)")
+    parser.add_argument("--mode", default="0660", help="Socket permissions, octal (default 0660)")
+    parser.add_argument("--ttl", type=int, default=probe_broker.DEFAULT_TTL, help="Seconds to cache each probe's output")
+    parser.add_argument("--timeout", type=int, default=60, help="Seconds before a probe is killed")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if os.geteuid() != 0:
+        print("[WARN] The probe broker is not running as root; dmidecode and lshw will report less or fail.")
+    broker = probe_broker.ProbeBroker(ttl=args.ttl, timeout=args.timeout)
+    try:
+        broker.serve(args.socket, group=args.group, mode=int(args.mode, 8))
+    except KeyboardInterrupt:
+        print("👋 Probe broker stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+bulk_load.py
+
+Bulk-load snapshot files (offline spools, batch output, exports from other inventory
+systems converted to snapshots) through LOAD DATA staging tables.
+
+Usage:
+    python -m src.bulk_load --host 127.0.0.1 --user root --password secret --database itam_local snapshots/
+    python -m src.bulk_load --files-only --work-dir staging snapshots/*.json
+"""
+
+import argparse
+import os
+import tempfile
+
+import mysql.connector
+
+from src.lib.db import get_connection
+from src.lib.staging import bulk_load, expand_paths, latest_snapshots, write_staging_files
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load snapshots through LOAD DATA staging tables.")
+    parser.add_argument("paths", nargs="+", help="Snapshot files or directories of *.json snapshots")
+    parser.add_argument("--host", help="MySQL host")
+    parser.add_argument("--port", type=int, help="MySQL port")
+    parser.add_argument("--user", help="MySQL user")
+    parser.add_argument("--password", help="MySQL password")
+    parser.add_argument("--database", help="Database name")
+    parser.add_argument("--work-dir", help="Directory for the per-table staging files (default: a temp dir)")
+    parser.add_argument("--keep-files", action="store_true", help="Keep the staging files after loading")
+    parser.add_argument("--files-only", action="store_true", help="Only write the staging files; do not load")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = expand_paths(args.paths)
+    if not paths:
+        print("❌ No snapshot files found.")
+        exit(1)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="itam-bulk-")
+    if args.files_only:
+        for name, (data_path, _, rows) in write_staging_files(latest_snapshots(paths), work_dir).items():
+            print(f"✅ {rows} {name} rows -> {data_path}")
+        return
+    connection = None
+    try:
+        connection = get_connection(host=args.host, port=args.port, user=args.user, password=args.password,
+                                    database=args.database, allow_local_infile=True)
+        bulk_load(connection, paths, work_dir, keep_files=args.keep_files)
+    except mysql.connector.Error as err:
+        print(f"❌ MySQL error: {err}")
+        exit(1)
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+        if not args.work_dir and not args.keep_files:
+            os.rmdir(work_dir)
+
+
+if __name__ == "__main__":
+    main()
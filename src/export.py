@@ -0,0 +1,60 @@
+"""
+export.py
+
+Stream the fleet inventory (assets joined with hardware, drives, memory, GPUs and
+network adapters) to CSV, JSON Lines or Parquet files for audits.
+
+Usage:
+    python -m src.export --output audit/ --format csv
+    python -m src.export --output audit/ --format parquet --company 12 --since 2025-06-01
+"""
+
+import argparse
+import datetime
+
+import mysql.connector
+
+from src.lib.db import get_connection
+from src.lib.export import DEFAULT_CHUNK_SIZE, EXPORT_SECTIONS, FORMATS, export_inventory
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stream the fleet inventory to files.")
+    parser.add_argument("--output", required=True, help="Directory for the per-section files")
+    parser.add_argument("--format", choices=FORMATS, default="csv", help="Output format (parquet needs pyarrow)")
+    parser.add_argument("--section", action="append", choices=EXPORT_SECTIONS,
+                        help="Only export these sections (repeatable)")
+    parser.add_argument("--company", type=int, help="Only this company's assets")
+    parser.add_argument("--since", type=datetime.datetime.fromisoformat,
+                        help="Only rows written at or after this date/datetime (server time)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows fetched per round trip")
+    parser.add_argument("--host", help="MySQL host")
+    parser.add_argument("--port", type=int, help="MySQL port")
+    parser.add_argument("--user", help="MySQL user")
+    parser.add_argument("--password", help="MySQL password")
+    parser.add_argument("--database", help="Database name")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sections = tuple(args.section) if args.section else EXPORT_SECTIONS
+    connection = None
+    try:
+        connection = get_connection(host=args.host, port=args.port, user=args.user,
+                                    password=args.password, database=args.database)
+        export_inventory(connection, args.output, sections, args.format, args.company, args.since,
+                         max(1, args.chunk_size))
+    except mysql.connector.Error as err:
+        print(f"❌ MySQL error: {err}")
+        exit(1)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        exit(1)
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+
+if __name__ == "__main__":
+    main()
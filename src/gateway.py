@@ -0,0 +1,47 @@
+"""
+gateway.py
+
+Local stand-in for the collection gateway (see src/lib/gateway.py). Agents started with
+`--gateway` keep a long-poll open here; support triggers a collection and gets the
+fresh records back in the same request.
+
+Usage:
+    python -m src.gateway --port 8470
+    curl -d '{"serial": "ABC123", "collectors": ["memory"]}' http://127.0.0.1:8470/collect
+"""
+
+import argparse
+import os
+
+from src.lib.gateway import COMMAND_TTL, GatewayServer
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local collection gateway for on-demand collection.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8470, help="Port to listen on")
+    parser.add_argument("--token", default=os.environ.get("ITAM_GATEWAY_TOKEN"),
+                        help="Shared token agents and callers must send (default: $ITAM_GATEWAY_TOKEN)")
+    parser.add_argument("--max-polls", type=int, default=1000,
+                        help="Open agent polls before further agents are told to retry later")
+    parser.add_argument("--command-ttl", type=float, default=COMMAND_TTL,
+                        help="Seconds a command waits for an offline agent before it is dropped")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = GatewayServer((args.host, args.port), token=args.token, max_polls=args.max_polls,
+                           verbose=args.verbose, command_ttl=args.command_ttl)
+    print(f"🚀 Collection gateway listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Gateway stopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+history.py
+
+Query the local snapshot history recorded by `python -m src.main`.
+
+Usage:
+    python -m src.history --as-of 2025-03-01
+    python -m src.history --diff 2025-01-01 2025-06-01
+    python -m src.history --changes memory
+"""
+
+import argparse
+import datetime
+import json
+
+from src.lib.snapshot_history import SECTIONS, SnapshotHistory, default_history_dir
+
+
+def parse_time(value):
+    """
+    Epoch seconds, or an ISO date/datetime (local time unless an offset is given).
+    """
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).isoformat(sep=" ", timespec="seconds")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Query this machine's local inventory history.")
+    parser.add_argument("--dir", default=None, help="History directory (defaults to the cache directory)")
+    parser.add_argument("--section", action="append", choices=SECTIONS,
+                        help="Restrict --as-of/--diff to these sections (repeatable)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--as-of", metavar="TIME", help="Show the inventory as of TIME")
+    group.add_argument("--diff", nargs=2, metavar=("T1", "T2"), help="Show what changed between T1 and T2")
+    group.add_argument("--changes", choices=SECTIONS, help="List when a section changed")
+    group.add_argument("--size", action="store_true", help="Show the history's disk usage")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    history = SnapshotHistory(args.dir or default_history_dir())
+    sections = tuple(args.section) if args.section else SECTIONS
+    if args.as_of:
+        result = history.as_of(parse_time(args.as_of), sections)
+        if result is None:
+            print("❌ No history recorded before that time.")
+            exit(1)
+        at, state = result
+        print(f"State recorded at {format_time(at)}:")
+        print(json.dumps(state, indent=2, default=str))
+    elif args.diff:
+        changes = history.diff(parse_time(args.diff[0]), parse_time(args.diff[1]), sections)
+        if not changes:
+            print("No changes.")
+        for name, delta in changes.items():
+            print(f"== {name}")
+            for row in delta["added"]:
+                print(f"  + {json.dumps(row, default=str)}")
+            for row in delta["removed"]:
+                print(f"  - {json.dumps(row, default=str)}")
+            for old, new in delta["changed"]:
+                fields = {k: (old.get(k), new.get(k)) for k in new if old.get(k) != new.get(k)}
+                print(f"  ~ {json.dumps(fields, default=str)}")
+    elif args.changes:
+        for timestamp in history.changes(args.changes):
+            print(format_time(timestamp))
+    else:
+        print(f"{history.size() / 1024:.1f} KiB in {history.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+analytics.py
+
+Fleet statistics over an inventory export (see export.py). Only the columns an analysis
+needs are read, chunk by chunk, into NumPy arrays: numeric columns as float64 with NaN
+for missing values, text columns as int32 codes into a label list. Grouping, percentiles
+and outlier fences are then computed with sorts and reductions over whole arrays rather
+than per row in Python, so a million-asset export takes seconds on one core (mostly
+parsing) and memory grows with (rows x columns read) rather than with the size of the files.
+
+Reports:
+- ram_by_company: total RAM per asset, summarized per company;
+- battery_outliers: assets whose battery cycle count is above the fleet's IQR fence;
+- drive_percentiles: drive capacity percentiles, overall and per interface;
+- speed_mismatches: memory running below its rated speed or mixed within one machine,
+  and network links far slower than their company's usual link.
+"""
+
+import csv
+import json
+import os
+
+import numpy
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.parquet
+except ImportError:  # Parquet input is optional
+    pyarrow = None
+
+
+EXTENSIONS = ("parquet", "csv", "jsonl")
+READ_CHUNK = 65536
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95, 99)
+# Text columns of the drives export that drive_percentiles() can group by.
+DRIVE_GROUPS = ("interface_type", "drive_type", "model", "device_id")
+GIB = 1024 ** 3
+GB = 1000 ** 3
+# Outlier fences are this many interquartile ranges beyond the quartiles (Tukey).
+IQR_FACTOR = 1.5
+# A link this many times slower than its company's median link counts as a mismatch.
+LINK_SPEED_RATIO = 10
+
+
+class Columns:
+    """
+    Column arrays read from one section file.
+    Args:
+        arrays (dict): Column name -> float64 array (numeric) or int32 code array (text).
+        labels (dict): Text column name -> list of labels indexed by code (-1 is missing).
+    """
+
+    def __init__(self, arrays, labels):
+        self.arrays = arrays
+        self.labels = labels
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __len__(self):
+        return len(next(iter(self.arrays.values()))) if self.arrays else 0
+
+    def label(self, name, code):
+        return self.labels[name][code] if code >= 0 else None
+
+
+def section_path(directory, section):
+    """
+    The export file for `section` in `directory`, whichever format it was written in.
+    Raises:
+        FileNotFoundError: If there is no export of that section.
+    """
+    for extension in EXTENSIONS:
+        path = os.path.join(directory, f"{section}.{extension}")
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No {section} export in {directory} (looked for {', '.join(EXTENSIONS)})")
+
+
+def _check_columns(path, available, names):
+    missing = [name for name in names if name not in available]
+    if missing:
+        raise LookupError(f"{path} has no {', '.join(missing)} column")
+
+
+def _csv_chunks(path, names):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        _check_columns(path, header, names)
+        indexes = [header.index(name) for name in names]
+        chunk = [[] for _ in names]
+        for row in reader:
+            for values, index in zip(chunk, indexes):
+                values.append(row[index])
+            if len(chunk[0]) >= READ_CHUNK:
+                yield chunk
+                chunk = [[] for _ in names]
+        if chunk[0]:
+            yield chunk
+
+
+def _jsonl_chunks(path, names):
+    with open(path, encoding="utf-8") as f:
+        chunk = [[] for _ in names]
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            for values, name in zip(chunk, names):
+                values.append(row.get(name))
+            if len(chunk[0]) >= READ_CHUNK:
+                yield chunk
+                chunk = [[] for _ in names]
+        if chunk[0]:
+            yield chunk
+
+
+def _parquet_chunks(path, names, numeric):
+    if pyarrow is None:
+        raise RuntimeError("Reading a Parquet export needs pyarrow (pip install -r requirements-parquet.txt)")
+    parquet = pyarrow.parquet.ParquetFile(path)
+    _check_columns(path, parquet.schema_arrow.names, names)
+    for batch in parquet.iter_batches(batch_size=READ_CHUNK, columns=list(names)):
+        chunk = []
+        for name, column in zip(names, batch.columns):
+            if name in numeric:
+                column = pyarrow.compute.cast(column, pyarrow.float64(), safe=False)
+                chunk.append(column.to_numpy(zero_copy_only=False))
+            else:
+                chunk.append(column.to_pylist())
+        yield chunk
+
+
+def _to_float(values):
+    """
+    float64 array from strings (CSV), numbers or None; blanks and unparsable values become NaN.
+    """
+    if isinstance(values, numpy.ndarray):
+        return values.astype(numpy.float64, copy=False)
+    cleaned = [numpy.nan if value is None or value == "" else value for value in values]
+    try:
+        return numpy.array(cleaned, dtype=numpy.float64)
+    except ValueError:
+        result = numpy.full(len(cleaned), numpy.nan)
+        for i, value in enumerate(cleaned):
+            try:
+                result[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return result
+
+
+def _to_codes(values, codes):
+    """
+    int32 codes for text values, extending `codes` (label -> code) with new labels.
+    """
+    result = numpy.empty(len(values), dtype=numpy.int32)
+    for i, value in enumerate(values):
+        if value is None or value == "":
+            result[i] = -1
+        else:
+            result[i] = codes.setdefault(str(value), len(codes))
+    return result
+
+
+def load_columns(directory, section, numeric=(), text=()):
+    """
+    Read the named columns of one section export into arrays.
+    Args:
+        directory (str): Export directory (as written by src.export).
+        section (str): Section name, e.g. "hardware".
+        numeric (tuple): Columns to load as float64 (NaN when missing).
+        text (tuple): Columns to load as int32 codes with a label list.
+    Returns:
+        Columns: The loaded arrays.
+    Raises:
+        FileNotFoundError: If there is no export of that section.
+        LookupError: If a CSV or Parquet export lacks one of the columns.
+    """
+    path = section_path(directory, section)
+    names = tuple(numeric) + tuple(text)
+    if path.endswith(".parquet"):
+        chunks = _parquet_chunks(path, names, set(numeric))
+    elif path.endswith(".csv"):
+        chunks = _csv_chunks(path, names)
+    else:
+        chunks = _jsonl_chunks(path, names)
+    parts = {name: [] for name in names}
+    codes = {name: {} for name in text}
+    for chunk in chunks:
+        for name, values in zip(names, chunk):
+            if name in codes:
+                parts[name].append(_to_codes(values, codes[name]))
+            else:
+                parts[name].append(_to_float(values))
+    arrays = {}
+    for name in names:
+        empty = numpy.empty(0, dtype=numpy.int32 if name in codes else numpy.float64)
+        arrays[name] = numpy.concatenate(parts[name]) if parts[name] else empty
+        parts[name] = None  # drop the chunks as soon as they are joined
+    labels = {name: list(mapping) for name, mapping in codes.items()}
+    return Columns(arrays, labels)
+
+
+def grouped_percentiles(keys, values, percentiles=DEFAULT_PERCENTILES):
+    """
+    Percentiles of `values` within each group of `keys` (linear interpolation, like
+    numpy.percentile), from one lexsort of the whole array. Rows with a NaN value are ignored.
+    Returns:
+        tuple: (group keys, row counts, {percentile: array per group}, group start offsets,
+        values sorted by group then value)
+    """
+    valid = ~numpy.isnan(values)
+    if keys.dtype.kind == "f":
+        valid &= ~numpy.isnan(keys)
+    keys = keys[valid]
+    values = values[valid]
+    order = numpy.lexsort((values, keys))
+    keys = keys[order]
+    values = values[order]
+    groups, starts, counts = numpy.unique(keys, return_index=True, return_counts=True)
+    result = {}
+    for percentile in percentiles:
+        position = starts + (counts - 1) * (percentile / 100)
+        lower = numpy.floor(position).astype(numpy.int64)
+        upper = numpy.minimum(lower + 1, starts + counts - 1)
+        result[percentile] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+    return groups, counts, result, starts, values
+
+
+def grouped_summary(keys, values, percentiles=(50, 90)):
+    """
+    Count, mean, min, max and the given percentiles of `values` per group of `keys`.
+    Returns:
+        dict: Column name -> array per group, with the group keys under "group".
+    """
+    groups, counts, result, starts, ordered = grouped_percentiles(keys, values, percentiles)
+    summary = {"group": groups, "count": counts}
+    if len(groups):
+        summary["mean"] = numpy.add.reduceat(ordered, starts) / counts
+        summary["min"] = ordered[starts]
+        summary["max"] = ordered[starts + counts - 1]
+    else:
+        summary["mean"] = summary["min"] = summary["max"] = numpy.empty(0)
+    for percentile, array in result.items():
+        summary[f"p{percentile}"] = array
+    return summary
+
+
+def iqr_fences(values, factor=IQR_FACTOR):
+    """
+    Tukey fences (low, high) for the non-NaN values, or None if there are none.
+    """
+    values = values[~numpy.isnan(values)]
+    if not len(values):
+        return None
+    q1, q3 = numpy.percentile(values, (25, 75))
+    spread = q3 - q1
+    return float(q1 - factor * spread), float(q3 + factor * spread)
+
+
+def per_row(groups, keys, values):
+    """
+    Spread one value per group (as returned by grouped_percentiles) back over the rows
+    of `keys`; NaN for rows whose group was not computed.
+    """
+    if not len(groups):
+        return numpy.full(len(keys), numpy.nan)
+    index = numpy.clip(numpy.searchsorted(groups, keys), 0, len(groups) - 1)
+    return numpy.where(groups[index] == keys, values[index], numpy.nan)
+
+
+def outlier_mask(values, factor=IQR_FACTOR, keys=None, side="both"):
+    """
+    True where a value lies outside the Tukey fences, computed over all values or, with
+    `keys`, separately for each group. side="high" or "low" only flags one tail.
+    NaN is never an outlier.
+    """
+    if keys is None:
+        fences = iqr_fences(values, factor)
+        if fences is None:
+            return numpy.zeros(len(values), dtype=bool)
+        low, high = fences
+    else:
+        groups, _, quartiles, _, _ = grouped_percentiles(keys, values, (25, 75))
+        spread = quartiles[75] - quartiles[25]
+        low = per_row(groups, keys, quartiles[25] - factor * spread)
+        high = per_row(groups, keys, quartiles[75] + factor * spread)
+    mask = numpy.zeros(len(values), dtype=bool)
+    if side in ("both", "low"):
+        mask |= values < low
+    if side in ("both", "high"):
+        mask |= values > high
+    return mask
+
+
+def _rows(columns, count=None):
+    """
+    Turn a dict of equal-length arrays into a list of row dicts (plain Python values).
+    """
+    names = list(columns)
+    count = len(columns[names[0]]) if count is None else count
+    return [{name: columns[name][i].item() if hasattr(columns[name][i], "item") else columns[name][i]
+             for name in names} for i in range(count)]
+
+
+def ram_by_company(directory):
+    """
+    Total RAM per asset (hardware.memory_slots_used, bytes) summarized per company, in GiB.
+    """
+    data = load_columns(directory, "hardware", numeric=("company_id", "memory_slots_used"))
+    summary = grouped_summary(data["company_id"], data["memory_slots_used"] / GIB)
+    summary["company_id"] = summary.pop("group").astype(numpy.int64)
+    summary["assets"] = summary.pop("count")
+    return _rows({name: summary[name] for name in ("company_id", "assets", "mean", "min", "p50", "p90", "max")})
+
+
+def battery_outliers(directory, factor=IQR_FACTOR, by_company=False, limit=50):
+    """
+    Assets whose battery cycle count is above the upper Tukey fence (fleet-wide, or per
+    company with by_company), highest first.
+    Returns:
+        tuple: (number of outliers, fleet fences or None, up to `limit` rows)
+    """
+    data = load_columns(directory, "hardware", numeric=("asset_id", "company_id", "battery_cycle_count"))
+    cycles = data["battery_cycle_count"]
+    fences = iqr_fences(cycles, factor)
+    # Only worn batteries matter; an unusually low count is not a problem.
+    keys = data["company_id"] if by_company else None
+    mask = outlier_mask(cycles, factor, keys, side="high")
+    found = numpy.flatnonzero(mask)
+    found = found[numpy.argsort(-cycles[found], kind="stable")][:limit]
+    rows = _rows({
+        "asset_id": data["asset_id"][found].astype(numpy.int64),
+        "company_id": data["company_id"][found].astype(numpy.int64),
+        "battery_cycle_count": cycles[found].astype(numpy.int64),
+    })
+    return int(mask.sum()), fences, rows
+
+
+def drive_percentiles(directory, by="interface_type", percentiles=DEFAULT_PERCENTILES):
+    """
+    Drive capacity percentiles in GB (decimal, as drives are sold), for the whole fleet
+    and for each value of `by`.
+    """
+    data = load_columns(directory, "drives", numeric=("size",), text=(by,))
+    sizes = data["size"] / GB
+    groups, counts, result, _, _ = grouped_percentiles(data[by], sizes, percentiles)
+    rows = []
+    overall = sizes[~numpy.isnan(sizes)]
+    if len(overall):
+        values = numpy.percentile(overall, percentiles)
+        rows.append(dict({by: "all", "drives": len(overall)},
+                         **{f"p{p}": float(v) for p, v in zip(percentiles, values)}))
+    for i, code in enumerate(groups):
+        row = {by: data.label(by, int(code)) or "unknown", "drives": int(counts[i])}
+        row.update({f"p{p}": float(result[p][i]) for p in percentiles})
+        rows.append(row)
+    return rows
+
+
+def speed_mismatches(directory, ratio=LINK_SPEED_RATIO, limit=50):
+    """
+    Memory modules configured below their rated speed, machines mixing module speeds,
+    and network links at least `ratio` times slower than their company's median link.
+    Returns:
+        dict: Report name -> (total found, up to `limit` rows).
+    """
+    report = {}
+    memory = load_columns(directory, "memory", numeric=("asset_id", "slot_number", "speed", "configured_speed"))
+    rated = memory["speed"]
+    configured = memory["configured_speed"]
+    found = numpy.flatnonzero(configured < rated)
+    report["memory_below_rated"] = (len(found), _rows({
+        "asset_id": memory["asset_id"][found[:limit]].astype(numpy.int64),
+        "slot_number": memory["slot_number"][found[:limit]],
+        "speed": rated[found[:limit]],
+        "configured_speed": configured[found[:limit]],
+    }))
+
+    summary = grouped_summary(memory["asset_id"], configured, percentiles=())
+    mixed = numpy.flatnonzero(summary["min"] < summary["max"])
+    report["memory_mixed_speeds"] = (len(mixed), _rows({
+        "asset_id": summary["group"][mixed[:limit]].astype(numpy.int64),
+        "modules": summary["count"][mixed[:limit]],
+        "slowest": summary["min"][mixed[:limit]],
+        "fastest": summary["max"][mixed[:limit]],
+    }))
+
+    network = load_columns(directory, "network", numeric=("asset_id", "company_id", "speed"), text=("adapter_name",))
+    speed = numpy.where(network["speed"] > 0, network["speed"], numpy.nan)  # down links and loopback report 0
+    company = network["company_id"]
+    groups, _, medians, _, _ = grouped_percentiles(company, speed, (50,))
+    company_median = per_row(groups, company, medians[50])
+    found = numpy.flatnonzero(speed * ratio <= company_median)
+    shown = found[:limit]
+    rows = _rows({
+        "asset_id": network["asset_id"][shown].astype(numpy.int64),
+        "company_id": company[shown].astype(numpy.int64),
+        "speed": speed[shown],
+        "company_median": company_median[shown],
+    }, len(shown))
+    for row, code in zip(rows, network["adapter_name"][shown]):
+        row["adapter_name"] = network.label("adapter_name", int(code))
+    report["network_slow_links"] = (len(found), rows)
+    return report
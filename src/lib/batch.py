@@ -0,0 +1,68 @@
+"""
+batch.py
+
+Inventory many alternate roots (container rootfs directories, chroots, read-only
+mounted VM images) concurrently in a process pool, writing one snapshot per root.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.lib import sysroot
+from src.lib.collector_registry import get_collector, select_collectors
+from src.lib.snapshot import make_snapshot, write_snapshot
+
+
+def collect_root_snapshot(root, collector_names=None):
+    """
+    Run every root-aware collector against `root`. Executed inside a worker process.
+    Args:
+        root (str): Root prefix to inventory.
+        collector_names (list): Restrict to these collectors (None for all root-aware ones).
+    Returns:
+        dict: Snapshot for the root.
+    """
+    records = {}
+    for spec in select_collectors(only=collector_names, root=root):
+        records[spec.name] = spec.create(None, None, root=root).collect()
+    hardware = get_collector("hardware").load()(root=root)
+    return make_snapshot(
+        records,
+        root=root,
+        hostname=sysroot.read_text("/etc/hostname", root),
+        unique_id=hardware.get_unique_asset_id(),
+    )
+
+
+def snapshot_filename(root):
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", os.path.abspath(root).strip("/")) or "root"
+    return f"{name}.json"
+
+
+def inventory_roots(roots, output_dir, collector_names=None, workers=None):
+    """
+    Inventory each root in parallel and write <output_dir>/<root>.json per snapshot.
+    Args:
+        roots (list): Root prefixes.
+        output_dir (str): Directory for the snapshot files.
+        collector_names (list): Restrict to these collectors.
+        workers (int): Process pool size (defaults to the CPU count).
+    Returns:
+        dict: Root -> written snapshot path, for the roots that succeeded.
+    """
+    written = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(collect_root_snapshot, root, collector_names): root for root in roots}
+        for future in as_completed(futures):
+            root = futures[future]
+            try:
+                snapshot = future.result()
+            except Exception as e:
+                print(f"❌ Inventory of {root} failed: {e}")
+                continue
+            path = write_snapshot(snapshot, os.path.join(output_dir, snapshot_filename(root)))
+            written[root] = path
+            print(f"✅ {root} -> {path}")
+    print(f"Inventoried {len(written)}/{len(roots)} roots.")
+    return written
@@ -0,0 +1,179 @@
+"""
+boot_cache.py
+
+On-disk cache for hardware facts that cannot change without a reboot
+(CPU model, BIOS, TPM, memory modules, GPUs). Entries are keyed by the current
+boot id plus a DMI fingerprint, so runs within the same boot reuse them instantly
+and a reboot or a board/BIOS swap invalidates everything.
+"""
+
+import hashlib
+import json
+import os
+import platform
+import tempfile
+import threading
+
+import psutil
+
+
+CACHE_FILE = "boot_cache.json"
+LINUX_BOOT_ID = "/proc/sys/kernel/random/boot_id"
+LINUX_DMI_FIELDS = (
+    "sys_vendor", "product_name", "product_version", "board_vendor", "board_name",
+    "bios_vendor", "bios_version", "bios_date",
+)
+
+
+def default_cache_dir():
+    """
+    Per-user cache directory for the agent (override with ITAM_CACHE_DIR).
+    """
+    if os.environ.get("ITAM_CACHE_DIR"):
+        return os.environ["ITAM_CACHE_DIR"]
+    system = platform.system()
+    if system == "Windows":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "itamcloud")
+    if system == "Darwin":
+        return os.path.expanduser("~/Library/Caches/itamcloud")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "itamcloud")
+
+
+def write_json_atomic(path, data):
+    """
+    Replace `path` with `data` as JSON. Each writer uses its own temp file, so concurrent
+    saves (agent services share these caches) never interleave; the last rename wins.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def get_boot_id():
+    """
+    Identifier of the current boot: the kernel boot_id on Linux, the boot timestamp elsewhere.
+    """
+    if platform.system() == "Linux":
+        try:
+            with open(LINUX_BOOT_ID, "r") as f:
+                return f.read().strip()
+        except Exception:
+            pass
+    try:
+        return f"boot-{int(psutil.boot_time())}"
+    except Exception as e:
+        print(f"[WARN] Could not determine boot id: {e}")
+        return None
+
+
+def get_dmi_fingerprint():
+    """
+    Short hash of the board/BIOS identity, readable without root.
+    """
+    parts = [platform.system(), platform.machine(), platform.node()]
+    if platform.system() == "Linux":
+        for field in LINUX_DMI_FIELDS:
+            try:
+                with open(f"/sys/class/dmi/id/{field}", "r") as f:
+                    parts.append(f.read().strip())
+            except Exception:
+                parts.append("")
+    else:
+        parts.append(platform.processor())
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
+
+class BootCache:
+    """
+    Boot-scoped key/value store persisted as a small JSON file.
+    """
+
+    def __init__(self, cache_dir=None, enabled=True, refresh=False):
+        self.path = os.path.join(cache_dir or default_cache_dir(), CACHE_FILE)
+        self.enabled = enabled
+        self.refresh = refresh
+        self._key = None
+        self._entries = None
+        # Agent services collect concurrently; entries are read, changed and saved under it.
+        self._lock = threading.RLock()
+
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = f"{get_boot_id()}:{get_dmi_fingerprint()}"
+        return self._key
+
+    def _load(self):
+        with self._lock:
+            if self._entries is not None:
+                return self._entries
+            entries = {}
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                if data.get("key") == self.key:
+                    entries = data.get("entries", {})
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"[WARN] Ignoring unreadable boot cache {self.path}: {e}")
+            self._entries = entries
+            return entries
+
+    def _save(self):
+        try:
+            write_json_atomic(self.path, {"key": self.key, "entries": self._entries})
+        except Exception as e:
+            print(f"[WARN] Could not write boot cache {self.path}: {e}")
+
+    def get(self, name):
+        if not self.enabled or self.refresh:
+            return None
+        return self._load().get(name)
+
+    def put(self, name, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._load()[name] = value
+            self._save()
+
+    def get_or_collect(self, name, collect):
+        """
+        Return the cached value for `name`, or call collect() and cache a non-empty result.
+        Empty results are not cached so a failed probe is retried on the next run.
+        """
+        value = self.get(name)
+        if value is not None:
+            print(f"⚡ Using {name} facts cached for this boot.")
+            return value
+        value = collect()
+        if value:
+            self.put(name, value)
+        return value
+
+
+_boot_cache = BootCache()
+
+
+def get_boot_cache():
+    return _boot_cache
+
+
+def configure(cache_dir=None, enabled=True, refresh=False):
+    """
+    Replace the process-wide cache (used by the CLI for --no-cache / --refresh-cache).
+    """
+    global _boot_cache
+    _boot_cache = BootCache(cache_dir=cache_dir, enabled=enabled, refresh=refresh)
+    return _boot_cache
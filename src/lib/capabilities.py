@@ -0,0 +1,209 @@
+"""
+capabilities.py
+
+Discovers which external tools, privileges and kernel interfaces this host actually has,
+so collectors pick a working strategy up front instead of spawning tools that are missing
+or need a password on every run. The result is persisted with a TTL next to the boot cache.
+
+It also holds the per-probe circuit breaker, keyed by the full command line: a probe that
+fails repeatedly is skipped for the rest of the run, and one that failed in several
+consecutive runs stays disabled until its cool-down expires. Only failures that mean the
+tool cannot run (timeouts, missing binaries, denied privileges) count; see probes.py.
+"""
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+
+from src.lib.boot_cache import default_cache_dir, write_json_atomic
+
+
+CAPABILITIES_FILE = "capabilities.json"
+DEFAULT_TTL = 24 * 3600
+TOOLS = {
+    "linux": ("lspci", "lshw", "xrandr", "udevadm", "nmcli", "dmidecode", "ip"),
+    "darwin": ("system_profiler", "ioreg", "sysctl", "diskutil", "route", "ipconfig"),
+    "windows": ("powershell", "wmic", "netsh", "route"),
+}
+KERNEL_INTERFACES = {
+    "dmi": "/sys/class/dmi/id",
+    "block": "/sys/block",
+    "udev_db": "/run/udev/data",
+    "drm": "/sys/class/drm",
+    "edac": "/sys/devices/system/edac/mc",
+    "tpm": "/sys/class/tpm",
+    "power_supply": "/sys/class/power_supply",
+}
+# Failures of one probe within a run before it is skipped for the rest of the run.
+BREAKER_THRESHOLD = 2
+# Consecutive failing runs before a probe is disabled across runs, and for how long.
+BREAKER_RUNS = 2
+BREAKER_COOLDOWN = 6 * 3600
+
+
+def is_privileged():
+    if hasattr(os, "geteuid"):
+        return os.geteuid() == 0
+    try:
+        import ctypes
+        return bool(ctypes.windll.shell32.IsUserAnAdmin())
+    except Exception:
+        return False
+
+
+def passwordless_sudo():
+    """
+    True if `sudo -n` works without prompting (never blocks on a password).
+    """
+    if not shutil.which("sudo"):
+        return False
+    try:
+        return subprocess.run(["sudo", "-n", "true"], capture_output=True, timeout=5).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+def discover(platform_name=None):
+    """
+    Probe the host once.
+    Returns:
+        dict: platform, privileged, sudo, tools (name -> path or None), interfaces (name -> bool).
+    """
+    platform_name = platform_name or platform.system().lower()
+    privileged = is_privileged()
+    return {
+        "discovered_at": time.time(),
+        "platform": platform_name,
+        "privileged": privileged,
+        "sudo": privileged or passwordless_sudo(),
+        "tools": {tool: shutil.which(tool) for tool in TOOLS.get(platform_name, ())},
+        "interfaces": {
+            name: os.path.exists(path) for name, path in KERNEL_INTERFACES.items()
+        } if platform_name == "linux" else {},
+    }
+
+
+class Capabilities:
+    """
+    Persisted capability map plus probe failure bookkeeping.
+    Args:
+        cache_dir (str): Directory for capabilities.json (defaults to the boot cache directory).
+        ttl (float): Seconds before the host is re-discovered.
+        refresh (bool): Re-discover now regardless of age.
+    """
+
+    def __init__(self, cache_dir=None, ttl=DEFAULT_TTL, refresh=False):
+        self.path = os.path.join(cache_dir or default_cache_dir(), CAPABILITIES_FILE)
+        self.ttl = ttl
+        self.refresh = refresh
+        self._data = None
+        self._run_failures = {}
+        # Agent services probe concurrently; breaker state is changed and saved under it.
+        self._lock = threading.RLock()
+
+    @property
+    def data(self):
+        with self._lock:
+            if self._data is None:
+                self._data = self._load()
+            return self._data
+
+    def _load(self):
+        data = None
+        if not self.refresh:
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"[WARN] Ignoring unreadable capability cache {self.path}: {e}")
+        fresh = (
+            data
+            and data.get("platform") == platform.system().lower()
+            and time.time() - data.get("discovered_at", 0) < self.ttl
+        )
+        if fresh:
+            return data
+        discovered = discover()
+        # Keep breaker state across re-discovery; a probe still failing should stay off.
+        discovered["failing"] = (data or {}).get("failing", {})
+        self._data = discovered
+        self._save()
+        return discovered
+
+    def _save(self):
+        try:
+            write_json_atomic(self.path, self._data)
+        except Exception as e:
+            print(f"[WARN] Could not write capability cache {self.path}: {e}")
+
+    @property
+    def privileged(self):
+        return self.data.get("privileged", False)
+
+    @property
+    def can_sudo(self):
+        return self.data.get("sudo", False)
+
+    def has_tool(self, name):
+        tools = self.data.get("tools", {})
+        if name in tools:
+            return bool(tools[name])
+        # Not in the discovery list: fall back to a live PATH lookup.
+        return shutil.which(name) is not None
+
+    def has_interface(self, name):
+        return self.data.get("interfaces", {}).get(name, False)
+
+    def probe_allowed(self, key):
+        if self._run_failures.get(key, 0) >= BREAKER_THRESHOLD:
+            return False
+        entry = self.data.get("failing", {}).get(key)
+        return not entry or entry.get("until", 0) <= time.time()
+
+    def record_failure(self, key):
+        with self._lock:
+            count = self._run_failures.get(key, 0) + 1
+            self._run_failures[key] = count
+            if count == 1:
+                # Count each failing run once towards the cross-run breaker.
+                failing = self.data.setdefault("failing", {})
+                entry = failing.setdefault(key, {"runs": 0, "until": 0})
+                entry["runs"] += 1
+                if entry["runs"] >= BREAKER_RUNS:
+                    entry["until"] = time.time() + BREAKER_COOLDOWN
+                    print(f"[WARN] {key} failed in {entry['runs']} consecutive runs; disabled for {BREAKER_COOLDOWN // 3600}h")
+                self._save()
+            elif count == BREAKER_THRESHOLD:
+                print(f"[WARN] {key} keeps failing; skipping it for the rest of this run")
+
+    def record_success(self, key):
+        with self._lock:
+            self._run_failures.pop(key, None)
+            if key in self.data.get("failing", {}):
+                del self.data["failing"][key]
+                self._save()
+
+    def missing_tools(self, tools):
+        return sorted(tool for tool in tools if not self.has_tool(tool))
+
+
+_capabilities = Capabilities()
+
+
+def get_capabilities():
+    return _capabilities
+
+
+def configure(cache_dir=None, ttl=DEFAULT_TTL, refresh=False):
+    """
+    Replace the process-wide capability cache (used by the CLI for --refresh-capabilities).
+    """
+    global _capabilities
+    _capabilities = Capabilities(cache_dir=cache_dir, ttl=ttl, refresh=refresh)
+    return _capabilities
@@ -0,0 +1,130 @@
+"""
+collector_registry.py
+
+Registry of the available collectors. Collector modules are only imported when
+a collector is actually selected, so a network-only run never pays for loading
+(or probing with) the hardware, memory or graphics code.
+"""
+
+import importlib
+import platform
+
+
+# Probes that need sudo or routinely take seconds; the "fast" profile avoids them.
+SLOW_PROBES = {"lshw", "dmidecode", "system_profiler", "powershell"}
+
+
+class CollectorSpec:
+    """
+    Describes one collector: where to import it from and which external probes it spawns per platform.
+    """
+    __slots__ = ("name", "module", "class_name", "probes", "aliases", "root_aware")
+
+    def __init__(self, name, module, class_name, probes=None, aliases=(), root_aware=False):
+        self.name = name
+        self.module = module
+        self.class_name = class_name
+        self.probes = probes or {}
+        self.aliases = tuple(aliases)
+        # True if the collector reads only files and so works under an alternate root.
+        self.root_aware = root_aware
+
+    def load(self):
+        """
+        Import the collector module and return its class.
+        """
+        return getattr(importlib.import_module(self.module), self.class_name)
+
+    def create(self, company_id, asset_id, root=None):
+        return self.load()(company_id, asset_id, root=root)
+
+    def probes_for(self, platform_name=None):
+        platform_name = platform_name or platform.system().lower()
+        return set(self.probes.get(platform_name, ()))
+
+    def is_slow(self, platform_name=None):
+        return bool(self.probes_for(platform_name) & SLOW_PROBES)
+
+
+COLLECTORS = [
+    CollectorSpec(
+        "hardware", "src.lib.hardware_info_collector", "HardwareInfoCollector",
+        probes={"windows": ("wmi", "powershell"), "darwin": ("sysctl", "ioreg", "system_profiler")},
+        root_aware=True,
+    ),
+    CollectorSpec(
+        "drives", "src.lib.drive_info_collector", "DriveInfoCollector",
+        probes={"linux": ("udevadm",), "windows": ("wmic",), "darwin": ("system_profiler", "diskutil")},
+        aliases=("drive", "disk", "disks"),
+    ),
+    CollectorSpec(
+        "graphics", "src.lib.graphics_card_info_collector", "GraphicsCardInfoCollector",
+        probes={"linux": ("lspci", "lshw", "xrandr"), "windows": ("wmic",), "darwin": ("system_profiler",)},
+        aliases=("gpu", "display"),
+    ),
+    CollectorSpec(
+        "memory", "src.lib.memory_info_collector", "MemHardwareInfoCollector",
+        # dmidecode is only the fallback for hosts without EDAC; it is never run under --root.
+        probes={"linux": ("dmidecode",), "windows": ("wmic",), "darwin": ("system_profiler",)},
+        aliases=("mem", "ram"),
+        root_aware=True,
+    ),
+    CollectorSpec(
+        "network", "src.lib.network_adapter_info_collector", "NetworkAdapterInfoCollector",
+        probes={"linux": ("ip", "nmcli"), "windows": ("route", "netsh"), "darwin": ("route", "ipconfig")},
+        aliases=("net", "nic"),
+    ),
+]
+
+PROFILES = ("fast", "full")
+
+
+def get_collector(name):
+    """
+    Resolve a collector by name or alias.
+    Raises:
+        KeyError: If the name is unknown.
+    """
+    name = name.strip().lower()
+    for spec in COLLECTORS:
+        if name == spec.name or name in spec.aliases:
+            return spec
+    raise KeyError(f"Unknown collector: {name} (available: {', '.join(s.name for s in COLLECTORS)})")
+
+
+def parse_names(value):
+    """
+    Parse a comma separated CLI value such as "network,memory" into collector names.
+    """
+    if not value:
+        return []
+    return [get_collector(part).name for part in value.split(",") if part.strip()]
+
+
+def select_collectors(only=None, skip=None, profile="full", platform_name=None, root=None):
+    """
+    Pick the collectors to run, in registry order.
+    Args:
+        only (list): Collector names to restrict the run to (None for all).
+        skip (list): Collector names to leave out.
+        profile (str): "full" runs everything, "fast" drops collectors that need slow or sudo probes.
+        platform_name (str): Override for platform.system().lower().
+        root (str): Alternate root; only root-aware collectors are selected when set.
+    Returns:
+        list: Selected CollectorSpec objects.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile: {profile} (available: {', '.join(PROFILES)})")
+    selected = []
+    for spec in COLLECTORS:
+        if only and spec.name not in only:
+            continue
+        if skip and spec.name in skip:
+            continue
+        if root and root != "/" and not spec.root_aware:
+            continue
+        # An explicit --only wins over the profile.
+        if profile == "fast" and not only and spec.is_slow(platform_name):
+            continue
+        selected.append(spec)
+    return selected
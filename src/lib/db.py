@@ -0,0 +1,302 @@
+"""
+db.py
+
+Shared MySQL connection settings and the single write path used by every collector.
+Settings can come from the environment (or a .env file): ITAM_DB_HOST, ITAM_DB_USER,
+ITAM_DB_PASSWORD, ITAM_DB_NAME, and ITAM_SHARDS for a shard config (see shard_router.py).
+"""
+
+import os
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from src.lib.fleet_summary import has_dimensions, record_change
+from src.lib.shard_router import load_config
+
+load_dotenv()
+
+# Database config (store securely in production!)
+DB_HOST=os.environ.get("ITAM_DB_HOST", "68.178.156.243")
+DB_USER=os.environ.get("ITAM_DB_USER", "itamcloud")
+DB_PASSWORD=os.environ.get("ITAM_DB_PASSWORD", "Kgl0b@ltech")
+DB_NAME=os.environ.get("ITAM_DB_NAME", "ITAMCloud")
+
+# Process-wide connection overrides set by configure(), e.g. to point tools at a local instance.
+_overrides = {}
+# ShardRouter when companies are spread over several servers; None for the single server.
+_router = None
+# Print a line per successful write; bulk tools turn this off.
+VERBOSE = True
+
+
+def configure(verbose=None, **overrides):
+    """
+    Override connection settings (host, port, user, password, database) for this process.
+    """
+    global VERBOSE
+    _overrides.update({k: v for k, v in overrides.items() if v is not None})
+    if verbose is not None:
+        VERBOSE = verbose
+
+
+def base_settings():
+    params = dict(host=DB_HOST, user=DB_USER, password=DB_PASSWORD, database=DB_NAME)
+    params.update(_overrides)
+    return params
+
+
+def configure_shards(path=None):
+    """
+    Route connections through a shard config file (default: $ITAM_SHARDS, if set).
+    Returns:
+        ShardRouter: The router, or None when no config is given.
+    """
+    global _router
+    path = path or os.environ.get("ITAM_SHARDS")
+    _router = load_config(path, base=base_settings()) if path else None
+    return _router
+
+
+def get_router():
+    return _router
+
+
+def get_connection(company_id=None, **overrides):
+    """
+    Open a connection with the configured settings; keyword arguments
+    (host, port, user, password, database, ...) override them, e.g. for a local instance.
+    With a shard router configured (and no overrides) this is a pooled connection to
+    the shard holding `company_id` (the default shard when it is None).
+    """
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+    if _router is not None and not overrides:
+        return _router.connection_for(company_id)
+    params = base_settings()
+    params.update(overrides)
+    return mysql.connector.connect(**params)
+
+
+def find_asset_connection(serial):
+    """
+    Connect to wherever `serial` lives and resolve it.
+    Returns:
+        tuple: (connection, (asset_id, company_id) or None); the caller closes the connection.
+    """
+    if _router is not None:
+        found = _router.find_serial(serial)
+        if found:
+            connection, asset_id, company_id = found
+            return connection, (asset_id, company_id)
+        return _router.connection_for(None), None
+    connection = get_connection()
+    cursor = connection.cursor(buffered=True)
+    try:
+        cursor.execute("SELECT id, company_id FROM assets WHERE serial = %s", (serial,))
+        return connection, cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def bind_asset(asset_id, company_id):
+    """
+    Tell the shard router which company an asset belongs to (no-op without one).
+    """
+    if _router is not None:
+        _router.bind_asset(asset_id, company_id)
+
+
+def company_for(schema, asset_id=None, records=()):
+    """
+    The company a write belongs to, for routing: taken from the records when the table
+    carries company_id, otherwise from the asset binding.
+    """
+    if _router is None:
+        return None
+    if records and "company_id" in schema.columns:
+        return records[0].company_id
+    if asset_id is None and records:
+        asset_id = records[0].asset_id
+    company_id = _router.company_of_asset(asset_id)
+    if company_id is None and len(_router.shards) > 1:
+        print(f"[WARN] Asset {asset_id} was not resolved through the router; writing to the default shard")
+    return company_id
+
+
+def write_records(schema, records, upsert=False):
+    """
+    Write records into the schema's table in one executemany round trip.
+    Args:
+        schema (TableSchema): Target table description.
+        records (list): Records of schema.record_type.
+        upsert (bool): Use ON DUPLICATE KEY UPDATE instead of a plain INSERT.
+    Returns:
+        bool: True if the rows were committed.
+    """
+    if not records:
+        print(f"❌ No records to insert into {schema.table}.")
+        return False
+    if _router is not None:
+        # A batch spanning companies may span shards: write each company's part separately.
+        companies = {}
+        for record in records:
+            companies.setdefault(company_for(schema, records=[record]), []).append(record)
+        if len(companies) > 1:
+            return all([write_records(schema, group, upsert) for group in companies.values()])
+    connection = None
+    cursor = None
+    try:
+        connection = get_connection(company_for(schema, records=records))
+        cursor = connection.cursor()
+        params = schema.params_many(records)
+        old_rows = {}
+        if has_dimensions(schema):
+            # An upsert replaces each asset's row; lock and read it first so the summary can move it.
+            for asset_id in {record.asset_id for record in records}:
+                if upsert:
+                    cursor.execute(schema.select_sql(), (asset_id,))
+                    old_rows[asset_id] = cursor.fetchall()
+                else:
+                    old_rows[asset_id] = []
+        query = schema.upsert_sql() if upsert else schema.insert_sql()
+        cursor.executemany(query, params)
+        asset_index = schema.columns.index("asset_id")
+        for asset_id, rows in old_rows.items():
+            record_change(cursor, schema, asset_id, rows, [p for p in params if p[asset_index] == asset_id])
+        connection.commit()
+        if VERBOSE:
+            print(f"✅ Inserted {len(records)} records into {schema.table}")
+        return True
+    except mysql.connector.Error as err:
+        print(f"❌ MySQL error: {err}")
+    except Exception as e:
+        print(f"❌ General error: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+        if connection and connection.is_connected():
+            connection.close()
+    return False
+
+
+def apply_changes(cursor, schema, inserts, updates, deletes):
+    """
+    Execute a computed delta: deletes by key, updates (in update_params order) and inserts.
+    """
+    if deletes:
+        cursor.executemany(schema.delete_sql(), deletes)
+    if updates:
+        cursor.executemany(schema.update_sql(), updates)
+    if inserts:
+        cursor.executemany(schema.insert_sql(), inserts)
+
+
+def sync_records(schema, asset_id, records, delete_missing=True):
+    """
+    Replace-set sync of one asset's rows in a child table, keyed on the schema's natural key.
+    Changed rows are updated, new rows inserted and (unless delete_missing is False)
+    rows that vanished from the collected set are deleted, so each asset only holds
+    its current set instead of one copy per run.
+    Args:
+        schema (TableSchema): Target table description.
+        asset_id (int): Asset whose rows are being replaced.
+        records (list): The complete current set of records for the asset.
+        delete_missing (bool): Delete rows whose key is absent from `records`.
+    Returns:
+        dict: Counts of inserted, updated and deleted rows, or None on error.
+    """
+    connection = None
+    cursor = None
+    try:
+        connection = get_connection(company_for(schema, asset_id, records))
+        cursor = connection.cursor()
+        cursor.execute(schema.select_sql(), (asset_id,))
+        existing_rows = cursor.fetchall()
+        inserts, updates, deletes, current = schema.plan_sync(existing_rows, records, delete_missing)
+        apply_changes(cursor, schema, inserts, updates, deletes)
+        if inserts or updates or deletes:
+            record_change(cursor, schema, asset_id, existing_rows, current)
+        connection.commit()
+        counts = {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+        if VERBOSE:
+            print(f"✅ Synced {schema.table} for asset {asset_id}: {counts}")
+        return counts
+    except mysql.connector.Error as err:
+        print(f"❌ MySQL error: {err}")
+    except Exception as e:
+        print(f"❌ General error: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+        if connection and connection.is_connected():
+            connection.close()
+    return None
+
+
+def write_delta(schema, inserted=(), updated=(), deleted=()):
+    """
+    Apply an already-known delta without reading the table first.
+    Used by event-driven paths that mirror the table in memory.
+    Args:
+        schema (TableSchema): Target table description.
+        inserted (list): New records.
+        updated (list): Records whose non-key columns changed.
+        deleted (list): Records that disappeared.
+    Returns:
+        bool: True if the delta was committed.
+    """
+    if not (inserted or updated or deleted):
+        return True
+    connection = None
+    cursor = None
+    try:
+        connection = get_connection(company_for(schema, records=[*inserted, *updated, *deleted]))
+        cursor = connection.cursor()
+        summarized = {}
+        if has_dimensions(schema):
+            # The summary needs the rows as they were; lock and read them first.
+            for asset_id in {record.asset_id for record in (*inserted, *updated, *deleted)}:
+                cursor.execute(schema.select_sql(), (asset_id,))
+                summarized[asset_id] = cursor.fetchall()
+        apply_changes(
+            cursor,
+            schema,
+            schema.params_many(inserted),
+            [schema.update_params(p) for p in schema.params_many(updated)],
+            [schema.key_of(p) for p in schema.params_many(deleted)],
+        )
+        for asset_id, old_rows in summarized.items():
+            current = {schema.key_of(row): tuple(row) for row in old_rows}
+            for params in schema.params_many(deleted):
+                current.pop(schema.key_of(params), None)
+            for params in schema.params_many([*inserted, *updated]):
+                if params[schema.columns.index("asset_id")] == asset_id:
+                    current[schema.key_of(params)] = params
+            record_change(cursor, schema, asset_id, old_rows, current.values())
+        connection.commit()
+        if VERBOSE:
+            print(f"✅ {schema.table}: {len(inserted)} inserted, {len(updated)} updated, {len(deleted)} deleted")
+        return True
+    except mysql.connector.Error as err:
+        print(f"❌ MySQL error: {err}")
+    except Exception as e:
+        print(f"❌ General error: {e}")
+    finally:
+        if cursor:
+            cursor.close()
+        if connection and connection.is_connected():
+            connection.close()
+    return False
+
+
+def upload_records(schema, asset_id, records):
+    """
+    Upload one asset's records using the write mode the schema declares:
+    "upsert" for one-row-per-asset tables, "sync" for replace-set child tables,
+    "insert" for append-only series.
+    Returns:
+        bool: True if the write succeeded.
+    """
+    if schema.mode == "sync":
+        return sync_records(schema, asset_id, records) is not None
+    return write_records(schema, records, upsert=schema.mode == "upsert")
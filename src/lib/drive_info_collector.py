@@ -1,57 +1,134 @@
+import glob
 import subprocess
 import re
 import platform
 import psutil
 import os
-import mysql.connector
-import json
 
-
-# Database config (store securely in production!)
-DB_HOST="68.178.156.243"
-DB_USER="itamcloud"
-DB_PASSWORD="Kgl0b@ltech"
-DB_NAME="ITAMCloud"
+from src.lib.storage import get_backend
+from src.lib.probes import run_probe
+from src.lib.schema import DRIVES
 
 class DriveInfoCollector:
+    def __init__(self, company_id=None, asset_id=None, root=None):
+        self.asset_id = asset_id
+        self.company_id = company_id
+        self.root = root  # accepted for a uniform constructor; devices are always read live
+
     # Linux method (from your example, unchanged)
     def get_linux_drive_info(self, device_name):
         """
         Get model, serial, interface, and type for a Linux block device.
+        Falls back to sysfs when udevadm is missing or keeps failing.
+        """
+        if device_name.startswith("loop") or device_name.startswith("ram"):
+            return None  # Skip virtual devices
+
+        info = run_probe(['udevadm', 'info', '--query=all', f'--name=/dev/{device_name}'])
+        if info is None:
+            return self.get_sysfs_drive_info(device_name)
+
+        model = re.search(r'ID_MODEL=(.*)', info)
+        serial = re.search(r'ID_SERIAL_SHORT=(.*)', info)
+        interface = re.search(r'ID_BUS=(.*)', info)
+        drive_type = re.search(r'ID_TYPE=(.*)', info)
+
+        return {
+            "model": model.group(1) if model else "Unknown",
+            "serial_number": serial.group(1) if serial else "Unknown",
+            "interface_type": interface.group(1) if interface else "Unknown",
+            "drive_type": drive_type.group(1) if drive_type else "Unknown",
+            "size": self.get_sysfs_device_size(device_name),
+        }
+
+    @staticmethod
+    def get_sysfs_device_size(device_name):
+        """
+        Capacity of the whole device in bytes (/sys/block/<dev>/size counts 512-byte sectors).
         """
         try:
-            if device_name.startswith("loop") or device_name.startswith("ram"):
-                return None  # Skip virtual devices
+            with open(f"/sys/block/{device_name}/size", "r") as f:
+                return int(f.read().strip()) * 512
+        except (OSError, ValueError):
+            return None
 
-            result = subprocess.run(
-                ['udevadm', 'info', '--query=all', f'--name=/dev/{device_name}'],
-                capture_output=True, text=True, check=True
-            )
+    def get_sysfs_drive_info(self, device_name):
+        """
+        Same fields as get_linux_drive_info, read from /sys/block without spawning anything.
+        """
+        base = f"/sys/block/{device_name}"
 
-            info = result.stdout
-            model = re.search(r'ID_MODEL=(.*)', info)
-            serial = re.search(r'ID_SERIAL_SHORT=(.*)', info)
-            interface = re.search(r'ID_BUS=(.*)', info)
-            drive_type = re.search(r'ID_TYPE=(.*)', info)
+        def read(relative):
+            try:
+                with open(os.path.join(base, relative), "r") as f:
+                    return f.read().strip() or None
+            except OSError:
+                return None
 
-            return {
-                "model": model.group(1) if model else "Unknown",
-                "serial_number": serial.group(1) if serial else "Unknown",
-                "interface_type": interface.group(1) if interface else "Unknown",
-                "drive_type": drive_type.group(1) if drive_type else "Unknown"
-            }
-        except Exception as e:
-            print(f"Error fetching udevadm info for /dev/{device_name}: {e}")
-            return {
-                "model": "Unknown",
-                "serial_number": "Unknown",
-                "interface_type": "Unknown",
-                "drive_type": "Unknown"
-            }
+        path = os.path.realpath(base)
+        interface = "Unknown"
+        for marker, bus in (("/nvme", "nvme"), ("/usb", "usb"), ("/virtio", "virtio"), ("/ata", "ata")):
+            if marker in path:
+                interface = bus
+                break
+        return {
+            "model": read("device/model") or "Unknown",
+            "serial_number": read("device/serial") or "Unknown",
+            "interface_type": interface,
+            "drive_type": "disk" if os.path.exists(base) else "Unknown",
+            "size": self.get_sysfs_device_size(device_name),
+        }
+
+    def list_linux_block_devices(self):
+        """
+        Whole-disk devices from /sys/block with all their partitions, mounted or not, so a
+        freshly attached USB disk is listed before (or without) anything mounting it.
+        Virtual devices (loop, zram, device-mapper, md) and drives without media (empty card
+        readers, optical drives) are skipped.
+        Returns:
+            list: (device name, [partition names]) pairs.
+        """
+        def natural(name):
+            return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+        devices = []
+        for base in sorted(glob.glob("/sys/block/*"), key=natural):
+            device_id = os.path.basename(base)
+            if "/virtual/" in os.path.realpath(base) or not self.get_sysfs_device_size(device_id):
+                continue
+            partitions = [os.path.basename(os.path.dirname(path))
+                          for path in glob.glob(os.path.join(base, "*", "partition"))]
+            devices.append((device_id, sorted(partitions, key=natural)))
+        return devices
+
+    def collect_linux_drive_records(self, asset_id, probe_cache=None):
+        """
+        Linux: one DriveRecord per device in /sys/block; see collect_drive_records().
+        """
+        records = []
+        for device_id, partitions in self.list_linux_block_devices():
+            if probe_cache is not None and device_id in probe_cache:
+                drive_info = probe_cache[device_id]
+            else:
+                drive_info = self.probe_drive(device_id)
+                if probe_cache is not None:
+                    probe_cache[device_id] = drive_info
+            if drive_info is None:
+                continue
+            print(f"Device: {device_id}, Partitions: {', '.join(partitions) or '-'}")
+            records.append(DRIVES.build(
+                drive_info,
+                asset_id=asset_id,
+                device_id=device_id,
+                size=drive_info.get("size") or self.get_sysfs_device_size(device_id),
+                partitions=",".join(partitions) or device_id,
+            ))
+        print(f"🔍 Collected drive information for {len(records)} devices.")
+        return records
 
     def get_windows_drive_info(self, device_index):
         try:
-            query = f"wmic diskdrive where Index={device_index} get Model,SerialNumber,InterfaceType,MediaType /format:list"
+            query = f"wmic diskdrive where Index={device_index} get Model,SerialNumber,InterfaceType,MediaType,Size /format:list"
             result = subprocess.run(
                 query,
                 capture_output=True, text=True, shell=True, check=True
@@ -61,12 +138,14 @@ class DriveInfoCollector:
             serial = re.search(r'SerialNumber=(.*)', info)
             interface = re.search(r'InterfaceType=(.*)', info)
             drive_type = re.search(r'MediaType=(.*)', info)
+            size = re.search(r'Size=(\d+)', info)
 
             return {
                 "model": model.group(1).strip() if model else "Unknown",
                 "serial_number": serial.group(1).strip() if serial else "Unknown",
                 "interface_type": interface.group(1).strip() if interface else "Unknown",
-                "drive_type": drive_type.group(1).strip() if drive_type else "Unknown"
+                "drive_type": drive_type.group(1).strip() if drive_type else "Unknown",
+                "size": int(size.group(1)) if size else None,
             }
         except Exception as e:
             print(f"Error fetching WMIC info for disk index {device_index}: {e}")
@@ -103,20 +182,22 @@ class DriveInfoCollector:
             # Type (SSD/HDD)
             drive_type = re.search(r'Media Type: (.*)', block)
 
-            # Fallback: Try diskutil info for serial if not found
+            # diskutil gives the device size, and a unique ID when there is no serial
+            du_result = subprocess.run(
+                ['diskutil', 'info', disk_identifier],
+                capture_output=True, text=True, check=True
+            )
+            du_info = du_result.stdout
             if not serial:
-                du_result = subprocess.run(
-                    ['diskutil', 'info', disk_identifier],
-                    capture_output=True, text=True, check=True
-                )
-                du_info = du_result.stdout
                 serial = re.search(r'Disk / Partition UUID: (.*)', du_info)  # not a real serial, but a unique ID
+            size = re.search(r'Disk Size:.*\((\d+) Bytes\)', du_info)
 
             return {
                 "model": model.group(1).strip() if model else "Unknown",
                 "serial_number": serial.group(1).strip() if serial else "Unknown",
                 "interface_type": interface.group(1).strip() if interface else "Unknown",
-                "drive_type": drive_type.group(1).strip() if drive_type else "Unknown"
+                "drive_type": drive_type.group(1).strip() if drive_type else "Unknown",
+                "size": int(size.group(1)) if size else None,
             }
         except Exception as e:
             print(f"Error fetching drive info for {disk_identifier} on macOS: {e}")
@@ -129,49 +210,46 @@ class DriveInfoCollector:
         
     @staticmethod
     def insert_driver_info(records):
-        connection = None
-        cursor = None
-        try:
-            connection = mysql.connector.connect(
-                host=DB_HOST,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                database=DB_NAME
-            )
-            cursor = connection.cursor()
-
-            insert_query = """
-                INSERT INTO assets_drives_info
-                (asset_id, device_id, model, serial_number, drive_type, interface_type, size, partitions)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """
-            print("🔄 Inserting driver info into assets_drives_info table...")
-            print(f"Total records to insert: {len(records)}")
-            print("This may take a while...")
-            if not records:
-                print("❌ No records to insert.")
-                return
-            # Execute the insert query for all records
-            print("Executing insert query...")
-            records_fixed = [
-                (json.dumps(rec[0]), *rec[1:]) for rec in records
-            ]
-            cursor.executemany(insert_query, records_fixed)
-            connection.commit()
+        print("🔄 Inserting driver info into assets_drives_info table...")
+        print(f"Total records to insert: {len(records)}")
+        if not records:
+            print("❌ No records to insert.")
+            return
+        if get_backend().sync_records(DRIVES, records[0].asset_id, records) is not None:
             print("✅ Driver info inserted successfully.")
-            print(f"[+] Inserted {len(records)} records into assets_drives_info")
-        except mysql.connector.Error as err:
-            print(f"❌ MySQL error: {err}")
-        except Exception as e:
-            print(f"❌ General error: {e}")
-        finally:
-            if cursor:
-                cursor.close()
-            if connection and connection.is_connected():
-                connection.close()
 
-    def get_drive_info(self, asset_id):
-        records = []
+    def probe_drive(self, device_id):
+        """
+        Look up model, serial, interface and type for one device on the current platform.
+        """
+        platform_name = platform.system().lower()
+        if platform_name == "windows":
+            print("🔍 Collecting Windows system information...")
+            return self.get_windows_drive_info(device_id)
+        elif platform_name == "linux":
+            print("🔍 Collecting Linux system information...")
+            return self.get_linux_drive_info(device_id)
+        elif platform_name == "darwin":  # macOS
+            print("🔍 Collecting macOS system information...")
+            return self.get_mac_drive_info(device_id)
+        else:
+            print("❌ Unsupported platform:", platform_name)
+            exit(1)
+
+    def collect_drive_records(self, asset_id, probe_cache=None):
+        """
+        Collect one DriveRecord per physical device without uploading.
+        Partitions on the same device are folded into it.
+        Args:
+            asset_id (int): Asset identifier.
+            probe_cache (dict): Optional device_id -> probe result map; devices found in it
+                are not re-probed and new results are stored in it.
+        """
+        if platform.system() == "Linux" and os.path.isdir("/sys/block"):
+            # Mounted filesystems would miss disks nothing has mounted yet.
+            return self.collect_linux_drive_records(asset_id, probe_cache)
+        drives = {}
+        device_sized = set()
         for p in psutil.disk_partitions(all=False):
             device_path = p.device      # e.g. '/dev/sda1' (Linux/macOS) or 'C:\\' (Windows)
             mountpoint = p.mountpoint   # e.g. '/' or 'C:\\'
@@ -197,35 +275,51 @@ class DriveInfoCollector:
             else:
                 device_id = re.sub(r'[0-9]+$', '', device_name)
 
-            platform_name = platform.system().lower()
-            if platform_name == "windows":
-                print("🔍 Collecting Windows system information...")
-                drive_info = self.get_windows_drive_info(device_id)
-            elif platform_name == "linux":
-                print("🔍 Collecting Linux system information...")
-                drive_info = self.get_mac_drive_info(device_id)
-            elif platform_name == "darwin":  # macOS
-                print("🔍 Collecting macOS system information...")
-                drive_info = self.get_mac_drive_info(device_id) 
+            if device_id in drives:
+                drive = drives[device_id]
+                if device_id not in device_sized:
+                    drive.size = (drive.size or 0) + size
+                drive.partitions = f"{drive.partitions},{device_name}"
+                continue
+
+            if probe_cache is not None and device_id in probe_cache:
+                drive_info = probe_cache[device_id]
             else:
-                print("❌ Unsupported platform:", platform_name)
-                exit(1)
-                
+                drive_info = self.probe_drive(device_id)
+                if probe_cache is not None:
+                    probe_cache[device_id] = drive_info
+
             if drive_info is None:
                 continue  # skip loop/virtual
 
-            records.append((
-                asset_id,
-                device_id,
-                drive_info.get("model", "Unknown"),
-                drive_info.get("serial_number", "Unknown"),
-                drive_info.get("drive_type", "Unknown"),
-                drive_info.get("interface_type", "Unknown"),
-                size,
-                device_name  # original partition name
-            ))
+            # Prefer the device's own capacity; the sum of mounted filesystems is the fallback.
+            if drive_info.get("size"):
+                device_sized.add(device_id)
+            drives[device_id] = DRIVES.build(
+                drive_info,
+                asset_id=asset_id,
+                device_id=device_id,
+                size=drive_info.get("size") or size,
+                partitions=device_name  # original partition name(s), comma separated
+            )
+        records = list(drives.values())
         print(f"🔍 Collected drive information for {len(records)} devices.")
+        return records
+
+    def collect(self):
+        return self.collect_drive_records(self.asset_id)
+
+    def upload(self, records):
         if records:
             print(records)
             print("🔄 Inserting drive information into the database...")
             self.insert_driver_info(records)
+
+    def get_drive_info(self, asset_id):
+        self.upload(self.collect_drive_records(asset_id))
+
+    def run(self):
+        """
+        Collect and upload for the configured asset (entry point used by the collector registry).
+        """
+        self.get_drive_info(self.asset_id)
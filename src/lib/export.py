@@ -0,0 +1,241 @@
+"""
+export.py
+
+Streaming export of the fleet inventory for audits. Each section (hardware, drives,
+memory, graphics, network) is one query joining the section table to `assets`, read
+through an unbuffered cursor in fetchmany() chunks and written out as it arrives, so
+memory use depends on the chunk size rather than on the fleet size.
+
+One file per section is written; CSV and JSON Lines need nothing extra, Parquet needs
+pyarrow.
+"""
+
+import csv
+import datetime
+import decimal
+import json
+import os
+
+import mysql.connector
+
+from src.lib.schema import get_schema
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet output is optional
+    pyarrow = None
+
+
+EXPORT_SECTIONS = ("hardware", "drives", "memory", "graphics", "network")
+FORMATS = ("csv", "jsonl", "parquet")
+EXTENSIONS = {"csv": "csv", "jsonl": "jsonl", "parquet": "parquet"}
+DEFAULT_CHUNK_SIZE = 5000
+# hardware's created_at is re-stamped by every upsert; the child tables keep updated_at.
+CHANGED_COLUMNS = {"hardware": "created_at"}
+# A slow writer (Parquet, a network share) must not make the server drop the stream.
+NET_WRITE_TIMEOUT = 600
+
+
+def changed_column(section):
+    return CHANGED_COLUMNS.get(section, "updated_at")
+
+
+def export_query(section, company_id=None, since=None):
+    """
+    SELECT for one section, joined to its asset, in asset order.
+    Args:
+        section (str): Schema name from EXPORT_SECTIONS.
+        company_id (int): Only this company's assets.
+        since (datetime): Only rows written at or after this time.
+    Returns:
+        tuple: (sql, params)
+    """
+    schema = get_schema(section)
+    columns = ["a.id AS asset_id", "a.company_id", "a.serial AS asset_serial"]
+    columns += [f"t.{c}" for c in schema.columns if c not in ("asset_id", "company_id")]
+    changed = changed_column(section)
+    columns.append(f"t.{changed}")
+    conditions = []
+    params = []
+    if company_id is not None:
+        conditions.append("a.company_id = %s")
+        params.append(company_id)
+    if since is not None:
+        conditions.append(f"t.{changed} >= %s")
+        params.append(since)
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+    sql = (
+        f"SELECT {', '.join(columns)} FROM {schema.table} t "
+        f"JOIN assets a ON a.id = t.asset_id {where}"
+        f"ORDER BY a.id"
+    )
+    return sql, tuple(params)
+
+
+def stream_rows(connection, sql, params=(), chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield (column names, type codes) once, then lists of up to chunk_size rows.
+    The cursor is unbuffered, so rows are pulled off the connection as they are consumed;
+    the generator must be exhausted (or closed) before the connection runs another query.
+    """
+    cursor = connection.cursor(buffered=False)
+    try:
+        cursor.execute(sql, params)
+        yield list(cursor.column_names), [d[1] for d in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def _plain(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime.datetime) else value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", "replace")
+    return value
+
+
+class CsvWriter:
+    def __init__(self, path, columns, types):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows([["" if v is None else _plain(v) for v in row] for row in rows])
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path, columns, types):
+        self.file = open(path, "w", encoding="utf-8")
+        self.columns = columns
+
+    def write(self, rows):
+        columns = self.columns
+        self.file.writelines(
+            json.dumps({c: _plain(v) for c, v in zip(columns, row)}, default=str) + "\n" for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+_ARROW_INTEGERS = {"TINY", "SHORT", "INT24", "LONG", "LONGLONG", "YEAR"}
+_ARROW_FLOATS = {"FLOAT", "DOUBLE", "DECIMAL", "NEWDECIMAL"}
+_ARROW_TIMES = {"TIMESTAMP", "DATETIME"}
+
+
+def arrow_type(type_code):
+    """
+    Arrow column type for a MySQL result column, from cursor.description.
+    """
+    name = mysql.connector.FieldType.get_info(type_code)
+    if name in _ARROW_INTEGERS:
+        return pyarrow.int64()
+    if name in _ARROW_FLOATS:
+        return pyarrow.float64()
+    if name in _ARROW_TIMES:
+        return pyarrow.timestamp("s")
+    return pyarrow.string()
+
+
+class ParquetWriter:
+    """
+    Writes one row group per fetched chunk, with the column types taken from the result set
+    so every row group shares one schema.
+    """
+
+    def __init__(self, path, columns, types):
+        if pyarrow is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install -r requirements-parquet.txt)")
+        self.columns = columns
+        self.schema = pyarrow.schema([(c, arrow_type(t)) for c, t in zip(columns, types)])
+        self.converters = []
+        for field in self.schema:
+            if field.type == pyarrow.string():
+                self.converters.append(lambda v: str(_plain(v)))
+            elif field.type == pyarrow.float64():
+                self.converters.append(float)
+            else:
+                self.converters.append(None)
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows):
+        arrays = []
+        for i, (field, convert) in enumerate(zip(self.schema, self.converters)):
+            values = [row[i] for row in rows]
+            if convert:
+                values = [None if v is None else convert(v) for v in values]
+            arrays.append(pyarrow.array(values, type=field.type))
+        self.writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+
+def export_section(connection, section, output_dir, fmt="csv", company_id=None, since=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream one section to <output_dir>/<section>.<ext>. The file is written under a .part
+    name and renamed when complete, so an interrupted export never leaves a truncated file
+    that looks finished.
+    Returns:
+        tuple: (path, rows written)
+    """
+    path = os.path.join(output_dir, f"{section}.{EXTENSIONS[fmt]}")
+    partial = path + ".part"
+    sql, params = export_query(section, company_id, since)
+    chunks = stream_rows(connection, sql, params, chunk_size)
+    writer = None
+    count = 0
+    complete = False
+    try:
+        columns, types = next(chunks)
+        writer = WRITERS[fmt](partial, columns, types)
+        for rows in chunks:
+            writer.write(rows)
+            count += len(rows)
+        complete = True
+    finally:
+        chunks.close()
+        if writer:
+            writer.close()
+        if not complete and os.path.exists(partial):
+            os.remove(partial)
+    os.replace(partial, path)
+    return path, count
+
+
+def export_inventory(connection, output_dir, sections=EXPORT_SECTIONS, fmt="csv", company_id=None,
+                     since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Export every requested section, one after another over the same connection.
+    Returns:
+        dict: Section -> (path, rows written).
+    """
+    if fmt == "parquet" and pyarrow is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install -r requirements-parquet.txt)")
+    os.makedirs(output_dir, exist_ok=True)
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SET SESSION net_write_timeout = {NET_WRITE_TIMEOUT}")
+    finally:
+        cursor.close()
+    results = {}
+    for section in sections:
+        results[section] = export_section(connection, section, output_dir, fmt, company_id, since, chunk_size)
+        print(f"✅ {results[section][1]} {section} rows -> {results[section][0]}")
+    return results
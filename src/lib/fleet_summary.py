@@ -0,0 +1,208 @@
+"""
+fleet_summary.py
+
+Pre-aggregated fleet counters for dashboards, kept in `fleet_summary` keyed by
+(company_id, dimension, value): how many items fall into each bucket and, where it makes
+sense, the sum of a size column (total RAM, total disk). The write paths in db.py apply
+the difference between an asset's old and new rows in the same transaction, so dashboard
+queries read a handful of rows instead of aggregating the raw tables; `rebuild()`
+recomputes everything set-based after bulk loads or schema changes.
+"""
+
+from collections import Counter
+
+from src.lib.schema import get_schema
+
+
+SUMMARY_TABLE = "fleet_summary"
+VALUE_WIDTH = 191
+TPM_MISSING = ("", "Unknown")
+
+
+class Dimension:
+    """
+    One way of bucketing a table's rows.
+    Args:
+        name (str): Dimension name stored in fleet_summary.dimension.
+        value_of (callable): Row dict -> bucket value.
+        value_sql (str): The same bucket as an SQL expression over alias `t`.
+        total_column (str): Column summed into fleet_summary.total, if any.
+    """
+    __slots__ = ("name", "value_of", "value_sql", "total_column")
+
+    def __init__(self, name, value_of, value_sql, total_column=None):
+        self.name = name
+        self.value_of = value_of
+        self.value_sql = value_sql
+        self.total_column = total_column
+
+
+def _tpm_state(row):
+    return "missing" if row.get("tpm_manufacturer") in (None,) + TPM_MISSING else "present"
+
+
+DIMENSIONS = {
+    "hardware": (
+        Dimension("bios", lambda row: row.get("bios"), "t.bios"),
+        Dimension("cpu", lambda row: row.get("cpu_id"), "t.cpu_id"),
+        Dimension("tpm", _tpm_state,
+                  "CASE WHEN t.tpm_manufacturer IS NULL OR t.tpm_manufacturer IN ('', 'Unknown') "
+                  "THEN 'missing' ELSE 'present' END"),
+        # memory_slots_used carries the machine's total RAM in bytes.
+        Dimension("ram", lambda row: "total", "'total'", total_column="memory_slots_used"),
+    ),
+    "memory": (
+        Dimension("memory_type", lambda row: row.get("type"), "t.type", total_column="capacity"),
+    ),
+    "graphics": (
+        Dimension("gpu", lambda row: row.get("name"), "t.name"),
+    ),
+    "drives": (
+        Dimension("drive_type", lambda row: row.get("drive_type"), "t.drive_type", total_column="size"),
+    ),
+}
+
+
+def has_dimensions(schema):
+    return schema.name in DIMENSIONS
+
+
+def _bucket(value):
+    return "" if value is None else str(value)[:VALUE_WIDTH]
+
+
+def _number(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def contributions(schema, rows):
+    """
+    Bucket counts for a set of rows.
+    Args:
+        rows (iterable): Parameter tuples / fetched rows in schema.columns order.
+    Returns:
+        tuple: (items, totals) Counters keyed by (dimension, value).
+    """
+    items = Counter()
+    totals = Counter()
+    for row in rows:
+        values = dict(zip(schema.columns, row))
+        for dimension in DIMENSIONS.get(schema.name, ()):
+            key = (dimension.name, _bucket(dimension.value_of(values)))
+            items[key] += 1
+            if dimension.total_column:
+                totals[key] += _number(values.get(dimension.total_column))
+    return items, totals
+
+
+def summary_delta(schema, old_rows, new_rows):
+    """
+    Change in bucket counts when an asset's rows go from old_rows to new_rows.
+    Returns:
+        list: (dimension, value, items delta, total delta), sorted so concurrent writers
+            lock summary rows in the same order; empty when nothing moved.
+    """
+    old_items, old_totals = contributions(schema, old_rows)
+    new_items, new_totals = contributions(schema, new_rows)
+    changes = []
+    for key in set(old_items) | set(new_items):
+        items = new_items[key] - old_items[key]
+        total = new_totals[key] - old_totals[key]
+        if items or total:
+            changes.append((key[0], key[1], items, total))
+    return sorted(changes)
+
+
+def company_of(cursor, asset_id):
+    cursor.execute("SELECT company_id FROM assets WHERE id = %s", (asset_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def apply_summary_delta(cursor, company_id, changes):
+    """
+    Apply summary_delta() output inside the caller's transaction.
+    """
+    if not changes or company_id is None:
+        return
+    cursor.executemany(
+        f"INSERT INTO {SUMMARY_TABLE} (company_id, dimension, value, items, total) "
+        f"VALUES (%s, %s, %s, %s, %s) "
+        f"ON DUPLICATE KEY UPDATE items = items + VALUES(items), total = total + VALUES(total)",
+        [(company_id, dimension, value, items, total) for dimension, value, items, total in changes],
+    )
+    if any(items < 0 for _, _, items, _ in changes):
+        cursor.execute(f"DELETE FROM {SUMMARY_TABLE} WHERE company_id = %s AND items <= 0", (company_id,))
+
+
+def record_change(cursor, schema, asset_id, old_rows, new_rows):
+    """
+    Move an asset's contribution from old_rows to new_rows (both in schema.columns order)
+    inside the caller's transaction. Tables without a company_id column look it up from `assets`.
+    """
+    if not has_dimensions(schema):
+        return
+    old_rows = list(old_rows)
+    new_rows = list(new_rows)
+    if "company_id" in schema.columns:
+        index = schema.columns.index("company_id")
+        for company_id in {row[index] for row in old_rows + new_rows}:
+            apply_summary_delta(cursor, company_id, summary_delta(
+                schema,
+                [row for row in old_rows if row[index] == company_id],
+                [row for row in new_rows if row[index] == company_id],
+            ))
+        return
+    changes = summary_delta(schema, old_rows, new_rows)
+    if changes:
+        apply_summary_delta(cursor, company_of(cursor, asset_id), changes)
+
+
+def rebuild(cursor, company_id=None):
+    """
+    Recompute the summary from the raw tables (for one company or all), set-based.
+    """
+    scope = "WHERE company_id = %s" if company_id is not None else ""
+    params = (company_id,) if company_id is not None else ()
+    cursor.execute(f"DELETE FROM {SUMMARY_TABLE} {scope}", params)
+    for name, dimensions in DIMENSIONS.items():
+        schema = get_schema(name)
+        if "company_id" in schema.columns:
+            source = f"{schema.table} t"
+            company = "t.company_id"
+        else:
+            source = f"{schema.table} t JOIN assets a ON a.id = t.asset_id"
+            company = "a.company_id"
+        where = f"WHERE {company} = %s" if company_id is not None else ""
+        for dimension in dimensions:
+            total = f"COALESCE(SUM(t.{dimension.total_column}), 0)" if dimension.total_column else "0"
+            cursor.execute(
+                f"INSERT INTO {SUMMARY_TABLE} (company_id, dimension, value, items, total) "
+                f"SELECT {company}, %s, LEFT(COALESCE({dimension.value_sql}, ''), {VALUE_WIDTH}), COUNT(*), {total} "
+                f"FROM {source} {where} "
+                f"GROUP BY {company}, LEFT(COALESCE({dimension.value_sql}, ''), {VALUE_WIDTH})",
+                (dimension.name,) + params,
+            )
+
+
+def read_summary(cursor, company_id, dimension=None):
+    """
+    Returns:
+        list: (dimension, value, items, total) rows for a company, largest buckets first.
+    """
+    if dimension:
+        cursor.execute(
+            f"SELECT dimension, value, items, total FROM {SUMMARY_TABLE} "
+            f"WHERE company_id = %s AND dimension = %s ORDER BY items DESC",
+            (company_id, dimension),
+        )
+    else:
+        cursor.execute(
+            f"SELECT dimension, value, items, total FROM {SUMMARY_TABLE} "
+            f"WHERE company_id = %s ORDER BY dimension, items DESC",
+            (company_id,),
+        )
+    return cursor.fetchall()
@@ -0,0 +1,157 @@
+"""
+fleet_synth.py
+
+Synthesizes realistic per-asset inventory matching the shapes the five collectors produce,
+for load generation and benchmarks. Output is deterministic for a given seed and asset.
+"""
+
+import random
+
+from src.lib.schema import HARDWARE, DRIVES, GRAPHICS, MEMORY, NETWORK
+
+
+CPUS = [
+    ("Intel(R) Core(TM) i5-10210U CPU @ 1.60GHz", "x86_64"),
+    ("Intel(R) Core(TM) i7-1165G7 @ 2.80GHz", "x86_64"),
+    ("AMD Ryzen 7 PRO 5850U with Radeon Graphics", "x86_64"),
+    ("Intel(R) Xeon(R) Gold 6338 CPU @ 2.00GHz", "x86_64"),
+    ("Apple M2", "arm64"),
+]
+BIOS_VERSIONS = ["1.12.0", "1.14.2", "2.3.1", "N2GET45W (1.23 )", "F.42", "8419.80.7"]
+TPM_VENDORS = [("INTC", "2.0"), ("IFX", "2.0"), ("NTC", "2.0"), ("Unknown", "Unknown")]
+GPUS = [
+    ("Intel(R) UHD Graphics 620", "Intel Corporation", 1073741824),
+    ("NVIDIA GeForce RTX 3060", "NVIDIA", 12884901888),
+    ("AMD Radeon Pro 5500M", "Advanced Micro Devices, Inc.", 8589934592),
+    ("Apple M2", "Apple", None),
+]
+DISKS = [
+    ("Samsung SSD 980 PRO 1TB", "SSD", "nvme", 1000204886016),
+    ("KINGSTON SA400S37480G", "SSD", "ata", 480103981056),
+    ("WDC WD20EZAZ-00GGJB0", "HDD", "ata", 2000398934016),
+    ("APPLE SSD AP0512Q", "SSD", "Apple Fabric", 500277790720),
+]
+MEMORY_PARTS = [
+    ("Samsung", "M471A1K43DB1-CWE", "DDR4", 3200, 8 * 1024 ** 3),
+    ("SK Hynix", "HMA82GS6DJR8N-XN", "DDR4", 3200, 16 * 1024 ** 3),
+    ("Micron", "MTC8C1084S1SC48BA1", "DDR5", 4800, 16 * 1024 ** 3),
+    ("Kingston", "KVR26S19S8/8", "DDR4", 2666, 8 * 1024 ** 3),
+]
+
+
+def synthesize_asset(asset_id, company_id, seed=0, generation=0, change_rate=0.0):
+    """
+    Build one asset's records for every collector.
+    Args:
+        asset_id (int): Asset identifier.
+        company_id (int): Company identifier.
+        seed (int): Fleet-wide seed; the same asset always gets the same base hardware.
+        generation (int): Run number; with change_rate > 0 later generations drift
+            (new IPs, driver updates, an extra or missing disk) to exercise update paths.
+        change_rate (float): Probability that each volatile field changes per generation.
+    Returns:
+        dict: Schema name -> list of records.
+    """
+    # Base values always come from the same draws of `rng`, whether or not a field drifts,
+    # so one change never shifts the values drawn after it; drifted values come from `drift`.
+    rng = random.Random(seed * 1_000_003 + asset_id)
+    drift = random.Random(seed * 1_000_003 + asset_id * 7919 + generation)
+
+    def changed():
+        return generation and drift.random() < change_rate
+
+    cpu, arch = rng.choice(CPUS)
+    tpm_vendor, tpm_version = rng.choice(TPM_VENDORS)
+    modules = [rng.choice(MEMORY_PARTS) for _ in range(rng.choice((1, 2, 2, 4, 8)))]
+    memory_total = sum(m[4] for m in modules)
+    laptop = rng.random() < 0.6
+    serial = f"SN{asset_id:08d}"
+    bios = rng.choice(BIOS_VERSIONS)
+
+    hardware = [HARDWARE.build({
+        'cpu_id': cpu,
+        'cpu_type': arch,
+        'bios': drift.choice(BIOS_VERSIONS) if changed() else bios,
+        'tpm_manufacturer': tpm_vendor,
+        'tpm_version': tpm_version,
+        'tpm_activation_status': tpm_vendor != "Unknown",
+        'tpm_ownership_status': tpm_vendor != "Unknown",
+        'battery_vendor': "SMP" if laptop else None,
+        'battery_model': "5B10W13975" if laptop else None,
+        'battery_serial_number': f"BAT{asset_id:08d}" if laptop else None,
+        'battery_voltage': 11520 if laptop else None,
+        'battery_cycle_count': rng.randint(0, 900) + generation if laptop else None,
+    }, asset_id=asset_id, company_id=company_id, serial_number=serial, make="Unknown", model="Unknown",
+        version="Unknown", motherboard_serial_no="Unknown", memory_slots_used=memory_total)]
+
+    drives = []
+    disk_count = rng.choice((1, 1, 2, 3))
+    for index in range(disk_count + (1 if changed() else 0)):
+        # Each disk has its own stream, so an extra (drifted) disk leaves `rng` untouched.
+        disk = random.Random(f"{seed}:{asset_id}:drive:{index}")
+        model, media, bus, size = disk.choice(DISKS)
+        device = f"nvme{index}n1" if bus == "nvme" else f"sd{chr(ord('a') + index)}"
+        drives.append(DRIVES.build({
+            'model': model,
+            'serial_number': f"{asset_id:06d}{index:02d}{disk.randint(0, 99999):05d}",
+            'drive_type': media,
+            'interface_type': bus,
+        }, asset_id=asset_id, device_id=device, size=size,
+            partitions=",".join(f"{device}{'p' if bus == 'nvme' else ''}{n}" for n in range(1, disk.randint(2, 4)))))
+
+    graphics = []
+    for index in range(rng.choice((1, 1, 2))):
+        name, vendor, ram = rng.choice(GPUS)
+        driver_minor, driver_build = rng.randint(10, 15), rng.randint(1000, 9999)
+        graphics.append(GRAPHICS.build({
+            'name': name,
+            'adapter_compatibility': vendor,
+            'driver_version': f"31.0.{driver_minor}.{drift.randint(1000, 9999) if changed() else driver_build}",
+            'video_processor': name,
+            'current_horizontal_resolution': rng.choice(("1920", "2560", "3840")),
+            'current_vertical_resolution': rng.choice(("1080", "1440", "2160")),
+            'current_refresh_rate': rng.choice(("60", "120", "144")),
+            'adapter_ram': ram,
+            'availability': None,
+            'status': "OK",
+            'bus_info': f"0{index}:00.0",
+        }, asset_id=asset_id))
+
+    memory = []
+    for slot, (vendor, part, kind, speed, capacity) in enumerate(modules, start=1):
+        memory.append(MEMORY.build({
+            'slot_number': slot,
+            'manufacturer': vendor,
+            'capacity': capacity,
+            'type': kind,
+            'speed': speed,
+            'configured_speed': speed,
+            'form_factor': "SODIMM" if laptop else "DIMM",
+            'part_number': part,
+            'serial_number': f"{rng.getrandbits(32):08X}",
+            'location': f"DIMM {slot - 1}",
+            'ce_count': 0,
+            'ue_count': 0,
+        }, asset_id=asset_id))
+
+    network = []
+    adapters = ["lo", "eth0"] + (["wlan0"] if laptop else []) + (["tun0"] if rng.random() < 0.3 else [])
+    for name in adapters:
+        loopback = name == "lo"
+        octet = rng.randint(2, 254)
+        if changed():
+            octet = drift.randint(2, 254)
+        network.append(NETWORK.build({
+            'adapter_name': name,
+            'manufacturer': '',
+            'mac_address': None if loopback else ":".join(f"{rng.randint(0, 255):02x}" for _ in range(6)),
+            'interface_type': '',
+            'ip_address': "127.0.0.1" if loopback else f"10.{company_id % 256}.{asset_id % 256}.{octet}",
+            'subnet_mask': "255.0.0.0" if loopback else "255.255.255.0",
+            'default_gateway': f"10.{company_id % 256}.{asset_id % 256}.1",
+            'dhcp_enabled': 0 if loopback else 1,
+            'speed': 0 if loopback else rng.choice((100, 1000, 1000, 2500, 10000)),
+            'status': "Up",
+        }, asset_id=asset_id))
+
+    return {"hardware": hardware, "drives": drives, "graphics": graphics, "memory": memory, "network": network}
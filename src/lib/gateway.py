@@ -0,0 +1,338 @@
+"""
+gateway.py
+
+On-demand collection over HTTP long-poll. Resident agents keep one request open to the
+collection gateway (GET /poll); when support asks for a machine's current state
+(POST /collect), the gateway hands the command to that agent's waiting request at once,
+the agent collects, uploads as usual and posts the records back (POST /result), and the
+gateway returns them to the caller, typically within a few seconds. Idle agents cost the
+gateway one parked request each and never touch the database. A command no agent picks up
+within COMMAND_TTL seconds is dropped and its result reports it as expired.
+
+Endpoints (JSON bodies; an optional shared token is sent as "Authorization: Bearer ..."):
+    GET  /poll?serial=S&timeout=25          -> 200 {"id", "collectors", "expires_at"} or 204 when nothing came
+    POST /collect {"serial", "collectors", "wait"} -> 200 result, or 202 {"id"} if not back in time
+    POST /result  {"id", "serial", "ok", "sections" | "error"}
+    GET  /result?id=ID                      -> 200 result or 404
+    GET  /agents                            -> serials with a poll open or seen recently
+
+GatewayServer is a local stand-in for the production gateway; GatewayChannel is the
+agent side.
+"""
+
+import collections
+import hmac
+import itertools
+import json
+import math
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+POLL_TIMEOUT = 25
+MAX_POLL_TIMEOUT = 60
+COLLECT_WAIT = 30
+MAX_COLLECT_WAIT = 120
+# A command for an offline agent is dropped after this long instead of running whenever it reconnects.
+COMMAND_TTL = 600
+# Finished results kept for GET /result, oldest dropped first.
+MAX_RESULTS = 1000
+RETRY_AFTER = 30
+MAX_BACKOFF = 300
+
+
+class CommandBoard:
+    """
+    Pending commands per serial and the results that came back, shared by the handler threads.
+    """
+
+    def __init__(self, max_polls=1000, command_ttl=COMMAND_TTL):
+        self.max_polls = max_polls
+        self.command_ttl = command_ttl
+        self.condition = threading.Condition()
+        self.pending = collections.defaultdict(collections.deque)
+        self.expires = {}  # pending command id -> expires_at
+        self.results = collections.OrderedDict()
+        self.last_seen = {}
+        self.polling = collections.Counter()
+        self.ids = itertools.count(1)
+
+    def poll(self, serial, timeout):
+        """
+        Wait up to `timeout` seconds for a command for `serial`.
+        Returns:
+            dict: The command, None if nothing came, or False if too many polls are open.
+        """
+        with self.condition:
+            if sum(self.polling.values()) >= self.max_polls:
+                return False
+            self.polling[serial] += 1
+            self.last_seen[serial] = time.time()
+            try:
+                self.condition.wait_for(lambda: self._live(serial), timeout)
+                queue = self._live(serial)
+                if not queue:
+                    return None
+                command = queue.popleft()
+                self.expires.pop(command["id"], None)
+                return command
+            finally:
+                self.polling[serial] -= 1
+                if not self.polling[serial]:
+                    del self.polling[serial]
+                if not self.pending[serial]:
+                    del self.pending[serial]
+
+    def _live(self, serial):
+        """
+        Drop `serial`'s expired commands (recording them as failed) and return what is left.
+        Call with the condition held.
+        """
+        queue = self.pending[serial]
+        now = time.time()
+        # Every command gets the same TTL, so the oldest expire first.
+        while queue and queue[0]["expires_at"] <= now:
+            command = queue.popleft()
+            self.expires.pop(command["id"], None)
+            self._store(command["id"], {"id": command["id"], "serial": serial, "ok": False,
+                                        "error": "expired before the agent picked it up", "received_at": now})
+        return queue
+
+    def _store(self, command_id, result):
+        self.results[command_id] = result
+        while len(self.results) > MAX_RESULTS:
+            self.results.popitem(last=False)
+        self.condition.notify_all()
+
+    def submit(self, serial, collectors=None):
+        with self.condition:
+            for command in self._live(serial):
+                # Two support requests for the same machine share one collection.
+                if command["collectors"] == collectors:
+                    return command["id"]
+            now = time.time()
+            command = {"id": f"{next(self.ids)}-{int(now)}", "collectors": collectors,
+                       "expires_at": now + self.command_ttl}
+            self.pending[serial].append(command)
+            self.expires[command["id"]] = command["expires_at"]
+            self.condition.notify_all()
+            return command["id"]
+
+    def complete(self, command_id, result):
+        with self.condition:
+            self._store(command_id, result)
+
+    def wait_result(self, command_id, timeout):
+        with self.condition:
+            end = time.time() + timeout
+            while command_id not in self.results:
+                # Also wake when the command expires, so the caller hears about it at once.
+                for serial in list(self.pending):
+                    self._live(serial)
+                now = time.time()
+                if command_id in self.results or now >= end:
+                    break
+                self.condition.wait(min(end, self.expires.get(command_id, end)) - now)
+            return self.results.get(command_id)
+
+    def agents(self):
+        with self.condition:
+            return {
+                serial: {"polling": serial in self.polling, "last_seen": seen}
+                for serial, seen in sorted(self.last_seen.items())
+            }
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def board(self):
+        return self.server.board
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, body=None, headers=None):
+        data = json.dumps(body, default=str).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def authorized(self):
+        token = self.server.token
+        if token and not hmac.compare_digest(self.headers.get("Authorization", ""), f"Bearer {token}"):
+            self.send_json(401, {"error": "unauthorized"})
+            return False
+        return True
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return None
+
+    def read_seconds(self, value, default, maximum):
+        """
+        Parse a timeout parameter and clamp it to [0, maximum]; answers 400 and returns None
+        if it is not a number.
+        """
+        if value is None:
+            return default
+        try:
+            seconds = float(value)
+        except (TypeError, ValueError):
+            seconds = None
+        if seconds is None or math.isnan(seconds):
+            self.send_json(400, {"error": f"invalid number of seconds: {value!r}"})
+            return None
+        return min(max(seconds, 0.0), maximum)
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        if url.path == "/poll" and query.get("serial"):
+            timeout = self.read_seconds(query.get("timeout"), POLL_TIMEOUT, MAX_POLL_TIMEOUT)
+            if timeout is None:
+                return
+            command = self.board.poll(query["serial"], timeout)
+            if command is False:
+                self.send_json(503, {"error": "too many agents connected"}, {"Retry-After": str(RETRY_AFTER)})
+            elif command is None:
+                self.send_json(204)
+            else:
+                self.send_json(200, command)
+        elif url.path == "/result" and query.get("id"):
+            result = self.board.wait_result(query["id"], 0)
+            if result:
+                self.send_json(200, result)
+            else:
+                self.send_json(404, {"error": "no result yet"})
+        elif url.path == "/agents":
+            self.send_json(200, self.board.agents())
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if not self.authorized():
+            return
+        body = self.read_json()
+        if not isinstance(body, dict):
+            self.send_json(400, {"error": "expected a JSON object"})
+            return
+        path = urllib.parse.urlsplit(self.path).path
+        if path == "/collect" and body.get("serial"):
+            wait = self.read_seconds(body.get("wait"), COLLECT_WAIT, MAX_COLLECT_WAIT)
+            if wait is None:
+                return
+            command_id = self.board.submit(body["serial"], body.get("collectors") or None)
+            result = self.board.wait_result(command_id, wait)
+            if result:
+                self.send_json(200, result)
+            else:
+                self.send_json(202, {"id": command_id})
+        elif path == "/result" and body.get("id"):
+            self.board.complete(body["id"], dict(body, received_at=time.time()))
+            self.send_json(204)
+        else:
+            self.send_json(404, {"error": "not found"})
+
+
+class GatewayServer(ThreadingHTTPServer):
+    """
+    Local stand-in collection gateway.
+    Args:
+        address (tuple): (host, port) to listen on.
+        token (str): Shared token agents and callers must send, or None.
+        max_polls (int): Open long-polls before agents are told to retry later.
+        command_ttl (float): Seconds a command waits for its agent before it is dropped.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, token=None, max_polls=1000, verbose=False, command_ttl=COMMAND_TTL):
+        super().__init__(address, GatewayHandler)
+        self.board = CommandBoard(max_polls, command_ttl)
+        self.token = token
+        self.verbose = verbose
+
+
+class GatewayChannel:
+    """
+    Agent side: keeps one long-poll open and runs each command it receives.
+    Args:
+        url (str): Gateway base URL, e.g. "http://127.0.0.1:8470".
+        serial (str): This asset's serial number.
+        handler (callable): command dict -> (sections dict, error or None).
+        token (str): Shared gateway token, or None.
+        poll_timeout (float): Seconds the gateway may hold each poll.
+    """
+
+    def __init__(self, url, serial, handler, token=None, poll_timeout=POLL_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.serial = serial
+        self.handler = handler
+        self.token = token
+        self.poll_timeout = poll_timeout
+
+    def _request(self, path, body=None, timeout=10):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        data = json.dumps(body, default=str).encode() if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, headers=headers)
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = response.read()
+            return response.status, json.loads(payload) if payload else None
+
+    def poll(self):
+        query = urllib.parse.urlencode({"serial": self.serial, "timeout": self.poll_timeout})
+        status, command = self._request(f"/poll?{query}", timeout=self.poll_timeout + 10)
+        return command if status == 200 else None
+
+    def handle(self, command):
+        started = time.time()
+        print(f"📥 Gateway asked for {', '.join(command.get('collectors') or ['all collectors'])}")
+        try:
+            sections, error = self.handler(command)
+        except Exception as e:
+            sections, error = {}, str(e)
+        result = {"id": command["id"], "serial": self.serial, "ok": error is None,
+                  "sections": sections, "error": error, "seconds": round(time.time() - started, 3)}
+        self._request("/result", result)
+
+    def run(self, stop_event):
+        """
+        Poll until `stop_event` is set; failures back off exponentially, or for as long
+        as the gateway's Retry-After asks.
+        """
+        failures = 0
+        while not stop_event.is_set():
+            try:
+                command = self.poll()
+                failures = 0
+                if command:
+                    self.handle(command)
+                continue
+            except urllib.error.HTTPError as e:
+                retry_after = e.headers.get("Retry-After")
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else None
+                print(f"[WARN] Gateway returned {e.code}")
+            except (OSError, ValueError) as e:
+                delay = None
+                print(f"[WARN] Gateway unreachable: {e}")
+            failures += 1
+            if delay is None:
+                delay = min(MAX_BACKOFF, 2 ** failures)
+            stop_event.wait(delay)
@@ -0,0 +1,192 @@
+"""
+governor.py
+
+Resource-governed mode for busy servers. The agent drops itself (and so every probe it
+spawns, which inherit both settings) to idle CPU and I/O priority, can move itself into a
+cgroup v2 group with CPU and memory limits, holds back probes while the machine is busy,
+and reports the CPU time and peak memory each run cost.
+"""
+
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+
+import psutil
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+DEFAULT_CGROUP = "itamcloud-agent"
+
+
+def lower_priority():
+    """
+    Idle CPU priority (nice 19 / IDLE_PRIORITY_CLASS) and idle I/O priority where supported.
+    """
+    process = psutil.Process()
+    try:
+        if platform.system() == "Windows":
+            process.nice(psutil.IDLE_PRIORITY_CLASS)
+        else:
+            process.nice(19)
+    except (psutil.Error, OSError) as e:
+        print(f"[WARN] Could not lower CPU priority: {e}")
+    try:
+        if platform.system() == "Linux":
+            process.ionice(psutil.IOPRIO_CLASS_IDLE)
+        elif platform.system() == "Windows":
+            process.ionice(psutil.IOPRIO_VERYLOW)
+    except (AttributeError, psutil.Error, OSError) as e:
+        print(f"[WARN] Could not lower I/O priority: {e}")
+
+
+def parse_size(value):
+    """
+    "256M" -> 268435456; plain numbers are bytes.
+    """
+    value = str(value).strip().upper()
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def enter_cgroup(name=DEFAULT_CGROUP, cpu_percent=None, memory_max=None):
+    """
+    Create (or reuse) a cgroup v2 group, set its limits and move this process into it.
+    Needs root or a delegated subtree; failures are reported and the run continues unconfined.
+    Args:
+        name (str): Group name under the cgroup v2 root.
+        cpu_percent (float): CPU quota as a percentage of one CPU (cpu.max).
+        memory_max (str): Memory limit such as "256M" (memory.max).
+    Returns:
+        str: Path of the group, or None if it could not be used.
+    """
+    if platform.system() != "Linux" or not os.path.exists(os.path.join(CGROUP_ROOT, "cgroup.controllers")):
+        print("[WARN] cgroup v2 is not available; running without a cgroup")
+        return None
+    path = os.path.join(CGROUP_ROOT, name)
+    try:
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(CGROUP_ROOT, "cgroup.subtree_control"), "w") as f:
+            f.write("+cpu +memory")
+        if cpu_percent:
+            period = 100000
+            with open(os.path.join(path, "cpu.max"), "w") as f:
+                f.write(f"{int(period * cpu_percent / 100)} {period}")
+        if memory_max:
+            with open(os.path.join(path, "memory.max"), "w") as f:
+                f.write(str(parse_size(memory_max)))
+        with open(os.path.join(path, "cgroup.procs"), "w") as f:
+            f.write(str(os.getpid()))
+        print(f"✅ Running in cgroup {path}")
+        return path
+    except OSError as e:
+        print(f"[WARN] Could not use cgroup {path}: {e}")
+        return None
+
+
+def usage_snapshot():
+    """
+    CPU seconds (self and reaped children) and peak RSS in bytes so far.
+    """
+    if resource is None:
+        times = psutil.Process().cpu_times()
+        return {"cpu_self": times.user + times.system, "cpu_children": 0.0,
+                "peak_rss": psutil.Process().memory_info().peak_wset}
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    scale = 1 if platform.system() == "Darwin" else 1024
+    return {
+        "cpu_self": own.ru_utime + own.ru_stime,
+        "cpu_children": children.ru_utime + children.ru_stime,
+        "peak_rss": own.ru_maxrss * scale,
+        "peak_rss_children": children.ru_maxrss * scale,
+    }
+
+
+class Governor:
+    """
+    Limits how many probes run at once and holds them back while the host is busy.
+    Args:
+        max_probes (int): Probes allowed to run concurrently.
+        max_load (float): 1-minute load average per CPU above which probes wait.
+        max_wait (float): Longest a probe waits for headroom before running anyway.
+    """
+
+    def __init__(self, max_probes=1, max_load=0.7, max_wait=60.0):
+        self.max_load = max_load
+        self.max_wait = max_wait
+        self.slots = threading.BoundedSemaphore(max(1, max_probes))
+        self.cpus = psutil.cpu_count() or 1
+        self.started = usage_snapshot()
+        self.started_at = time.monotonic()
+
+    def load_per_cpu(self):
+        try:
+            return os.getloadavg()[0] / self.cpus
+        except (AttributeError, OSError):
+            # No load average (Windows): use instantaneous CPU utilization instead.
+            return psutil.cpu_percent(interval=0.5) / 100.0
+
+    def wait_for_headroom(self):
+        deadline = time.monotonic() + self.max_wait
+        while self.load_per_cpu() > self.max_load and time.monotonic() < deadline:
+            time.sleep(2)
+
+    @contextmanager
+    def probe_slot(self):
+        with self.slots:
+            self.wait_for_headroom()
+            yield
+
+    def workers(self, requested=None):
+        """
+        Worker count for parallel work (batch roots) given the current load.
+        """
+        requested = requested or self.cpus
+        idle = self.cpus * max(0.0, self.max_load - self.load_per_cpu())
+        return max(1, min(requested, int(idle)))
+
+    def report(self):
+        """
+        Print and return the CPU seconds and peak RSS used since the governor started.
+        """
+        now = usage_snapshot()
+        usage = {
+            "wall_seconds": time.monotonic() - self.started_at,
+            "cpu_seconds": now["cpu_self"] - self.started["cpu_self"],
+            "child_cpu_seconds": now["cpu_children"] - self.started["cpu_children"],
+            "peak_rss": now["peak_rss"],
+            "peak_rss_children": now.get("peak_rss_children", 0),
+        }
+        print(f"📈 Run used {usage['cpu_seconds']:.2f} CPU-s (+{usage['child_cpu_seconds']:.2f} in probes) "
+              f"over {usage['wall_seconds']:.1f}s, peak RSS {usage['peak_rss'] / 1024 ** 2:.1f} MiB "
+              f"(largest probe {usage['peak_rss_children'] / 1024 ** 2:.1f} MiB)")
+        return usage
+
+
+_governor = None
+
+
+def get_governor():
+    return _governor
+
+
+def configure(max_probes=1, max_load=0.7, cgroup=None, cpu_percent=None, memory_max=None):
+    """
+    Enter governed mode for this process: idle priorities, optional cgroup, probe throttling.
+    """
+    global _governor
+    lower_priority()
+    if cgroup or cpu_percent or memory_max:
+        enter_cgroup(cgroup or DEFAULT_CGROUP, cpu_percent=cpu_percent, memory_max=memory_max)
+    _governor = Governor(max_probes=max_probes, max_load=max_load)
+    return _governor
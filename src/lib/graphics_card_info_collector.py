@@ -3,24 +3,39 @@ import re
 import platform
 import psutil
 import os
-import mysql.connector
-import json
 
+from src.lib import sysroot
+from src.lib.boot_cache import get_boot_cache
+from src.lib.normalize import parse_int
+from src.lib.probes import run_probe
+from src.lib.storage import get_backend
+from src.lib.schema import GRAPHICS
 
-# Database config (store securely in production!)
-DB_HOST="68.178.156.243"
-DB_USER="itamcloud"
-DB_PASSWORD="Kgl0b@ltech"
-DB_NAME="ITAMCloud"
+# Display mode fields, read live; the rest of a card is cached for the boot on Linux.
+MODE_FIELDS = ('current_horizontal_resolution', 'current_vertical_resolution', 'current_refresh_rate')
 
 class GraphicsCardInfoCollector:
-    
+    def __init__(self, company_id=None, asset_id=None, root=None):
+        self.asset_id = asset_id
+        self.company_id = company_id
+        self.root = root  # accepted for a uniform constructor; probes always inspect the live system
+
     def get_linux_graphics_info(self):
+        graphics_info = self.get_linux_graphics_devices()
+        self.read_xrandr_mode(graphics_info)
+        return graphics_info
+
+    def get_linux_graphics_devices(self):
+        """
+        The cards themselves, from lspci and lshw; fixed until the next boot.
+        """
         graphics_info = []
         try:
             # Fetch basic graphics card info using lspci
-            output = subprocess.check_output("lspci | grep VGA", shell=True).decode().strip()
-            for line in output.split('\n'):
+            output = run_probe(["lspci"]) or ""
+            for line in output.splitlines():
+                if "VGA" not in line:
+                    continue
                 parts = line.split(' ')
                 if len(parts) >= 5:
                     name = ' '.join(parts[3:])
@@ -35,48 +50,80 @@ class GraphicsCardInfoCollector:
                         'current_refresh_rate': None,  # NULL for missing data, can be fetched later
                         'adapter_ram': None,  # Can be checked with `lshw` or `lspci -v`
                         'availability': None,  # Example value, you may want to fill this in with other info
-                        'status': None         # Example value, you may want to fill this in with other info
+                        'status': None,        # Example value, you may want to fill this in with other info
+                        'bus_info': parts[0]   # PCI slot, e.g. "01:00.0"
                     })
             
             # Fetch detailed graphics card info using lshw
-            lshw_output = subprocess.check_output("sudo lshw -C display", shell=True).decode().strip()
-            for line in lshw_output.split('\n'):
-                if "configuration" in line:
+            lshw_output = run_probe(["lshw", "-C", "display"], sudo=True) or ""
+            for line in lshw_output.splitlines():
+                if "configuration" in line and graphics_info:
                     # This part gives adapter RAM, driver version, and other details
                     if 'driver=' in line:
                         driver_version = line.split('driver=')[1].split()[0]
                     else:
                         driver_version = "Unknown"
                     
-                    if 'memory=' in line:
-                        adapter_ram = line.split('memory=')[1].split()[0]
-                    else:
-                        adapter_ram = "Unknown"
-                        
                     # Example: Extracting adapter compatibility, video processor, and resolution (if available)
                     graphics_info[0]['adapter_compatibility'] = "Compatible"  # Placeholder
                     graphics_info[0]['driver_version'] = driver_version
-                    graphics_info[0]['adapter_ram'] = adapter_ram
                     graphics_info[0]['video_processor'] = "NVIDIA"  # Example, should be extracted based on your hardware
-                    
+            # lshw's "memory=" is a PCI BAR aperture, not the card's memory; VRAM comes from the driver.
+            self.read_linux_vram(graphics_info)
+        except Exception as e:
+            print("Error collecting graphics info on Linux:", e)        
+        return graphics_info
+
+    def read_linux_vram(self, graphics_info):
+        """
+        Fill in adapter_ram (bytes) from amdgpu's sysfs counter or nvidia-smi; cards neither
+        reports (e.g. integrated GPUs sharing system RAM) keep NULL.
+        Args:
+            graphics_info (list): Cards with their PCI bus_info, updated in place.
+        """
+        for card in graphics_info:
+            for path in sysroot.glob_paths(f"/sys/bus/pci/devices/*:{card['bus_info']}/mem_info_vram_total"):
+                vram = parse_int(sysroot.read_text(path))
+                if vram:
+                    card['adapter_ram'] = vram
+        if not any(card['adapter_ram'] is None and "NVIDIA" in card['name'].upper() for card in graphics_info):
+            return
+        output = run_probe(["nvidia-smi", "--query-gpu=pci.bus_id,memory.total", "--format=csv,noheader,nounits"])
+        for line in (output or "").splitlines():
+            bus_id, _, mib = line.partition(",")
+            # "00000000:01:00.0" -> "01:00.0", the form lspci prints.
+            bus_info = bus_id.strip().lower().split(":", 1)[-1]
+            for card in graphics_info:
+                if card['bus_info'].lower() == bus_info and parse_int(mib):
+                    card['adapter_ram'] = parse_int(mib) * 1024 ** 2
+
+    def read_xrandr_mode(self, graphics_info):
+        """
+        Fill in the current resolution and refresh rate of the first card from xrandr.
+        Args:
+            graphics_info (list): Cards from get_linux_graphics_devices(), updated in place.
+        """
+        try:
             # Fetch current horizontal/vertical resolution and refresh rate using xrandr
-            xrandr_output = subprocess.check_output("xrandr | grep '*' | cut -d' ' -f4", shell=True).decode().strip()
-            if xrandr_output:
-                resolution = xrandr_output.split('x')
+            # (needs an X display; headless servers skip it instead of failing every run)
+            xrandr_output = run_probe(["xrandr"]) if os.environ.get("DISPLAY") else None
+            current = [line.split() for line in (xrandr_output or "").splitlines() if "*" in line]
+            if current and graphics_info:
+                resolution = current[0][0].split('x')
                 graphics_info[0]['current_horizontal_resolution'] = resolution[0]
                 graphics_info[0]['current_vertical_resolution'] = resolution[1]
-                # The refresh rate can be extracted from the same output (if available)
-                graphics_info[0]['current_refresh_rate'] = "60"  # Assuming 60Hz if not found (can be extracted more accurately)
+                # The active mode's rate is the one marked with "*", e.g. "59.95*+"
+                rates = [token for token in current[0][1:] if "*" in token]
+                graphics_info[0]['current_refresh_rate'] = rates[0].rstrip("*+") if rates else None
         except Exception as e:
-            print("Error collecting graphics info on Linux:", e)        
-        return graphics_info
+            print("Error reading the display mode on Linux:", e)
 
     def get_windows_graphics_info(self):
         graphics_info = []
         try:
             # Use wmic to get graphics info (works on most Windows systems)
             output = subprocess.check_output(
-                'wmic path win32_videocontroller get Name,AdapterCompatibility,AdapterRAM,DriverVersion,VideoProcessor,CurrentHorizontalResolution,CurrentVerticalResolution,CurrentRefreshRate,Status /format:list',
+                'wmic path win32_videocontroller get Name,AdapterCompatibility,AdapterRAM,DriverVersion,VideoProcessor,CurrentHorizontalResolution,CurrentVerticalResolution,CurrentRefreshRate,Status,PNPDeviceID /format:list',
                 shell=True
             ).decode(errors='ignore')
 
@@ -101,6 +148,7 @@ class GraphicsCardInfoCollector:
                         'adapter_ram': info.get('AdapterRAM'),
                         'availability': None,  # Not directly available in wmic
                         'status': info.get('Status'),
+                        'bus_info': info.get('PNPDeviceID'),
                     })
         except Exception as e:
             print("Error collecting graphics info on Windows:", e)
@@ -126,6 +174,7 @@ class GraphicsCardInfoCollector:
                 driver_version = re.search(r'Metal.*: (.+)', block)
                 resolution = re.search(r'Resolution: (\d+) x (\d+)', block)
                 status = re.search(r'Status: (.+)', block)
+                bus = re.search(r'Bus: (.+)', block)
 
                 graphics_info.append({
                     'name': name if name else None,
@@ -137,7 +186,8 @@ class GraphicsCardInfoCollector:
                     'current_refresh_rate': None,  # Always None
                     'adapter_ram': vram.group(1) if vram else None,
                     'availability': None,  # Always None
-                    'status': status.group(1) if status else None
+                    'status': status.group(1) if status else None,
+                    'bus_info': bus.group(1).strip() if bus else None
                 })
 
             # If no GPU blocks found, return empty
@@ -151,81 +201,65 @@ class GraphicsCardInfoCollector:
 
     @staticmethod
     def insert_graphics_info(records):
-        connection = None
-        cursor = None
-        try:
-            connection = mysql.connector.connect(
-                host=DB_HOST,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                database=DB_NAME
-            )
-            cursor = connection.cursor()
-
-            insert_query = """
-                INSERT INTO assets_graphics_card_info
-                (asset_id, name, adapter_compatibility, driver_version, video_processor, 
-                current_horizontal_resolution, current_vertical_resolution, current_refresh_rate, 
-                adapter_ram, availability, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-            print("🔄 Inserting driver info into assets_graphics_card_info table...")
-            print(f"Total records to insert: {len(records)}")
-            print("This may take a while...")
-            if not records:
-                print("❌ No records to insert.")
-                return
-            # Execute the insert query for all records
-            print("Executing insert query...")
-            records_fixed = [
-                (json.dumps(rec[0]), *rec[1:]) for rec in records
-            ]
-            cursor.executemany(insert_query, records_fixed)
-            connection.commit()
-            print("✅ Driver info inserted successfully.")
-            print(f"[+] Inserted {len(records)} records into assets_drives_info")
-        except mysql.connector.Error as err:
-            print(f"❌ MySQL error: {err}")
-        except Exception as e:
-            print(f"❌ General error: {e}")
-        finally:
-            if cursor:
-                cursor.close()
-            if connection and connection.is_connected():
-                connection.close()
+        print("🔄 Inserting graphics card info into assets_graphics_card_info table...")
+        print(f"Total records to insert: {len(records)}")
+        if not records:
+            print("❌ No records to insert.")
+            return
+        if get_backend().sync_records(GRAPHICS, records[0].asset_id, records) is not None:
+            print("✅ Graphics card info inserted successfully.")
 
-    def get_graphics_card_info(self, asset_id):
-        records = []
-        print("✅ Running graphics_card_info_collector.py...")
+    def collect_graphics_info(self):
+        """
+        Run the platform-specific probes.
+        Returns:
+            list: Collected graphics cards.
+        """
         platform_name = platform.system().lower()
         if platform_name == "windows":
             print("🔍 Collecting Windows system information...")
-            graphics_info = self.get_windows_graphics_info()
+            return self.get_windows_graphics_info()
         elif platform_name == "linux":
             print("🔍 Collecting Linux system information...")
-            graphics_info = self.get_linux_graphics_info()
+            return self.get_linux_graphics_info()
         elif platform_name == "darwin":  # macOS
             print("🔍 Collecting macOS system information...")
-            graphics_info = self.get_mac_graphics_info() 
+            return self.get_mac_graphics_info()
         else:
             print("❌ Unsupported platform:", platform_name)
             exit(1)
+
+    def collect_graphics_records(self, asset_id):
+        records = []
+        print("✅ Running graphics_card_info_collector.py...")
+        if platform.system().lower() == "linux":
+            # GPUs cannot change without a reboot, so reuse this boot's lspci/lshw result;
+            # the display mode can, so xrandr runs every time.
+            devices = get_boot_cache().get_or_collect("graphics", self.get_linux_graphics_devices)
+            graphics_info = [dict(device, **dict.fromkeys(MODE_FIELDS)) for device in devices]
+            self.read_xrandr_mode(graphics_info)
+        else:
+            # WMI and system_profiler report the mode in the same query as the cards, so a
+            # cached copy would only save the query by freezing the resolution.
+            graphics_info = self.collect_graphics_info()
         print(f"✅ Graphics card information collected successfully.{graphics_info}")
         # Collect the actual graphics card data and append to records
         for device_info in graphics_info:
-            records.append((
-                asset_id,
-                device_info['name'],
-                device_info['adapter_compatibility'],
-                device_info['driver_version'],
-                device_info['video_processor'],
-                device_info['current_horizontal_resolution'],  # Can be NULL
-                device_info['current_vertical_resolution'],    # Can be NULL
-                device_info['current_refresh_rate'],  # Can be NULL
-                device_info['adapter_ram'],  # Can be NULL
-                device_info['availability'],  # Can be NULL
-                device_info['status']         # Can be NULL
-            ))
+            records.append(GRAPHICS.build(device_info, asset_id=asset_id))
+        return records
+
+    def collect(self):
+        return self.collect_graphics_records(self.asset_id)
 
+    def upload(self, records):
         if records:
             self.insert_graphics_info(records)
+
+    def get_graphics_card_info(self, asset_id):
+        self.upload(self.collect_graphics_records(asset_id))
+
+    def run(self):
+        """
+        Collect and upload for the configured asset (entry point used by the collector registry).
+        """
+        self.get_graphics_card_info(self.asset_id)
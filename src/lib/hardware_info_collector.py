@@ -11,39 +11,41 @@ Date: [YYYY-MM-DD]
 import psutil
 import platform
 import os
-import mysql.connector
 import subprocess
 import json
 
+from src.lib.boot_cache import get_boot_cache
+from src.lib.storage import get_backend
+from src.lib.schema import HARDWARE
+from src.lib import sysroot
 
-# Database config (store securely in production!)
-DB_HOST="68.178.156.243"
-DB_USER="itamcloud"
-DB_PASSWORD="Kgl0b@ltech"
-DB_NAME="ITAMCloud"
-
+# Read live on every run; everything else in system_info is cached for the boot.
+BATTERY_FIELDS = ('battery_vendor', 'battery_model', 'battery_serial_number', 'battery_voltage', 'battery_cycle_count')
 
 
 class HardwareInfoCollector:
 
-    def __init__(self, company_id, asset_id):
+    def __init__(self, company_id=None, asset_id=None, root=None):
         self.asset_id = asset_id
         self.company_id = company_id
+        # Alternate root prefix for the Linux readers (container rootfs, chroot, mounted image).
+        self.root = root
     """
     Collects hardware information for different operating systems.
     """
     def get_linux_system_info(self):
         """
-        Collect hardware info on Linux using /proc and sysfs.
+        Collect hardware info on Linux using /proc and sysfs (under self.root if set).
         Returns:
             dict: System information.
         """
         system_info = {}
+        live = sysroot.is_live(self.root)
 
         # CPU Info
         cpu_model = "Unknown"
         try:
-            with open("/proc/cpuinfo", "r") as f:
+            with open(sysroot.rooted("/proc/cpuinfo", self.root), "r") as f:
                 for line in f:
                     if "model name" in line:
                         cpu_model = line.strip().split(":")[1].strip()
@@ -55,41 +57,21 @@ class HardwareInfoCollector:
 
         # Memory Info
         try:
-            system_info['memory_total'] = psutil.virtual_memory().total
+            if live:
+                system_info['memory_total'] = psutil.virtual_memory().total
+            else:
+                system_info['memory_total'] = self.read_meminfo_total()
         except Exception as e:
             print(f"[WARN] Could not read memory info: {e}")
             system_info['memory_total'] = None
 
         # Battery Info
-        try:
-            battery = psutil.sensors_battery()
-            if battery:
-                # Linux battery info is limited via psutil
-                system_info.update({
-                    'battery_vendor': "Unknown",
-                    'battery_model': "Unknown",
-                    'battery_serial_number': "Unknown",
-                    'battery_voltage': None,
-                    'battery_cycle_count': None
-                })
-            else:
-                system_info.update({
-                    'battery_vendor': None,
-                    'battery_model': None,
-                    'battery_serial_number': None,
-                    'battery_voltage': None,
-                    'battery_cycle_count': None
-                })
-        except Exception as e:
-            print(f"[WARN] Battery info error: {e}")
-            system_info.update({k: None for k in [
-                'battery_vendor', 'battery_model', 'battery_serial_number', 'battery_voltage', 'battery_cycle_count'
-            ]})
+        system_info.update(self.get_linux_battery_info())
 
         # BIOS version
         bios_version = "Unknown"
         try:
-            bios_path = "/sys/class/dmi/id/bios_version"
+            bios_path = sysroot.rooted("/sys/class/dmi/id/bios_version", self.root)
             if os.path.exists(bios_path):
                 with open(bios_path, "r") as f:
                     bios_version = f.read().strip()
@@ -98,7 +80,7 @@ class HardwareInfoCollector:
         system_info['bios'] = bios_version
 
         # TPM Info
-        tpm_path = "/sys/class/tpm/tpm0/"
+        tpm_path = sysroot.rooted("/sys/class/tpm/tpm0/", self.root)
         system_info['tpm_manufacturer'] = "Unknown"
         system_info['tpm_version'] = "Unknown"
         system_info['tpm_activation_status'] = "Unknown"
@@ -120,6 +102,21 @@ class HardwareInfoCollector:
 
         return system_info
 
+    def read_meminfo_total(self):
+        """
+        Read MemTotal (in bytes) from /proc/meminfo under self.root.
+        Returns:
+            int: Total memory, or None if the file is absent (e.g. an offline image).
+        """
+        try:
+            with open(sysroot.rooted("/proc/meminfo", self.root), "r") as f:
+                for line in f:
+                    if line.startswith("MemTotal:"):
+                        return int(line.split()[1]) * 1024
+        except FileNotFoundError:
+            return None
+        return None
+
     def get_windows_system_info(self):
         """
         Collect hardware info on Windows using WMI & psutil.
@@ -140,47 +137,7 @@ class HardwareInfoCollector:
             system_info['memory_total'] = None
 
         # Battery Info
-        try:
-            import wmi
-            c = wmi.WMI()
-            batteries = c.Win32_Battery()
-            if batteries:
-                battery = batteries[0]
-                system_info['battery_vendor'] = getattr(battery, 'Manufacturer', 'Unknown')
-                system_info['battery_model'] = getattr(battery, 'Name', 'Unknown')
-                system_info['battery_serial_number'] = getattr(battery, 'SerialNumber', 'Unknown')
-                system_info['battery_voltage'] = getattr(battery, 'DesignVoltage', None)
-                system_info['battery_cycle_count'] = getattr(battery, 'CycleCount', None)
-            else:
-                # Fallback to psutil
-                battery = psutil.sensors_battery()
-                if battery:
-                    system_info.update({
-                        'battery_vendor': "Unknown",
-                        'battery_model': "Unknown",
-                        'battery_serial_number': "Unknown",
-                        'battery_voltage': None,
-                        'battery_cycle_count': None
-                    })
-                else:
-                    system_info.update({k: None for k in [
-                        'battery_vendor', 'battery_model', 'battery_serial_number', 'battery_voltage', 'battery_cycle_count'
-                    ]})
-        except Exception as e:
-            print(f"[WARN] Battery info error: {e}")
-            battery = psutil.sensors_battery()
-            if battery:
-                system_info.update({
-                    'battery_vendor': "Unknown",
-                    'battery_model': "Unknown",
-                    'battery_serial_number': "Unknown",
-                    'battery_voltage': None,
-                    'battery_cycle_count': None
-                })
-            else:
-                system_info.update({k: None for k in [
-                    'battery_vendor', 'battery_model', 'battery_serial_number', 'battery_voltage', 'battery_cycle_count'
-                ]})
+        system_info.update(self.get_windows_battery_info())
 
         # BIOS version
         bios_version = "Unknown"
@@ -250,28 +207,7 @@ class HardwareInfoCollector:
         system_info['memory_total'] = memory_bytes
 
         # Battery Info
-        try:
-            ioreg = subprocess.check_output([
-                "ioreg", "-rc", "AppleSmartBattery"
-            ]).decode()
-            def extract_ioreg_value(field):
-                for line in ioreg.splitlines():
-                    if field in line:
-                        return line.split("=")[-1].strip().replace("\"", "")
-                return None
-
-            system_info['battery_vendor'] = extract_ioreg_value('Manufacturer') or "Unknown"
-            system_info['battery_model'] = extract_ioreg_value('DeviceName') or "Unknown"
-            system_info['battery_serial_number'] = extract_ioreg_value('BatterySerialNumber') or "Unknown"
-            voltage = extract_ioreg_value('Voltage')
-            system_info['battery_voltage'] = int(voltage) if voltage and voltage.isdigit() else None
-            cycle_count = extract_ioreg_value('CycleCount')
-            system_info['battery_cycle_count'] = int(cycle_count) if cycle_count and cycle_count.isdigit() else None
-        except Exception as e:
-            print(f"[WARN] Battery info error: {e}")
-            system_info.update({k: None for k in [
-                'battery_vendor', 'battery_model', 'battery_serial_number', 'battery_voltage', 'battery_cycle_count'
-            ]})
+        system_info.update(self.get_macos_battery_info())
 
         # BIOS version (Boot ROM/SMC version for Mac)
         try:
@@ -321,6 +257,121 @@ class HardwareInfoCollector:
 
         return system_info
 
+    def get_linux_battery_info(self):
+        """
+        Battery fields on Linux (psutil only reports presence).
+        Returns:
+            dict: The battery_* fields.
+        """
+        system_info = {}
+        live = sysroot.is_live(self.root)
+        try:
+            battery = psutil.sensors_battery() if live else None
+            if battery:
+                # Linux battery info is limited via psutil
+                system_info.update({
+                    'battery_vendor': "Unknown",
+                    'battery_model': "Unknown",
+                    'battery_serial_number': "Unknown",
+                    'battery_voltage': None,
+                    'battery_cycle_count': None
+                })
+            else:
+                system_info.update({
+                    'battery_vendor': None,
+                    'battery_model': None,
+                    'battery_serial_number': None,
+                    'battery_voltage': None,
+                    'battery_cycle_count': None
+                })
+        except Exception as e:
+            print(f"[WARN] Battery info error: {e}")
+            system_info.update({k: None for k in [
+                'battery_vendor', 'battery_model', 'battery_serial_number', 'battery_voltage', 'battery_cycle_count'
+            ]})
+        return system_info
+
+    def get_windows_battery_info(self):
+        """
+        Battery fields on Windows from Win32_Battery, falling back to psutil.
+        Returns:
+            dict: The battery_* fields.
+        """
+        system_info = {}
+        try:
+            import wmi
+            c = wmi.WMI()
+            batteries = c.Win32_Battery()
+            if batteries:
+                battery = batteries[0]
+                system_info['battery_vendor'] = getattr(battery, 'Manufacturer', 'Unknown')
+                system_info['battery_model'] = getattr(battery, 'Name', 'Unknown')
+                system_info['battery_serial_number'] = getattr(battery, 'SerialNumber', 'Unknown')
+                system_info['battery_voltage'] = getattr(battery, 'DesignVoltage', None)
+                system_info['battery_cycle_count'] = getattr(battery, 'CycleCount', None)
+            else:
+                # Fallback to psutil
+                battery = psutil.sensors_battery()
+                if battery:
+                    system_info.update({
+                        'battery_vendor': "Unknown",
+                        'battery_model': "Unknown",
+                        'battery_serial_number': "Unknown",
+                        'battery_voltage': None,
+                        'battery_cycle_count': None
+                    })
+                else:
+                    system_info.update({k: None for k in [
+                        'battery_vendor', 'battery_model', 'battery_serial_number', 'battery_voltage', 'battery_cycle_count'
+                    ]})
+        except Exception as e:
+            print(f"[WARN] Battery info error: {e}")
+            battery = psutil.sensors_battery()
+            if battery:
+                system_info.update({
+                    'battery_vendor': "Unknown",
+                    'battery_model': "Unknown",
+                    'battery_serial_number': "Unknown",
+                    'battery_voltage': None,
+                    'battery_cycle_count': None
+                })
+            else:
+                system_info.update({k: None for k in [
+                    'battery_vendor', 'battery_model', 'battery_serial_number', 'battery_voltage', 'battery_cycle_count'
+                ]})
+        return system_info
+
+    def get_macos_battery_info(self):
+        """
+        Battery fields on macOS from the AppleSmartBattery ioreg entry.
+        Returns:
+            dict: The battery_* fields.
+        """
+        system_info = {}
+        try:
+            ioreg = subprocess.check_output([
+                "ioreg", "-rc", "AppleSmartBattery"
+            ]).decode()
+            def extract_ioreg_value(field):
+                for line in ioreg.splitlines():
+                    if field in line:
+                        return line.split("=")[-1].strip().replace("\"", "")
+                return None
+
+            system_info['battery_vendor'] = extract_ioreg_value('Manufacturer') or "Unknown"
+            system_info['battery_model'] = extract_ioreg_value('DeviceName') or "Unknown"
+            system_info['battery_serial_number'] = extract_ioreg_value('BatterySerialNumber') or "Unknown"
+            voltage = extract_ioreg_value('Voltage')
+            system_info['battery_voltage'] = int(voltage) if voltage and voltage.isdigit() else None
+            cycle_count = extract_ioreg_value('CycleCount')
+            system_info['battery_cycle_count'] = int(cycle_count) if cycle_count and cycle_count.isdigit() else None
+        except Exception as e:
+            print(f"[WARN] Battery info error: {e}")
+            system_info.update({k: None for k in [
+                'battery_vendor', 'battery_model', 'battery_serial_number', 'battery_voltage', 'battery_cycle_count'
+            ]})
+        return system_info
+
     def get_unique_asset_id(self):
         """
             Returns a unique hardware identifier for the current machine using the best available method for each OS.
@@ -329,7 +380,7 @@ class HardwareInfoCollector:
             On macOS: Returns hardware serial number.
             Returns None if not available.
             """
-        system = platform.system().lower()
+        system = platform.system().lower() if sysroot.is_live(self.root) else "linux"
         unique_id = None
         try:
             if system == "windows":
@@ -351,7 +402,7 @@ class HardwareInfoCollector:
             elif system == "linux":
                 try:
                     # Try product_uuid
-                    with open("/sys/class/dmi/id/product_uuid", "r") as f:
+                    with open(sysroot.rooted("/sys/class/dmi/id/product_uuid", self.root), "r") as f:
                         uuid = f.read().strip()
                         if uuid and uuid != "None":
                             unique_id = uuid
@@ -360,7 +411,7 @@ class HardwareInfoCollector:
                 if not unique_id:
                     # Try /etc/machine-id as fallback
                     try:
-                        with open("/etc/machine-id", "r") as f:
+                        with open(sysroot.rooted("/etc/machine-id", self.root), "r") as f:
                             mid = f.read().strip()
                             if mid:
                                 unique_id = mid
@@ -383,111 +434,107 @@ class HardwareInfoCollector:
 
         return unique_id
     
-    def insert_hardware_info(self ,system_info):
+    def build_hardware_record(self, system_info):
         """
-        Insert system_info into MySQL database.
+        Convert collected system_info into an assets_hardware_info record.
         Args:
             system_info (dict): Collected hardware info.
-            asset_id (int): Asset identifier.
-            company_id (int): Company identifier.
+        Returns:
+            HardwareRecord: Row ready for upload.
         """
-        connection = None
-        cursor = None
-        try:
-            connection = mysql.connector.connect(
-                host=DB_HOST,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                database=DB_NAME
-            )
-            cursor = connection.cursor()
-
-            insert_query = """
-            INSERT INTO assets_hardware_info (
-                asset_id, company_id, serial_number, make, model, version, motherboard_serial_no,
-                cpu_id, cpu_type, bios, tpm_manufacturer, tpm_version, tpm_activation_status,
-                tpm_ownership_status, battery_vendor, battery_model, battery_serial_number,
-                battery_voltage, battery_cycle_count, memory_slots_used, created_at
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-            ON DUPLICATE KEY UPDATE
-                company_id = VALUES(company_id),
-                serial_number = VALUES(serial_number),
-                make = VALUES(make),
-                model = VALUES(model),
-                version = VALUES(version),
-                motherboard_serial_no = VALUES(motherboard_serial_no),
-                cpu_id = VALUES(cpu_id),
-                cpu_type = VALUES(cpu_type),
-                bios = VALUES(bios),
-                tpm_manufacturer = VALUES(tpm_manufacturer),
-                tpm_version = VALUES(tpm_version),
-                tpm_activation_status = VALUES(tpm_activation_status),
-                tpm_ownership_status = VALUES(tpm_ownership_status),
-                battery_vendor = VALUES(battery_vendor),
-                battery_model = VALUES(battery_model),
-                battery_serial_number = VALUES(battery_serial_number),
-                battery_voltage = VALUES(battery_voltage),
-                battery_cycle_count = VALUES(battery_cycle_count),
-                memory_slots_used = VALUES(memory_slots_used),
-                created_at = NOW()
-            """
+        return HARDWARE.build(
+            system_info,
+            asset_id=self.asset_id,
+            company_id=self.company_id,
+            serial_number="Unknown",
+            make="Unknown",
+            model="Unknown",
+            version="Unknown",
+            motherboard_serial_no="Unknown",
+            memory_slots_used=system_info.get('memory_total'),
+        )
 
-            data = (
-                self.asset_id,
-                self.company_id,
-                "Unknown",                  # serial_number
-                "Unknown",                  # make
-                "Unknown",                  # model
-                "Unknown",                  # version
-                "Unknown",                  # motherboard_serial_no
-                system_info.get('cpu_id'),
-                system_info.get('cpu_type'),
-                system_info.get('bios'),
-                system_info.get('tpm_manufacturer'),
-                system_info.get('tpm_version'),
-                system_info.get('tpm_activation_status'),
-                system_info.get('tpm_ownership_status'),
-                system_info.get('battery_vendor'),
-                system_info.get('battery_model'),
-                system_info.get('battery_serial_number'),
-                system_info.get('battery_voltage'),
-                system_info.get('battery_cycle_count'),
-                system_info.get('memory_total')
-            )
-
-            cursor.execute(insert_query, data)
-            connection.commit()
+    def insert_hardware_info(self ,system_info):
+        """
+        Upsert system_info into MySQL database.
+        Args:
+            system_info (dict): Collected hardware info.
+        """
+        if get_backend().write_records(HARDWARE, [self.build_hardware_record(system_info)], upsert=True):
             print("✅ System info inserted successfully.")
 
-        except mysql.connector.Error as err:
-            print(f"❌ MySQL error: {err}")
-        except Exception as e:
-            print(f"❌ General error: {e}")
-        finally:
-            if cursor:
-                cursor.close()
-            if connection and connection.is_connected():
-                connection.close()
-
-    def get_system_info(self):
+    def collect_system_info(self):
         """
-        Collect system information based on the current platform.
+        Run the platform-specific probes.
         Returns:
             dict: Collected system information.
         """
         platform_name = platform.system().lower()
+        if not sysroot.is_live(self.root):
+            print(f"🔍 Collecting Linux system information under {self.root}...")
+            return self.get_linux_system_info()
         if platform_name == "windows":
             print("🔍 Collecting Windows system information...")
-            system_info = self.get_windows_system_info()
+            return self.get_windows_system_info()
         elif platform_name == "linux":
             print("🔍 Collecting Linux system information...")
-            system_info = self.get_linux_system_info()
+            return self.get_linux_system_info()
         elif platform_name == "darwin":  # macOS
             print("🔍 Collecting macOS system information...")
-            system_info = self.get_macos_system_info() 
+            return self.get_macos_system_info()
         else:
             print("❌ Unsupported platform:", platform_name)
             exit(1)
+
+    def collect_battery_info(self):
+        """
+        Run only the platform's battery probe.
+        Returns:
+            dict: The battery_* fields.
+        """
+        platform_name = platform.system().lower()
+        if platform_name == "windows":
+            return self.get_windows_battery_info()
+        if platform_name == "darwin":
+            return self.get_macos_battery_info()
+        return self.get_linux_battery_info()
+
+    def collect_static_info(self):
+        """
+        System information that cannot change without a reboot (everything but the battery).
+        """
+        system_info = self.collect_system_info()
+        return {k: v for k, v in system_info.items() if k not in BATTERY_FIELDS}
+
+    def collect(self):
+        """
+        Collect hardware information as records without uploading them.
+        Returns:
+            list: A single HardwareRecord.
+        """
+        if sysroot.is_live(self.root):
+            # CPU, BIOS and TPM cannot change without a reboot, so reuse this boot's result;
+            # battery voltage and cycle count do, so they are read on every run.
+            system_info = get_boot_cache().get_or_collect("hardware", self.collect_static_info)
+            system_info = dict(system_info, **self.collect_battery_info())
+        else:
+            system_info = self.collect_system_info()
         # Print the collected system information
         print(f"System Headware Information Collected:{system_info}")
-        self.insert_hardware_info(system_info)
+        return [self.build_hardware_record(system_info)]
+
+    def upload(self, records):
+        if get_backend().write_records(HARDWARE, records, upsert=True):
+            print("✅ System info inserted successfully.")
+
+    def get_system_info(self):
+        """
+        Collect system information based on the current platform and upload it.
+        """
+        self.upload(self.collect())
+
+    def run(self):
+        """
+        Collect and upload for the configured asset (entry point used by the collector registry).
+        """
+        self.get_system_info()
@@ -11,31 +11,148 @@ Date: [YYYY-MM-DD]
 import psutil
 import platform
 import os
-import mysql.connector
 import subprocess
-import json
 import re
 
+from src.lib import sysroot
+from src.lib.boot_cache import get_boot_cache
+from src.lib.normalize import parse_int, wmi_memory_type
+from src.lib.probes import run_probe
+from src.lib.storage import get_backend
+from src.lib.schema import MEMORY
+from src.lib.sysroot import is_live
 
-# Database config (store securely in production!)
-DB_HOST="68.178.156.243"
-DB_USER="itamcloud"
-DB_PASSWORD="Kgl0b@ltech"
-DB_NAME="ITAMCloud"
+EDAC_DIMMS = "/sys/devices/system/edac/mc/mc[0-9]*/dimm[0-9]*"
+EDAC_FORM_FACTORS = {"Registered": "RDIMM", "Load-Reduced": "LRDIMM", "Unbuffered": "UDIMM"}
+# Share of the kernel's memory blocks the EDAC DIMMs must cover to be trusted on their own.
+EDAC_MIN_COVERAGE = 0.9
+
+
+def assign_locations(memory_info):
+    """
+    Make every module's location a non-empty label unique within the asset, since
+    (asset_id, location) is the row's key: a missing label becomes "Slot N", and a repeated
+    one gets the slot number appended.
+    Args:
+        memory_info (list): Module dicts from any platform.
+    Returns:
+        list: Copies of the dicts with location filled in.
+    """
+    result = []
+    seen = set()
+    for item in memory_info:
+        location = (item.get("location") or "").strip()
+        if not location or location == "Unknown":
+            location = f"Slot {item['slot_number']}"
+        if location in seen:
+            location = f"{location} #{item['slot_number']}"
+        seen.add(location)
+        result.append(dict(item, location=location))
+    return result
 
 
 class MemHardwareInfoCollector:
 
-    def __init__(self, company_id, asset_id):
+    def __init__(self, company_id=None, asset_id=None, root=None):
         self.asset_id = asset_id
         self.company_id = company_id
+        self.root = root  # EDAC sysfs is read under root; dmidecode only ever inspects the live system
     """
     Collects hardware information for different operating systems.
     """
     def get_linux_memory_info(self):
+        """
+        Per-DIMM inventory for Linux. EDAC sysfs needs neither root nor a subprocess and also
+        carries the error counters; dmidecode (via sudo) only runs when EDAC is missing or does
+        not account for the memory the kernel sees.
+        """
+        memory_info = self.get_edac_memory_info()
+        if memory_info and self.edac_complete(memory_info):
+            return memory_info
+        if not is_live(self.root):
+            return memory_info
+        # Slot inventory cannot change without a reboot, so the privileged probe runs once per boot.
+        return get_boot_cache().get_or_collect("memory", self.get_dmidecode_memory_info) or memory_info
+
+    def get_edac_memory_info(self):
+        """
+        Read the DIMMs the EDAC memory controllers expose under /sys/devices/system/edac/mc.
+        Returns:
+            list: Memory module dicts with location and corrected/uncorrected error counts;
+            empty when no EDAC driver is loaded (e.g. most VMs and laptops).
+        """
         memory_info = []
+        dimms = sysroot.glob_paths(EDAC_DIMMS, self.root)
+        dimms.sort(key=lambda path: [int(n) for n in re.findall(r"mc(\d+)/dimm(\d+)$", path)[0]])
+        slot_number = 0
+        for path in dimms:
+            def read(name):
+                return sysroot.read_text(os.path.join(path, name))
+            slot_number += 1
+            size_mb = parse_int(read("size"))
+            if not size_mb:
+                continue  # empty slot
+            memory_type, form_factor = self.parse_edac_mem_type(read("dimm_mem_type"))
+            memory_info.append({
+                "slot_number": slot_number,
+                "manufacturer": None,
+                "capacity": size_mb * 1024 ** 2,
+                "type": memory_type,
+                "speed": None,
+                "configured_speed": None,
+                "form_factor": form_factor,
+                "part_number": None,
+                "serial_number": None,
+                "location": read("dimm_label") or read("dimm_location"),
+                "ce_count": parse_int(read("dimm_ce_count")),
+                "ue_count": parse_int(read("dimm_ue_count")),
+            })
+        return memory_info
+
+    @staticmethod
+    def parse_edac_mem_type(value):
+        """
+        "Registered-DDR4" -> ("DDR4", "RDIMM"); "Unbuffered-DDR5" -> ("DDR5", "UDIMM").
+        """
+        match = re.search(r"(LP)?DDR\d", value or "")
+        memory_type = match.group(0) if match else "Unknown"
+        for prefix, form_factor in EDAC_FORM_FACTORS.items():
+            if (value or "").startswith(prefix):
+                return memory_type, form_factor
+        return memory_type, None
+
+    def get_memory_block_bytes(self):
+        """
+        Memory the kernel manages, from /sys/devices/system/memory (block count x block size).
+        Returns:
+            int: Bytes, or None if the memory block interface is not available.
+        """
+        block_size = sysroot.read_text("/sys/devices/system/memory/block_size_bytes", self.root)
+        if not block_size:
+            return None
         try:
-            output = subprocess.check_output("sudo dmidecode --type memory", shell=True).decode()
+            block_size = int(block_size, 16)
+        except ValueError:
+            return None
+        blocks = sysroot.glob_paths("/sys/devices/system/memory/memory[0-9]*", self.root)
+        return len(blocks) * block_size or None
+
+    def edac_complete(self, memory_info):
+        """
+        True if the EDAC DIMMs add up to (nearly) all memory blocks; some controllers only
+        register part of the installed modules, and then dmidecode knows better.
+        """
+        block_bytes = self.get_memory_block_bytes()
+        if not block_bytes:
+            return True
+        return sum(item["capacity"] for item in memory_info) >= block_bytes * EDAC_MIN_COVERAGE
+
+    def get_dmidecode_memory_info(self):
+        memory_info = []
+        try:
+            output = run_probe(["dmidecode", "--type", "memory"], sudo=True)
+            if output is None:
+                return memory_info
             slots = output.split("Memory Device")
             slot_number = 0
 
@@ -50,7 +167,8 @@ class MemHardwareInfoCollector:
                     "configured_speed": self.parse_speed(self.get_dmi_value(slot, "Configured Clock Speed")),
                     "form_factor": self.get_dmi_value(slot, "Form Factor"),
                     "part_number": self.get_dmi_value(slot, "Part Number"),
-                    "serial_number": self.get_dmi_value(slot, "Serial Number")
+                    "serial_number": self.get_dmi_value(slot, "Serial Number"),
+                    "location": self.get_dmi_value(slot, "\\tLocator"),  # not "Bank Locator"
                 }
                 if info["capacity"] > 0:
                     memory_info.append(info)
@@ -61,11 +179,13 @@ class MemHardwareInfoCollector:
     def get_windows_memory_info(self):
         memory_info = []
         try:
-            # Query memory chip details using WMIC
-            output = subprocess.check_output(
-                'wmic MEMORYCHIP get BankLabel,Capacity,Manufacturer,Speed,MemoryType,PartNumber,SerialNumber,FormFactor /format:list',
-                shell=True
-            ).decode(errors='ignore')
+            # Query memory chip details using WMIC; SMBIOSMemoryType (Windows 10+) is the
+            # only field that tells DDR4/DDR5 apart, so fall back without it on older systems
+            query = 'wmic MEMORYCHIP get BankLabel,DeviceLocator,Capacity,Manufacturer,Speed,MemoryType,{}PartNumber,SerialNumber,FormFactor /format:list'
+            try:
+                output = subprocess.check_output(query.format('SMBIOSMemoryType,'), shell=True).decode(errors='ignore')
+            except subprocess.CalledProcessError:
+                output = subprocess.check_output(query.format(''), shell=True).decode(errors='ignore')
             chips = [c.strip() for c in output.split('\n\n') if c.strip()]
             slot_number = 0
             for chip in chips:
@@ -83,12 +203,14 @@ class MemHardwareInfoCollector:
                     "slot_number": slot_number,
                     "manufacturer": get_value('Manufacturer'),
                     "capacity": capacity,  # In bytes
-                    "type": get_value('MemoryType'),  # Numeric code for DDR type, mapping available if needed
+                    "type": wmi_memory_type(get_value('SMBIOSMemoryType'), get_value('MemoryType')),  # SMBIOS code
                     "speed": speed,  # In MHz
                     "configured_speed": speed,  # Not directly available, use speed
                     "form_factor": get_value('FormFactor'),
                     "part_number": get_value('PartNumber'),
                     "serial_number": get_value('SerialNumber'),
+                    # DeviceLocator is the SMBIOS Locator dmidecode prints; BankLabel is often shared.
+                    "location": get_value('DeviceLocator') or get_value('BankLabel'),
                 })
         except Exception as e:
             print("Windows memory info error:", e)
@@ -143,6 +265,7 @@ class MemHardwareInfoCollector:
                         "form_factor": None,
                         "part_number": get_value("Part Number"),
                         "serial_number": get_value("Serial Number"),
+                        "location": slot_label.strip().rstrip(":"),
                     })
         except Exception as e:
             print("macOS memory info error:", e)
@@ -168,78 +291,68 @@ class MemHardwareInfoCollector:
   
     def insert_hardware_info(self ,records, asset_id):
         """
-        Insert system_info into MySQL database.
+        Insert memory modules into MySQL database.
         Args:
-            system_info (dict): Collected hardware info.
+            records (list): Collected memory module dicts.
             asset_id (int): Asset identifier.
-            company_id (int): Company identifier.
         """
-        connection = None
-        cursor = None
-        try:
-            connection = mysql.connector.connect(
-                host=DB_HOST,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                database=DB_NAME
-            )
-            cursor = connection.cursor()
-            insert_query = """
-                INSERT INTO assets_memory_info
-                (asset_id, slot_number, manufacturer, capacity, type, speed, configured_speed, form_factor, part_number, serial_number)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            values = [
-                (
-                    asset_id,
-                    item["slot_number"],
-                    item["manufacturer"],
-                    item["capacity"],
-                    item["type"],
-                    item["speed"],
-                    item["configured_speed"],
-                    item["form_factor"],
-                    item["part_number"],
-                    item["serial_number"]
-                ) for item in records
-            ]
-            records_fixed = [
-                (json.dumps(rec[0]), *rec[1:]) for rec in values
-            ]
-            cursor.executemany(insert_query, records_fixed)
-            connection.commit()
-            print("✅ System info inserted successfully.")
+        if not records:
+            print("❌ No memory modules to insert.")
+            return
+        self.upload([MEMORY.build(item, asset_id=asset_id) for item in records])
 
-        except mysql.connector.Error as err:
-            print(f"❌ MySQL error: {err}")
-        except Exception as e:
-            print(f"❌ General error: {e}")
-        finally:
-            if cursor:
-                cursor.close()
-            if connection and connection.is_connected():
-                connection.close()
+    def upload(self, records):
+        if not records:
+            print("❌ No memory modules to insert.")
+            return
+        if get_backend().sync_records(MEMORY, records[0].asset_id, records) is not None:
+            print("✅ System info inserted successfully.")
 
-    def get_memnory_info(self):
+    def collect_memory_info(self):
         """
-        Collect system information based on the current platform.
+        Run the platform-specific probes.
         Returns:
-            dict: Collected system information.
+            list: Collected memory modules.
         """
         platform_name = platform.system().lower()
         if platform_name == "windows":
             print("🔍 Collecting Windows system information...")
-            system_info = self.get_windows_memory_info()
+            return self.get_windows_memory_info()
         elif platform_name == "linux":
             print("🔍 Collecting Linux system information...")
-            system_info = self.get_linux_memory_info()
+            return self.get_linux_memory_info()
         elif platform_name == "darwin":  # macOS
             print("🔍 Collecting macOS system information...")
-            system_info = self.get_mac_memory_info() 
+            return self.get_mac_memory_info()
         else:
             print("❌ Unsupported platform:", platform_name)
             exit(1)
+
+    def collect(self):
+        """
+        Collect memory modules as records without uploading them.
+        Returns:
+            list: MemoryRecord per populated slot.
+        """
+        if platform.system().lower() == "linux":
+            # EDAC error counters move while the machine runs; only the dmidecode fallback is cached.
+            system_info = self.collect_memory_info()
+        else:
+            # Memory modules cannot change without a reboot, so reuse this boot's result.
+            system_info = get_boot_cache().get_or_collect("memory", self.collect_memory_info)
+        system_info = assign_locations(system_info)
         # Print the collected system information
         print(f"System Memory Information Collected:{system_info}")
-        # Insert the collected system information into the database
-        self.insert_hardware_info(system_info, self.asset_id)
+        return [MEMORY.build(item, asset_id=self.asset_id) for item in system_info]
+
+    def get_memnory_info(self):
+        """
+        Collect memory information based on the current platform and upload it.
+        """
+        self.upload(self.collect())
+
+    def run(self):
+        """
+        Collect and upload for the configured asset (entry point used by the collector registry).
+        """
+        self.get_memnory_info()
@@ -0,0 +1,467 @@
+"""
+migrations.py
+
+Versioned schema for every table the agent reads or writes. Each migration runs once
+and is recorded in `schema_migrations`, so the same command bootstraps an empty local
+MySQL instance and upgrades an existing one.
+
+Key design points:
+- `assets.serial` is indexed for check_serial_no().
+- Child tables carry a UNIQUE key on (asset_id, natural key). Its asset_id prefix also
+  serves the per-asset lookups done by the replace-set sync, so no separate (asset_id)
+  index is needed.
+- With `partitions`, the company-scoped tables (`assets`, `assets_hardware_info`)
+  are partitioned by KEY(company_id); MySQL then requires company_id in every unique key.
+"""
+
+import mysql.connector
+
+from src.lib.fleet_summary import SUMMARY_TABLE, rebuild
+from src.lib.normalize import memory_type_code, parse_bytes, parse_int, wmi_memory_type
+from src.lib.schema import SCHEMAS
+from src.lib.shard_router import DIRECTORY_TABLE
+from src.lib.staging import ASSETS_STAGING, staging_table
+
+
+# Schema columns added after migration 1, by schema name; the migration that adds them
+# also adds them to the staging table, so migration 4 must not copy them.
+ADDED_COLUMNS = {
+    "memory": {"location": "VARCHAR(191)", "ce_count": "BIGINT UNSIGNED", "ue_count": "BIGINT UNSIGNED"},
+}
+
+
+class Migration:
+    __slots__ = ("version", "description", "apply")
+
+    def __init__(self, version, description, apply):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """
+    Register a function (cursor, options) as the migration for `version`.
+    """
+    def register(apply):
+        MIGRATIONS.append(Migration(version, description, apply))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return apply
+    return register
+
+
+def partition_clause(options):
+    partitions = options.get("partitions")
+    return f" PARTITION BY KEY(company_id) PARTITIONS {int(partitions)}" if partitions else ""
+
+
+def table_exists(cursor, table):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+        (table,),
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def index_exists(cursor, table, index):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+        (table, index),
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def column_exists(cursor, table, column):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+        (table, column),
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def ensure_index(cursor, table, index, definition):
+    """
+    Add an index to a table that predates the migrations, if it is missing.
+    Unique keys fail on tables that still hold duplicate rows from old plain-INSERT runs;
+    that is reported instead of aborting, and the replace-set sync removes those duplicates
+    asset by asset.
+    """
+    if index_exists(cursor, table, index):
+        return
+    try:
+        cursor.execute(f"ALTER TABLE {table} ADD {definition}")
+        print(f"✅ Added {index} on {table}")
+    except mysql.connector.Error as err:
+        print(f"[WARN] Could not add {index} on {table}: {err}")
+
+
+def ensure_column(cursor, table, column, definition):
+    if not column_exists(cursor, table, column):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        print(f"✅ Added {table}.{column}")
+
+
+@migration(1, "Create assets and per-asset inventory tables")
+def create_base_tables(cursor, options):
+    partitioned = bool(options.get("partitions"))
+    if table_exists(cursor, "assets"):
+        ensure_index(cursor, "assets", "idx_assets_serial", "INDEX idx_assets_serial (serial)")
+    else:
+        primary = "PRIMARY KEY (id, company_id)" if partitioned else "PRIMARY KEY (id)"
+        cursor.execute(f"""
+            CREATE TABLE assets (
+                id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+                company_id BIGINT UNSIGNED NOT NULL,
+                serial VARCHAR(191) NOT NULL,
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                {primary},
+                UNIQUE KEY uq_assets_company_serial (company_id, serial),
+                INDEX idx_assets_serial (serial)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4{partition_clause(options)}
+        """)
+
+    if table_exists(cursor, "assets_hardware_info"):
+        ensure_index(cursor, "assets_hardware_info", "PRIMARY", "PRIMARY KEY (asset_id)")
+    else:
+        primary = "PRIMARY KEY (asset_id, company_id)" if partitioned else "PRIMARY KEY (asset_id)"
+        cursor.execute(f"""
+            CREATE TABLE assets_hardware_info (
+                asset_id BIGINT UNSIGNED NOT NULL,
+                company_id BIGINT UNSIGNED NOT NULL,
+                serial_number VARCHAR(191),
+                make VARCHAR(191),
+                model VARCHAR(191),
+                version VARCHAR(191),
+                motherboard_serial_no VARCHAR(191),
+                cpu_id VARCHAR(255),
+                cpu_type VARCHAR(64),
+                bios VARCHAR(191),
+                tpm_manufacturer VARCHAR(191),
+                tpm_version VARCHAR(64),
+                tpm_activation_status VARCHAR(64),
+                tpm_ownership_status VARCHAR(64),
+                battery_vendor VARCHAR(191),
+                battery_model VARCHAR(191),
+                battery_serial_number VARCHAR(191),
+                battery_voltage INT,
+                battery_cycle_count INT,
+                memory_slots_used BIGINT UNSIGNED,
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                {primary},
+                INDEX idx_hardware_company (company_id)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4{partition_clause(options)}
+        """)
+
+    child_tables = {
+        "assets_drives_info": ("""
+                device_id VARCHAR(191),
+                model VARCHAR(191),
+                serial_number VARCHAR(191),
+                drive_type VARCHAR(64),
+                interface_type VARCHAR(64),
+                size BIGINT UNSIGNED,
+                partitions TEXT,""", "UNIQUE KEY uq_drives_natural (asset_id, device_id, serial_number)"),
+        "assets_graphics_card_info": ("""
+                name VARCHAR(255),
+                adapter_compatibility VARCHAR(191),
+                driver_version VARCHAR(191),
+                video_processor VARCHAR(191),
+                current_horizontal_resolution VARCHAR(16),
+                current_vertical_resolution VARCHAR(16),
+                current_refresh_rate VARCHAR(16),
+                adapter_ram VARCHAR(64),
+                availability VARCHAR(64),
+                status VARCHAR(64),
+                bus_info VARCHAR(191),""", "UNIQUE KEY uq_graphics_natural (asset_id, name, bus_info)"),
+        "assets_memory_info": ("""
+                slot_number INT NOT NULL,
+                manufacturer VARCHAR(191),
+                capacity BIGINT UNSIGNED,
+                type VARCHAR(64),
+                speed INT,
+                configured_speed INT,
+                form_factor VARCHAR(64),
+                part_number VARCHAR(191),
+                serial_number VARCHAR(191),""", "UNIQUE KEY uq_memory_natural (asset_id, slot_number)"),
+        "assets_network_adapter_info": ("""
+                adapter_name VARCHAR(191) NOT NULL,
+                manufacturer VARCHAR(191),
+                mac_address VARCHAR(64),
+                interface_type VARCHAR(64),
+                ip_address VARCHAR(64),
+                subnet_mask VARCHAR(64),
+                default_gateway VARCHAR(64),
+                dhcp_enabled TINYINT(1),
+                speed BIGINT,
+                status VARCHAR(16),""", "UNIQUE KEY uq_network_natural (asset_id, adapter_name)"),
+    }
+    for table, (columns, unique_key) in child_tables.items():
+        index_name = unique_key.split()[2]
+        if table_exists(cursor, table):
+            if table == "assets_graphics_card_info":
+                ensure_column(cursor, table, "bus_info", "VARCHAR(191)")
+            ensure_index(cursor, table, index_name, unique_key)
+            continue
+        cursor.execute(f"""
+            CREATE TABLE {table} (
+                id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+                asset_id BIGINT UNSIGNED NOT NULL,{columns}
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (id),
+                {unique_key}
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+
+
+@migration(2, "Create utilization rollup table")
+def create_utilization_rollups(cursor, options):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS assets_utilization_rollups (
+            asset_id BIGINT UNSIGNED NOT NULL,
+            metric VARCHAR(191) NOT NULL,
+            period_start DATETIME NOT NULL,
+            period_end DATETIME NOT NULL,
+            samples INT NOT NULL,
+            min_value DOUBLE,
+            avg_value DOUBLE,
+            max_value DOUBLE,
+            PRIMARY KEY (asset_id, metric, period_start)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+@migration(3, "Create agent schedule hints table")
+def create_schedule_hints(cursor, options):
+    # A NULL company_id/asset_id widens the hint to every company/asset.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS agent_schedule_hints (
+            id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+            company_id BIGINT UNSIGNED NULL,
+            asset_id BIGINT UNSIGNED NULL,
+            retry_after_seconds INT NULL,
+            slow_down_factor DOUBLE NULL,
+            reason VARCHAR(255),
+            expires_at DATETIME NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id),
+            INDEX idx_hints_scope (company_id, asset_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+@migration(4, "Create bulk-load staging tables")
+def create_staging_tables(cursor, options):
+    # Column types are copied from the target tables; keys are not, so a load never
+    # fails on duplicates before the merge sees them.
+    for schema in SCHEMAS.values():
+        table = staging_table(schema)
+        if table_exists(cursor, table):
+            continue
+        # Only the columns that exist at this version; later migrations add their own.
+        added = ADDED_COLUMNS.get(schema.name, {})
+        columns = [c for c in schema.columns if c not in added]
+        cursor.execute(
+            f"CREATE TABLE {table} ENGINE=InnoDB "
+            f"SELECT {', '.join(columns)} FROM {schema.table} LIMIT 0"
+        )
+        cursor.execute(
+            f"ALTER TABLE {table} ADD COLUMN load_id BIGINT UNSIGNED NOT NULL FIRST, "
+            f"ADD INDEX idx_{table}_load (load_id, asset_id)"
+        )
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ASSETS_STAGING} (
+            load_id BIGINT UNSIGNED NOT NULL,
+            schema_name VARCHAR(32) NOT NULL,
+            asset_id BIGINT UNSIGNED NOT NULL,
+            INDEX idx_staging_assets_load (load_id, schema_name, asset_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+@migration(5, "Create fleet summary table")
+def create_fleet_summary(cursor, options):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+            company_id BIGINT UNSIGNED NOT NULL,
+            dimension VARCHAR(32) NOT NULL,
+            value VARCHAR(191) NOT NULL,
+            items BIGINT NOT NULL DEFAULT 0,
+            total BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (company_id, dimension, value)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    # Seed from whatever the raw tables already hold; ingest keeps it current from here on.
+    rebuild(cursor)
+
+
+@migration(6, "Create company shard directory table")
+def create_company_shards(cursor, options):
+    # Only read on the shard named as "directory" in the shard config; harmless elsewhere.
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {DIRECTORY_TABLE} (
+            company_id BIGINT UNSIGNED NOT NULL,
+            shard VARCHAR(64) NOT NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (company_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+# Columns given canonical numeric types by migration 7, with the normalizer for old values.
+NORMALIZED_COLUMNS = {
+    "assets_graphics_card_info": {
+        "adapter_ram": ("BIGINT UNSIGNED", parse_bytes),
+        "current_horizontal_resolution": ("INT", parse_int),
+        "current_vertical_resolution": ("INT", parse_int),
+        "current_refresh_rate": ("INT", parse_int),
+    },
+    # Numeric values already stored here came from Windows' MemoryType (WMI codes).
+    "assets_memory_info": {
+        "type": ("SMALLINT UNSIGNED", lambda v: wmi_memory_type(None, v) if str(v).isdigit() else memory_type_code(v)),
+    },
+}
+NORMALIZE_BATCH = 5000
+
+
+def normalize_column_values(cursor, table, columns):
+    """
+    Rewrite the existing values of `columns` in canonical units, in id-ordered batches,
+    so the following ALTER TABLE never meets "1536 MB" or "DDR4" in a numeric column.
+    """
+    names = list(columns)
+    last_id = 0
+    while True:
+        cursor.execute(
+            f"SELECT id, {', '.join(names)} FROM {table} WHERE id > %s ORDER BY id LIMIT {NORMALIZE_BATCH}",
+            (last_id,),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        updates = []
+        for row in rows:
+            old = [None if value is None else str(value) for value in row[1:]]
+            values = [None if value is None else columns[name][1](value) for name, value in zip(names, row[1:])]
+            # "1920" and 1920 are the same once the column is numeric; only rewrite real changes.
+            if [None if value is None else str(value) for value in values] != old:
+                updates.append(tuple(values) + (row[0],))
+        if updates:
+            cursor.executemany(
+                f"UPDATE {table} SET {', '.join(f'{name} = %s' for name in names)} WHERE id = %s", updates
+            )
+        last_id = rows[-1][0]
+
+
+@migration(7, "Store GPU memory, resolutions and memory type as canonical numbers")
+def normalize_units(cursor, options):
+    for table, columns in NORMALIZED_COLUMNS.items():
+        normalize_column_values(cursor, table, columns)
+        modify = ", ".join(f"MODIFY COLUMN {name} {sql_type} NULL" for name, (sql_type, _) in columns.items())
+        cursor.execute(f"ALTER TABLE {table} {modify}")
+    # Staging tables were copied from the old column types; give them the new ones.
+    for schema in SCHEMAS.values():
+        staging = staging_table(schema)
+        if schema.table in NORMALIZED_COLUMNS and table_exists(cursor, staging):
+            columns = NORMALIZED_COLUMNS[schema.table]
+            modify = ", ".join(f"MODIFY COLUMN {name} {sql_type} NULL" for name, (sql_type, _) in columns.items())
+            cursor.execute(f"TRUNCATE TABLE {staging}")
+            cursor.execute(f"ALTER TABLE {staging} {modify}")
+    ensure_index(cursor, "assets_graphics_card_info", "idx_graphics_vram", "INDEX idx_graphics_vram (adapter_ram)")
+    ensure_index(cursor, "assets_memory_info", "idx_memory_type", "INDEX idx_memory_type (type, capacity)")
+    # memory_type buckets were keyed by name; recount them by code.
+    rebuild(cursor)
+
+
+@migration(8, "Add DIMM location and EDAC error counters to memory modules")
+def add_memory_error_counters(cursor, options):
+    tables = ["assets_memory_info"]
+    staging = staging_table(SCHEMAS["memory"])
+    if table_exists(cursor, staging):
+        tables.append(staging)
+    for table in tables:
+        for column, definition in ADDED_COLUMNS["memory"].items():
+            ensure_column(cursor, table, column, f"{definition} NULL")
+    # Lets fleet queries find modules with uncorrected errors without a scan.
+    ensure_index(cursor, "assets_memory_info", "idx_memory_ue", "INDEX idx_memory_ue (ue_count)")
+
+
+@migration(9, "Key memory modules on their slot label instead of a slot ordinal")
+def key_memory_on_location(cursor, options):
+    # Rows from before migration 8 have no label; collectors fall back to the same "Slot N".
+    cursor.execute(
+        "UPDATE assets_memory_info SET location = CONCAT('Slot ', slot_number) "
+        "WHERE location IS NULL OR location = '' OR location = 'Unknown'"
+    )
+    ensure_index(cursor, "assets_memory_info", "uq_memory_location",
+                 "UNIQUE KEY uq_memory_location (asset_id, location)")
+    if index_exists(cursor, "assets_memory_info", "uq_memory_location") and \
+            index_exists(cursor, "assets_memory_info", "uq_memory_natural"):
+        cursor.execute("ALTER TABLE assets_memory_info DROP INDEX uq_memory_natural")
+
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT NOT NULL PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def applied_versions(cursor):
+    ensure_migrations_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def migrate(connection, target=None, **options):
+    """
+    Apply every pending migration up to `target` (all by default).
+    MySQL DDL auto-commits, so each migration is recorded right after it succeeds;
+    migrations are written to be safe to re-run if one fails halfway.
+    Args:
+        connection: Open mysql.connector connection.
+        target (int): Highest version to apply.
+        **options: partitions (int) to partition company-scoped tables by company_id.
+    Returns:
+        list: Versions applied by this call.
+    """
+    cursor = connection.cursor(buffered=True)
+    applied = []
+    try:
+        done = applied_versions(cursor)
+        for m in MIGRATIONS:
+            if m.version in done or (target is not None and m.version > target):
+                continue
+            print(f"🔄 Applying migration {m.version}: {m.description}")
+            m.apply(cursor, options)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (m.version, m.description),
+            )
+            connection.commit()
+            applied.append(m.version)
+        print(f"✅ Schema is at version {max(done | set(applied), default=0)}")
+        return applied
+    finally:
+        cursor.close()
+
+
+def status(connection):
+    """
+    Returns:
+        list: (version, description, applied) for every known migration.
+    """
+    cursor = connection.cursor(buffered=True)
+    try:
+        done = applied_versions(cursor)
+        return [(m.version, m.description, m.version in done) for m in MIGRATIONS]
+    finally:
+        cursor.close()
@@ -0,0 +1,338 @@
+"""
+netlink_monitor.py
+
+Event-driven network inventory for Linux. A NETLINK_ROUTE socket subscribed to
+RTMGRP_LINK, RTMGRP_IPV4_IFADDR and RTMGRP_IPV4_ROUTE keeps an in-memory table of
+interfaces, IPv4 addresses and the default route up to date incrementally.
+Only adapters that actually changed are pushed through the upload path, and bursts
+of events (link flaps, VPN reconnects) are debounced into a single write.
+If the kernel drops events because the socket buffer overflowed (ENOBUFS), the table
+is rebuilt from a fresh dump and a full sync is run.
+"""
+
+import errno
+import select
+import socket
+import struct
+import time
+
+import psutil
+
+from src.lib.storage import get_backend
+from src.lib.schema import NETWORK
+
+
+NETLINK_ROUTE = 0
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_ROUTE = 0x40
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+# A dump that overflows is restarted from scratch this many times before giving up.
+DUMP_ATTEMPTS = 3
+
+RTM_NEWLINK, RTM_DELLINK, RTM_GETLINK = 16, 17, 18
+RTM_NEWADDR, RTM_DELADDR, RTM_GETADDR = 20, 21, 22
+RTM_NEWROUTE, RTM_DELROUTE, RTM_GETROUTE = 24, 25, 26
+
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+IFF_UP = 0x1
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+RTA_OIF = 4
+RTA_GATEWAY = 5
+RT_TABLE_MAIN = 254
+
+NLMSGHDR = struct.Struct("=LHHLL")
+IFINFOMSG = struct.Struct("=BxHiII")
+IFADDRMSG = struct.Struct("=BBBBi")
+RTMSG = struct.Struct("=BBBBBBBBI")
+RTATTR = struct.Struct("=HH")
+
+
+def _align(length):
+    return (length + 3) & ~3
+
+
+def parse_attributes(data, offset):
+    """
+    Parse a run of rtattr TLVs starting at `offset`.
+    Returns:
+        dict: Attribute type -> raw payload bytes.
+    """
+    attrs = {}
+    while offset + RTATTR.size <= len(data):
+        length, attr_type = RTATTR.unpack_from(data, offset)
+        if length < RTATTR.size:
+            break
+        attrs[attr_type] = data[offset + RTATTR.size:offset + length]
+        offset += _align(length)
+    return attrs
+
+
+def iter_messages(data):
+    """
+    Yield (type, flags, payload) for every netlink message in a datagram.
+    """
+    offset = 0
+    while offset + NLMSGHDR.size <= len(data):
+        length, msg_type, flags, _seq, _pid = NLMSGHDR.unpack_from(data, offset)
+        if length < NLMSGHDR.size:
+            break
+        yield msg_type, flags, data[offset + NLMSGHDR.size:offset + length]
+        offset += _align(length)
+
+
+def prefix_to_netmask(prefixlen):
+    mask = (0xFFFFFFFF << (32 - prefixlen)) & 0xFFFFFFFF if prefixlen else 0
+    return socket.inet_ntoa(struct.pack("!I", mask))
+
+
+class InterfaceTable:
+    """
+    In-memory view of links, IPv4 addresses and the default route, keyed by ifindex.
+    Every mutation records which adapter names became dirty.
+    """
+
+    def __init__(self):
+        self.links = {}       # ifindex -> {"name", "mac", "up"}
+        self.addresses = {}   # ifindex -> [(ip, prefixlen), ...] in arrival order
+        self.default_gateway = None
+        self.dirty = set()
+        self.removed = set()
+
+    def name_of(self, index):
+        link = self.links.get(index)
+        return link["name"] if link else None
+
+    def _mark(self, index):
+        name = self.name_of(index)
+        if name:
+            self.dirty.add(name)
+
+    def apply(self, msg_type, payload):
+        """
+        Apply one rtnetlink message to the table.
+        """
+        if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+            _family, _type, index, flags, _change = IFINFOMSG.unpack_from(payload)
+            attrs = parse_attributes(payload, IFINFOMSG.size)
+            if msg_type == RTM_DELLINK:
+                name = self.name_of(index)
+                self.links.pop(index, None)
+                self.addresses.pop(index, None)
+                if name:
+                    self.removed.add(name)
+                    self.dirty.discard(name)
+                return
+            name = attrs.get(IFLA_IFNAME, b"").rstrip(b"\0").decode(errors="ignore") or self.name_of(index)
+            mac = attrs.get(IFLA_ADDRESS)
+            link = {
+                "name": name,
+                "mac": ":".join(f"{b:02x}" for b in mac) if mac and any(mac) else None,
+                "up": bool(flags & IFF_UP),
+            }
+            previous = self.links.get(index)
+            if previous and previous["name"] != name:
+                self.removed.add(previous["name"])
+            if previous != link:
+                self.links[index] = link
+                self._mark(index)
+        elif msg_type in (RTM_NEWADDR, RTM_DELADDR):
+            family, prefixlen, _flags, _scope, index = IFADDRMSG.unpack_from(payload)
+            if family != socket.AF_INET:
+                return
+            attrs = parse_attributes(payload, IFADDRMSG.size)
+            raw = attrs.get(IFA_LOCAL) or attrs.get(IFA_ADDRESS)
+            if not raw:
+                return
+            address = (socket.inet_ntoa(raw), prefixlen)
+            addresses = self.addresses.setdefault(index, [])
+            if msg_type == RTM_NEWADDR:
+                # The first IPv4 address is reported, like the polling collector does;
+                # later ones are kept so they can take over when it goes away.
+                if address not in addresses:
+                    addresses.append(address)
+                    if len(addresses) == 1:
+                        self._mark(index)
+            elif address in addresses:
+                primary = addresses[0]
+                addresses.remove(address)
+                if address == primary:
+                    self._mark(index)
+            if not addresses:
+                del self.addresses[index]
+        elif msg_type in (RTM_NEWROUTE, RTM_DELROUTE):
+            family, dst_len, _src_len, _tos, table, _proto, _scope, _type, _flags = RTMSG.unpack_from(payload)
+            if family != socket.AF_INET or dst_len != 0 or table != RT_TABLE_MAIN:
+                return
+            attrs = parse_attributes(payload, RTMSG.size)
+            gateway = socket.inet_ntoa(attrs[RTA_GATEWAY]) if RTA_GATEWAY in attrs else None
+            new_gateway = gateway if msg_type == RTM_NEWROUTE else None
+            if msg_type == RTM_DELROUTE and gateway != self.default_gateway:
+                return
+            if new_gateway != self.default_gateway:
+                self.default_gateway = new_gateway
+                # default_gateway is stored on every adapter row.
+                self.dirty.update(link["name"] for link in self.links.values())
+
+    def take_changes(self):
+        """
+        Return and clear (dirty adapter names, removed adapter names).
+        """
+        dirty, removed = self.dirty, self.removed
+        self.dirty, self.removed = set(), set()
+        return dirty, removed
+
+
+class NetlinkMonitor:
+    """
+    Keeps an InterfaceTable current from rtnetlink events and pushes debounced deltas.
+    Args:
+        collector (NetworkAdapterInfoCollector): Supplies asset_id, DHCP detection and full resyncs.
+        debounce (float): Quiet period (seconds) required before changes are flushed.
+        max_delay (float): Upper bound on how long a change may wait during a continuous burst.
+    """
+
+    def __init__(self, collector, debounce=2.0, max_delay=10.0):
+        self.collector = collector
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.table = InterfaceTable()
+        self.sock = None
+
+    def open(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+        self.sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV4_ROUTE))
+        self.dump()
+        # The initial dump describes the current state, which the first full run already uploaded.
+        self.table.take_changes()
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def dump(self):
+        """
+        Replace the table with the current links, addresses and routes.
+        """
+        for attempt in range(1, DUMP_ATTEMPTS + 1):
+            self.table = InterfaceTable()
+            try:
+                self._dump()
+                return
+            except OSError as e:
+                if e.errno != errno.ENOBUFS or attempt == DUMP_ATTEMPTS:
+                    raise
+                print("[WARN] rtnetlink dump overflowed (ENOBUFS); retrying...")
+
+    def _dump(self):
+        """
+        Load the current links, addresses and routes via a one-off dump request.
+        """
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE) as dump_sock:
+            dump_sock.bind((0, 0))
+            for seq, (request, header) in enumerate((
+                (RTM_GETLINK, IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)),
+                (RTM_GETADDR, IFADDRMSG.pack(socket.AF_INET, 0, 0, 0, 0)),
+                (RTM_GETROUTE, RTMSG.pack(socket.AF_INET, 0, 0, 0, 0, 0, 0, 0, 0)),
+            ), start=1):
+                message = NLMSGHDR.pack(NLMSGHDR.size + len(header), request, NLM_F_REQUEST | NLM_F_DUMP, seq, 0)
+                dump_sock.send(message + header)
+                done = False
+                while not done:
+                    data = dump_sock.recv(65536)
+                    for msg_type, _flags, payload in iter_messages(data):
+                        if msg_type in (NLMSG_DONE, NLMSG_ERROR):
+                            done = True
+                            break
+                        self.table.apply(msg_type, payload)
+
+    def build_records(self, names):
+        """
+        Build NetworkAdapterRecords for the given adapter names from the in-memory table.
+        """
+        stats = psutil.net_if_stats()
+        records = []
+        for index, link in self.table.links.items():
+            name = link["name"]
+            if name not in names:
+                continue
+            addresses = self.table.addresses.get(index)
+            address = addresses[0] if addresses else None
+            if_stats = stats.get(name)
+            records.append(NETWORK.build({
+                'adapter_name': name,
+                'manufacturer': '',
+                'mac_address': link["mac"],
+                'interface_type': '',
+                'ip_address': address[0] if address else None,
+                'subnet_mask': prefix_to_netmask(address[1]) if address else None,
+                'default_gateway': self.table.default_gateway,
+                'dhcp_enabled': 1 if self.collector.get_dhcp_status(name) == 'Yes' else 0,
+                'speed': if_stats.speed if if_stats else 0,
+                'status': 'Up' if link["up"] else 'Down',
+            }, asset_id=self.collector.asset_id))
+        return records
+
+    def resync(self):
+        """
+        Events were lost: rebuild the table from a dump and upload the full adapter set.
+        """
+        print("[WARN] rtnetlink events were dropped (ENOBUFS); running a full network sync...")
+        self.dump()
+        self.table.take_changes()
+        self.collector.run()
+
+    def flush(self):
+        dirty, removed = self.table.take_changes()
+        if removed:
+            # Deleting rows needs the complete set, so fall back to a full replace-set sync.
+            print(f"🔄 Adapters removed ({', '.join(sorted(removed))}); running a full network sync...")
+            self.collector.run()
+            return
+        if dirty:
+            print(f"🔄 Network change on {', '.join(sorted(dirty))}; uploading changed adapters...")
+            get_backend().sync_records(NETWORK, self.collector.asset_id, self.build_records(dirty), delete_missing=False)
+
+    def run(self, stop_event=None):
+        """
+        Process events until stop_event is set, flushing debounced changes.
+        """
+        if self.sock is None:
+            self.open()
+        first_change = None
+        last_change = None
+        try:
+            while not (stop_event and stop_event.is_set()):
+                timeout = 1.0
+                if last_change is not None:
+                    timeout = max(0.0, min(last_change + self.debounce, first_change + self.max_delay) - time.monotonic())
+                readable, _, _ = select.select([self.sock], [], [], timeout)
+                if readable:
+                    try:
+                        data = self.sock.recv(65536)
+                    except OSError as e:
+                        if e.errno != errno.ENOBUFS:
+                            raise
+                        self.resync()
+                        first_change = last_change = None
+                        continue
+                    for msg_type, _flags, payload in iter_messages(data):
+                        self.table.apply(msg_type, payload)
+                    if self.table.dirty or self.table.removed:
+                        now = time.monotonic()
+                        first_change = first_change or now
+                        last_change = now
+                if last_change is not None:
+                    now = time.monotonic()
+                    if now - last_change >= self.debounce or now - first_change >= self.max_delay:
+                        self.flush()
+                        first_change = last_change = None
+        finally:
+            self.close()
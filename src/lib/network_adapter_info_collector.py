@@ -6,19 +6,19 @@ import re
 
 import os
 import sys
-import mysql.connector
 
-
-DB_HOST="68.178.156.243"
-DB_USER="itamcloud"
-DB_PASSWORD="Kgl0b@ltech"
-DB_NAME="ITAMCloud"
+from src.lib.storage import get_backend
+from src.lib.schema import NETWORK
+from src.lib import sysroot
+from src.lib.probes import run_probe
 
 
 class NetworkAdapterInfoCollector:
-    def __init__(self, company_id, asset_id):
+    def __init__(self, company_id=None, asset_id=None, root=None):
         self.asset_id = asset_id
         self.company_id = company_id
+        # Alternate root prefix for on-disk state such as DHCP lease files.
+        self.root = root
 
     def get_default_gateway(self):
         system = platform.system()
@@ -36,7 +36,7 @@ class NetworkAdapterInfoCollector:
                 if match:
                     return match.group(1)
             elif system == "Linux":
-                output = subprocess.check_output("ip route show default", shell=True, text=True)
+                output = run_probe(["ip", "route", "show", "default"]) or ""
                 match = re.search(r'default via ([\d.]+)', output)
                 if match:
                     return match.group(1)
@@ -66,23 +66,12 @@ class NetworkAdapterInfoCollector:
                     return "No"
             elif system == "Linux":
                 # Try to determine if DHCP is enabled using nmcli (NetworkManager)
-                try:
-                    nmcli_output = subprocess.check_output(
-                        f"nmcli device show {interface}", shell=True, text=True
-                    )
-                    if "IP4.DHCP" in nmcli_output:
-                        return "Yes"
-                except Exception:
-                    pass
+                nmcli_output = run_probe(["nmcli", "device", "show", interface])
+                if nmcli_output and "IP4.DHCP" in nmcli_output:
+                    return "Yes"
                 # Fallback: check dhclient lease files (not always reliable)
-                try:
-                    leases = subprocess.check_output(
-                        f"ls /var/lib/dhcp/dhclient.*{interface}*.leases", shell=True, text=True
-                    )
-                    if leases.strip():
-                        return "Yes"
-                except Exception:
-                    pass
+                if sysroot.glob_paths(f"/var/lib/dhcp/dhclient.*{interface}*.leases", self.root):
+                    return "Yes"
         except Exception:
             pass
         return "No"
@@ -138,61 +127,35 @@ class NetworkAdapterInfoCollector:
 
     def insert_network_info(self, network_info):
         """
-        Insert system_info into MySQL database.
+        Insert network adapters into MySQL database.
         Args:
-            system_info (dict): Collected hardware info.
-            asset_id (int): Asset identifier.
-            company_id (int): Company identifier.
+            network_info (list): Collected adapter dicts.
         """
-        connection = None
-        cursor = None
-        try:
-            connection = mysql.connector.connect(
-                host=DB_HOST,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                database=DB_NAME
-            )
-            cursor = connection.cursor()
-            query = """
-                INSERT INTO assets_network_adapter_info 
-                (asset_id, adapter_name, manufacturer, mac_address, interface_type, ip_address, subnet_mask, default_gateway, dhcp_enabled, speed, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            for adapter in network_info:
-                values = (
-                    self.asset_id,
-                    adapter['adapter_name'],
-                    adapter['manufacturer'],
-                    adapter['mac_address'],
-                    adapter['interface_type'],
-                    adapter['ip_address'],
-                    adapter['subnet_mask'],
-                    adapter['default_gateway'],
-                    adapter['dhcp_enabled'],
-                    adapter['speed'],
-                    adapter['status']
-                )
-            cursor.execute(query, values)
-            connection.commit()
-            print("✅ System info inserted successfully.")
+        self.upload([NETWORK.build(adapter, asset_id=self.asset_id) for adapter in network_info])
+
+    def upload(self, records):
+        if not records:
+            print("❌ No network adapter information found.")
+            return
+        if get_backend().sync_records(NETWORK, self.asset_id, records) is not None:
             print("Network adapter information inserted successfully.")
-        except mysql.connector.Error as err:
-            print(f"❌ MySQL error: {err}")
-        except Exception as e:
-            print(f"❌ General error: {e}")
-        finally:
-            if cursor:
-                cursor.close()
-            if connection and connection.is_connected():
-                connection.close()
 
-    def get_network_info(self):
+    def collect(self):
+        """
+        Collect network adapters as records without uploading them.
+        Returns:
+            list: NetworkAdapterRecord per interface.
+        """
         print("Collecting network adapter information...")
-        # Collect network information
         network_info = self.collect_network_info()
-        if not network_info:
-            print("❌ No network adapter information found.")
-            return
         print(f"System Network Information: {network_info}")
-        self.insert_network_info(network_info)
+        return [NETWORK.build(adapter, asset_id=self.asset_id) for adapter in network_info]
+
+    def get_network_info(self):
+        self.upload(self.collect())
+
+    def run(self):
+        """
+        Collect and upload for the configured asset (entry point used by the collector registry).
+        """
+        self.get_network_info()
@@ -0,0 +1,143 @@
+"""
+normalize.py
+
+Canonical units for the numeric inventory columns, applied to every record as it is
+built from a collector dict (TableSchema.build), so all platforms upload the same thing:
+
+- sizes (adapter_ram, memory capacity, drive size, total RAM) in bytes;
+- resolutions, refresh rates, speeds, voltages and counts as integers;
+- memory type as its SMBIOS type 17 code (26 = DDR4, 34 = DDR5, ...).
+
+Every function accepts its own output unchanged, so records rebuilt from snapshots,
+spools or JSON Lines logs normalize to the same values.
+"""
+
+import re
+
+
+# SMBIOS 3.x, type 17 "Memory Type".
+SMBIOS_MEMORY_TYPES = {
+    1: "Other", 2: "Unknown", 3: "DRAM", 4: "EDRAM", 5: "VRAM", 6: "SRAM", 7: "RAM", 8: "ROM",
+    9: "Flash", 10: "EEPROM", 11: "FEPROM", 12: "EPROM", 13: "CDRAM", 14: "3DRAM", 15: "SDRAM",
+    16: "SGRAM", 17: "RDRAM", 18: "DDR", 19: "DDR2", 20: "DDR2 FB-DIMM", 24: "DDR3", 25: "FBD2",
+    26: "DDR4", 27: "LPDDR", 28: "LPDDR2", 29: "LPDDR3", 30: "LPDDR4", 31: "Logical non-volatile device",
+    32: "HBM", 33: "HBM2", 34: "DDR5", 35: "LPDDR5", 36: "HBM3",
+}
+MEMORY_TYPE_UNKNOWN = 2
+MEMORY_TYPE_CODES = {name.upper(): code for code, name in SMBIOS_MEMORY_TYPES.items()}
+MEMORY_TYPE_CODES.update({"LPDDR4X": 30, "LPDDR5X": 35, "DDR SDRAM": 18, "SYNCHRONOUS DRAM": 15})
+# Win32_PhysicalMemory.MemoryType (pre-DDR4 only; newer modules report 0 there).
+WMI_MEMORY_TYPES = {
+    1: 1, 2: 3, 3: 15, 4: 1, 5: 1, 6: 4, 7: 5, 8: 6, 9: 7, 10: 8, 11: 9, 12: 10, 13: 11, 14: 12,
+    15: 13, 16: 14, 17: 15, 18: 16, 19: 17, 20: 18, 21: 19, 22: 20, 24: 24, 25: 25,
+}
+
+BYTE_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+_SIZE = re.compile(r"^([\d.]+)\s*([KMGT]?)(?:I?B)?$")
+_NUMBER = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+
+def parse_bytes(value):
+    """
+    Byte count from an int, "1536 MB" or "8GiB". Binary units, as memory sizes are reported.
+    An lshw address range ("fc000000-fcffffff") is a PCI aperture, not a size, and gives None.
+    Returns:
+        int: Bytes, or None when the value is missing or unrecognized.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().upper()
+    match = _SIZE.match(text)
+    if not match:
+        return None
+    return int(float(match.group(1)) * BYTE_UNITS[match.group(2)])
+
+
+def parse_int(value):
+    """
+    Integer from an int, "1920", "60.00" or "59.95 Hz" (rounded); None if there is no number.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(round(value))
+    match = _NUMBER.search(str(value))
+    return int(round(float(match.group(0)))) if match else None
+
+
+def memory_type_code(value):
+    """
+    SMBIOS memory type code from a name ("DDR4", "LPDDR4X") or an SMBIOS code.
+    Windows MemoryType (WMI) codes must go through wmi_memory_type() first; they overlap.
+    """
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    text = str(value).strip()
+    if not text:
+        return None
+    if text.isdigit():
+        return int(text)
+    name = text.upper()
+    if name in MEMORY_TYPE_CODES:
+        return MEMORY_TYPE_CODES[name]
+    name = re.sub(r"\s*SDRAM$", "", name)
+    return MEMORY_TYPE_CODES.get(name, MEMORY_TYPE_UNKNOWN)
+
+
+def wmi_memory_type(smbios_value, wmi_value):
+    """
+    Windows: prefer SMBIOSMemoryType (already an SMBIOS code), else translate MemoryType.
+    """
+    code = parse_int(smbios_value)
+    if code:
+        return code
+    code = parse_int(wmi_value)
+    return WMI_MEMORY_TYPES.get(code, MEMORY_TYPE_UNKNOWN) if code is not None else None
+
+
+def memory_type_name(code):
+    code = parse_int(code)
+    return SMBIOS_MEMORY_TYPES.get(code, "Unknown") if code is not None else None
+
+
+NORMALIZERS = {
+    "hardware": {
+        "memory_slots_used": parse_bytes,
+        "battery_voltage": parse_int,
+        "battery_cycle_count": parse_int,
+    },
+    "drives": {"size": parse_bytes},
+    "graphics": {
+        "adapter_ram": parse_bytes,
+        "current_horizontal_resolution": parse_int,
+        "current_vertical_resolution": parse_int,
+        "current_refresh_rate": parse_int,
+    },
+    "memory": {
+        "capacity": parse_bytes,
+        "type": memory_type_code,
+        "speed": parse_int,
+        "configured_speed": parse_int,
+        "ce_count": parse_int,
+        "ue_count": parse_int,
+    },
+    "network": {"speed": parse_int},
+}
+
+
+def normalize_record(name, record):
+    """
+    Convert a record's numeric columns to canonical units in place.
+    Args:
+        name (str): Schema name (e.g. "graphics").
+        record (Record): Record of that schema.
+    """
+    for column, convert in NORMALIZERS.get(name, {}).items():
+        setattr(record, column, convert(getattr(record, column)))
+    return record
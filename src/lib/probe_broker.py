@@ -0,0 +1,174 @@
+"""
+probe_broker.py
+
+Privileged probe broker: a small root-owned service that runs a fixed allowlist of
+probes (dmidecode, lshw) and answers the unprivileged agent over a local UNIX socket,
+so collection never goes through sudo. Results are cached for a TTL and the cache is
+warmed at startup, so an answer is a dictionary lookup and one send.
+
+Protocol: the client sends one JSON line {"args": [...]} and reads one JSON line back,
+{"ok": true, "stdout": "..."} or {"ok": false, "error": "..."}. Anything not on the
+allowlist is refused; the broker never runs a command line it did not define itself.
+
+Run the service with `python -m src.broker`; the agent finds it through
+ITAM_BROKER_SOCKET (default /run/itamcloud/probe-broker.sock).
+"""
+
+import json
+import os
+import shutil
+import socket
+import socketserver
+import subprocess
+import threading
+import time
+
+DEFAULT_SOCKET = "/run/itamcloud/probe-broker.sock"
+DEFAULT_TTL = 3600
+# The only command lines the broker will run, exactly as run_probe() passes them.
+ALLOWED_PROBES = (
+    ("dmidecode", "--type", "memory"),
+    ("lshw", "-C", "display"),
+)
+MAX_REQUEST = 4096
+
+
+def socket_path():
+    return os.environ.get("ITAM_BROKER_SOCKET", DEFAULT_SOCKET)
+
+
+def is_brokered(args):
+    return tuple(args) in ALLOWED_PROBES
+
+
+def request(args, path=None, timeout=5):
+    """
+    Ask the broker for a probe's output.
+    Args:
+        args (list): Command line, which must be on ALLOWED_PROBES.
+        path (str): Socket path (default: socket_path()).
+        timeout (float): Seconds to wait for the answer.
+    Returns:
+        dict: The broker's reply, or None if no broker is listening.
+    """
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(json.dumps({"args": list(args)}).encode() + b"\n")
+            with sock.makefile("rb") as reply:
+                line = reply.readline()
+    except OSError as e:
+        print(f"[WARN] Probe broker at {path} did not answer: {e}")
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        print(f"[WARN] Probe broker at {path} sent an invalid reply")
+        return None
+
+
+class ProbeBroker:
+    """
+    Runs and caches the allowlisted probes; one lock per probe so concurrent clients
+    asking for the same probe share a single run.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, timeout=60):
+        self.ttl = ttl
+        self.timeout = timeout
+        # Resolved once at startup, so PATH cannot be used to swap the binaries later.
+        self.commands = {}
+        for probe in ALLOWED_PROBES:
+            tool = shutil.which(probe[0])
+            if tool:
+                self.commands[probe] = [tool] + list(probe[1:])
+            else:
+                print(f"[WARN] {probe[0]} is not installed; the broker will refuse {' '.join(probe)}")
+        self.cache = {}  # probe -> (expires, encoded reply)
+        self.locks = {probe: threading.Lock() for probe in ALLOWED_PROBES}
+
+    def run(self, probe):
+        try:
+            result = subprocess.run(self.commands[probe], capture_output=True, text=True,
+                                    timeout=self.timeout, errors="replace")
+        except (OSError, subprocess.TimeoutExpired) as e:
+            return {"ok": False, "error": str(e)}
+        if result.returncode != 0:
+            return {"ok": False, "error": result.stderr.strip() or f"exit status {result.returncode}"}
+        return {"ok": True, "stdout": result.stdout}
+
+    def answer(self, args):
+        """
+        Encoded reply line for one request; successful results are served from the cache.
+        """
+        valid = isinstance(args, list) and all(isinstance(arg, str) for arg in args)
+        probe = tuple(args) if valid else None
+        if probe not in self.commands:
+            return encode({"ok": False, "error": "probe not allowed"})
+        cached = self.cache.get(probe)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        with self.locks[probe]:
+            cached = self.cache.get(probe)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+            reply = self.run(probe)
+            line = encode(reply)
+            if reply["ok"]:
+                self.cache[probe] = (time.monotonic() + self.ttl, line)
+            return line
+
+    def warm(self):
+        for probe in self.commands:
+            started = time.perf_counter()
+            ok = json.loads(self.answer(list(probe)))["ok"]
+            print(f"{'✅' if ok else '❌'} {' '.join(probe)} ({time.perf_counter() - started:.2f}s)")
+
+    def serve(self, path, group=None, mode=0o660):
+        """
+        Listen on `path` until interrupted. The socket is created with `mode` and, if given,
+        handed to `group`, which is how unprivileged agents are granted access.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, mode=0o755, exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(path)
+        broker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline(MAX_REQUEST)
+                try:
+                    args = json.loads(line).get("args")
+                except (ValueError, AttributeError):
+                    args = None
+                self.wfile.write(broker.answer(args))
+
+        # Bind owner-only, then open up to `mode`, so the socket is never briefly world-writable.
+        umask = os.umask(0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(path, Handler)
+        finally:
+            os.umask(umask)
+        server.daemon_threads = True
+        try:
+            os.chmod(path, mode)
+            if group:
+                import grp  # POSIX only; the agent side of this module also loads on Windows
+                os.chown(path, -1, grp.getgrnam(group).gr_gid)
+            threading.Thread(target=self.warm, daemon=True).start()
+            print(f"🚀 Probe broker listening on {path}")
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def encode(reply):
+    return json.dumps(reply).encode() + b"\n"
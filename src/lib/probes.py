@@ -0,0 +1,138 @@
+"""
+probes.py
+
+Single entry point for spawning external probe tools. Every call goes through the
+capability cache: tools that are not installed are never spawned, root-only probes are
+answered by the probe broker when one is running (see probe_broker.py), sudo is only used
+non-interactively and only where it is known to work, and repeatedly failing probes
+are circuit-broken. In governed mode probes also wait for a free slot and for load headroom.
+
+For soak tests and offline runs, probes can be served from a fixture directory (one
+file per command line, see fixture_name()) or recorded into one.
+"""
+
+import os
+import re
+import subprocess
+
+from src.lib import probe_broker
+from src.lib.capabilities import get_capabilities
+from src.lib.governor import get_governor
+
+
+_reported = set()
+# Exit statuses and stderr that mean the tool itself cannot run here (not found, not
+# executable, no privileges), as opposed to it failing for one particular device.
+BROKEN_EXIT_STATUSES = (126, 127)
+BROKEN_STDERR = re.compile(r"permission denied|password is required|not permitted|not allowed", re.IGNORECASE)
+# (directory, record) set by configure_fixtures(); None for live probes.
+_fixtures = None
+
+
+def _report_once(key, message):
+    if key not in _reported:
+        _reported.add(key)
+        print(message)
+
+
+def configure_fixtures(directory=None, record=False):
+    """
+    Serve probes from `directory` (record=False) or save live probe output into it (record=True).
+    """
+    global _fixtures
+    _fixtures = (directory, record) if directory else None
+    if directory and record:
+        os.makedirs(directory, exist_ok=True)
+
+
+def fixture_name(args):
+    """
+    File name for one command line, e.g. ["dmidecode", "--type", "memory"] -> "dmidecode_--type_memory.txt".
+    """
+    return re.sub(r"[^A-Za-z0-9.=-]+", "_", " ".join(args)) + ".txt"
+
+
+def _replay_fixture(args, timeout):
+    """
+    Output of a recorded probe. It is still read through a child process (cat), so soak
+    runs exercise the same spawn-and-reap path as live probes.
+    """
+    path = os.path.join(_fixtures[0], fixture_name(args))
+    if not os.path.exists(path):
+        _report_once(f"fixture {path}", f"[WARN] No fixture for {' '.join(args)}; skipping it")
+        return None
+    try:
+        result = subprocess.run(["cat", path], capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"[WARN] Fixture {path} failed: {e}")
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def run_probe(args, sudo=False, timeout=30, check=True, errors=None):
+    """
+    Run a probe command (argument list, no shell) and return its output.
+    Args:
+        args (list): Command and arguments, e.g. ["lshw", "-C", "display"].
+        sudo (bool): The probe needs root; ask the probe broker, else run it via `sudo -n`,
+            unless already privileged.
+        timeout (float): Seconds before the probe is killed and counted as failed.
+        check (bool): Treat a non-zero exit status as a failure.
+        errors (str): Decoding error handler passed to subprocess.
+    Returns:
+        str: Standard output, or None if the probe is unavailable, circuit-broken or failed.
+    """
+    if _fixtures and not _fixtures[1]:
+        return _replay_fixture(args, timeout)
+    capabilities = get_capabilities()
+    command = list(args)
+    tool = args[0]
+    key = f"sudo {tool}" if sudo else tool
+    # The breaker tracks each command line, so one failing device does not disable the tool.
+    probe = " ".join(["sudo"] + command if sudo else command)
+    if sudo and not capabilities.privileged and probe_broker.is_brokered(command):
+        # A root-owned broker answers from its cache, with no sudo in the collection path
+        # (and the tool need not be on this user's PATH, e.g. dmidecode in /usr/sbin).
+        reply = probe_broker.request(command, timeout=timeout)
+        if reply is not None:
+            if not reply.get("ok"):
+                _report_once(f"broker {tool}", f"[WARN] Probe broker could not run {tool}: {reply.get('error')}")
+                return None
+            return _recorded(command, reply.get("stdout", ""))
+    if not capabilities.has_tool(tool):
+        _report_once(key, f"[WARN] {tool} is not installed; skipping it")
+        return None
+    if sudo and not capabilities.privileged:
+        if not capabilities.can_sudo:
+            _report_once(key, f"[WARN] {tool} needs root and passwordless sudo is not available; skipping it")
+            return None
+        args = ["sudo", "-n"] + list(args)
+    if not capabilities.probe_allowed(probe):
+        return None
+    governor = get_governor()
+    try:
+        if governor:
+            with governor.probe_slot():
+                result = subprocess.run(args, capture_output=True, text=True, timeout=timeout, errors=errors)
+        else:
+            result = subprocess.run(args, capture_output=True, text=True, timeout=timeout, errors=errors)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"[WARN] {tool} failed: {e}")
+        capabilities.record_failure(probe)
+        return None
+    if check and result.returncode != 0:
+        if result.returncode in BROKEN_EXIT_STATUSES or BROKEN_STDERR.search(result.stderr or ""):
+            capabilities.record_failure(probe)
+        return None
+    capabilities.record_success(probe)
+    return _recorded(command, result.stdout)
+
+
+def _recorded(command, output):
+    """
+    Save a live probe's output as a fixture when recording; returns the output unchanged.
+    """
+    if _fixtures:
+        with open(os.path.join(_fixtures[0], fixture_name(command)), "w") as f:
+            f.write(output)
+    return output
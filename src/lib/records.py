@@ -0,0 +1,98 @@
+"""
+records.py
+
+Typed row classes for every table the collectors write to.
+Each class uses __slots__ so a record costs a fixed handful of pointers instead of a dict,
+which matters once thousands of rows flow through bulk or gateway paths.
+"""
+
+
+class Record:
+    """
+    Base class for a single database row.
+    Subclasses declare FIELDS (the column order) and reuse it as __slots__.
+    """
+    __slots__ = ()
+    FIELDS = ()
+
+    def __init__(self, **values):
+        for name in self.FIELDS:
+            setattr(self, name, values.pop(name, None))
+        if values:
+            raise TypeError(f"{type(self).__name__} got unexpected fields: {', '.join(values)}")
+
+    @classmethod
+    def from_dict(cls, data, **extra):
+        """
+        Build a record from a collector dict, ignoring keys that are not columns.
+        Args:
+            data (dict): Collected values.
+            **extra: Values that override or complete `data` (e.g. asset_id).
+        Returns:
+            Record: The populated record.
+        """
+        values = {name: data.get(name) for name in cls.FIELDS}
+        values.update(extra)
+        return cls(**values)
+
+    def as_tuple(self):
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_tuple() == other.as_tuple()
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"{type(self).__name__}({values})"
+
+
+class HardwareRecord(Record):
+    FIELDS = (
+        "asset_id", "company_id", "serial_number", "make", "model", "version", "motherboard_serial_no",
+        "cpu_id", "cpu_type", "bios", "tpm_manufacturer", "tpm_version", "tpm_activation_status",
+        "tpm_ownership_status", "battery_vendor", "battery_model", "battery_serial_number",
+        "battery_voltage", "battery_cycle_count", "memory_slots_used",
+    )
+    __slots__ = FIELDS
+
+
+class DriveRecord(Record):
+    FIELDS = (
+        "asset_id", "device_id", "model", "serial_number", "drive_type", "interface_type", "size", "partitions",
+    )
+    __slots__ = FIELDS
+
+
+class GraphicsCardRecord(Record):
+    FIELDS = (
+        "asset_id", "name", "adapter_compatibility", "driver_version", "video_processor",
+        "current_horizontal_resolution", "current_vertical_resolution", "current_refresh_rate",
+        "adapter_ram", "availability", "status", "bus_info",
+    )
+    __slots__ = FIELDS
+
+
+class MemoryRecord(Record):
+    FIELDS = (
+        "asset_id", "slot_number", "manufacturer", "capacity", "type", "speed", "configured_speed",
+        "form_factor", "part_number", "serial_number", "location", "ce_count", "ue_count",
+    )
+    __slots__ = FIELDS
+
+
+class UtilizationRollupRecord(Record):
+    FIELDS = (
+        "asset_id", "metric", "period_start", "period_end", "samples", "min_value", "avg_value", "max_value",
+    )
+    __slots__ = FIELDS
+
+
+class NetworkAdapterRecord(Record):
+    FIELDS = (
+        "asset_id", "adapter_name", "manufacturer", "mac_address", "interface_type", "ip_address",
+        "subnet_mask", "default_gateway", "dhcp_enabled", "speed", "status",
+    )
+    __slots__ = FIELDS
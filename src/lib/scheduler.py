@@ -0,0 +1,190 @@
+"""
+scheduler.py
+
+Spreads scheduled runs across a window so a site whose cron fires at the same minute
+does not hit the database all at once. Each asset waits a stable, hash-derived offset
+into the window plus a little jitter. The server can ask agents to back off through
+`agent_schedule_hints` (retry-after and slow-down factor); hints and local failure
+backoff are persisted next to the boot cache and honored on the next attempt.
+"""
+
+import hashlib
+import json
+import os
+import random
+import time
+
+import mysql.connector
+
+from src.lib.boot_cache import default_cache_dir
+
+
+STATE_FILE = "schedule_state.json"
+# ER_CON_COUNT_ERROR, ER_TOO_MANY_USER_CONNECTIONS, ER_USER_LIMIT_REACHED, ER_LOCK_WAIT_TIMEOUT
+OVERLOAD_ERRNOS = (1040, 1203, 1226, 1205)
+BACKOFF_BASE = 60
+MAX_BACKOFF = 6 * 3600
+
+
+def stable_offset(key, window):
+    """
+    Deterministic offset in [0, window) for `key`, evenly spread across keys.
+    """
+    digest = hashlib.sha256(str(key).encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64 * window
+
+
+class Scheduler:
+    """
+    Plans when this asset's run should start.
+    Args:
+        key (str): Stable per-asset key (the serial number).
+        window (float): Seconds across which a site's runs are spread.
+        jitter (float): Extra random spread around the stable offset (default 5% of window).
+        max_wait (float): Longest delay worth sleeping; beyond it the run is skipped so the
+            next scheduled invocation picks up instead (defaults to the window).
+        state_dir (str): Where hints are persisted (defaults to the boot cache directory).
+    """
+
+    def __init__(self, key, window, jitter=None, max_wait=None, state_dir=None, rng=None):
+        self.key = key
+        self.window = max(0.0, float(window))
+        self.jitter = self.window * 0.05 if jitter is None else jitter
+        self.max_wait = self.window if max_wait is None else max_wait
+        self.path = os.path.join(state_dir or default_cache_dir(), STATE_FILE)
+        self.rng = rng or random.Random()
+        self.state = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable schedule state {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[WARN] Could not write schedule state {self.path}: {e}")
+
+    def slow_down(self, now=None):
+        now = time.time() if now is None else now
+        if self.state.get("slow_down_until", 0) > now:
+            return max(1.0, self.state.get("slow_down", 1.0))
+        return 1.0
+
+    def plan(self, now=None):
+        """
+        Returns:
+            float: Seconds to wait before running, or None to skip this run entirely.
+        """
+        now = time.time() if now is None else now
+        window = self.window * self.slow_down(now)
+        delay = stable_offset(self.key, window)
+        if self.jitter:
+            delay = min(max(0.0, delay + self.rng.uniform(-self.jitter, self.jitter)), window)
+        not_before = self.state.get("not_before", 0)
+        if not_before > now + delay:
+            # Everyone told to retry at the same moment would return together; re-spread them.
+            delay = not_before - now + self.rng.uniform(0, min(window, 60) or 1)
+        if delay > max(self.max_wait, window):
+            return None
+        return delay
+
+    def wait(self):
+        """
+        Sleep until this asset's slot. Returns False if the run should be skipped.
+        """
+        delay = self.plan()
+        if delay is None:
+            print(f"⏭️ Skipping this run; server asked to retry after {time.ctime(self.state.get('not_before', 0))}")
+            return False
+        if delay >= 1:
+            print(f"⏳ Waiting {delay:.0f}s for this asset's slot in the {self.window:.0f}s window")
+            time.sleep(delay)
+        return True
+
+    def deferred(self, now=None):
+        now = time.time() if now is None else now
+        return self.state.get("not_before", 0) > now
+
+    def apply_hint(self, retry_after=None, slow_down=None, expires_at=None, hint_id=None, now=None):
+        """
+        Record a server-issued hint. A hint stays in the table until it expires, so the same
+        one comes back on every run; it is applied only the first time, identified by `hint_id`.
+        Args:
+            retry_after (float): Do not run again for this many seconds.
+            slow_down (float): Stretch the window by this factor until expires_at.
+            expires_at (float): Epoch seconds the slow-down applies until (default: one hour).
+            hint_id (int): The hint's id in agent_schedule_hints.
+        Returns:
+            bool: False if this hint was already applied.
+        """
+        if hint_id is not None and self.state.get("last_hint_id") == hint_id:
+            return False
+        now = time.time() if now is None else now
+        if hint_id is not None:
+            self.state["last_hint_id"] = hint_id
+        if retry_after:
+            self.state["not_before"] = now + min(float(retry_after), MAX_BACKOFF)
+        if slow_down and slow_down > 1:
+            self.state["slow_down"] = float(slow_down)
+            self.state["slow_down_until"] = expires_at or now + 3600
+        self._save()
+        return True
+
+    def record_error(self, err, now=None):
+        """
+        Back off exponentially (with full jitter) after the server reported overload.
+        """
+        if getattr(err, "errno", None) not in OVERLOAD_ERRNOS:
+            return
+        now = time.time() if now is None else now
+        failures = self.state.get("failures", 0) + 1
+        self.state["failures"] = failures
+        self.state["not_before"] = now + self.rng.uniform(0, min(MAX_BACKOFF, BACKOFF_BASE * 2 ** failures))
+        print(f"[WARN] Server overloaded ({err.errno}); backing off before the next attempt")
+        self._save()
+
+    def record_success(self):
+        if self.state.get("failures") or self.state.get("not_before"):
+            self.state.pop("failures", None)
+            self.state.pop("not_before", None)
+            self._save()
+
+
+def fetch_server_hint(connection, asset_id, company_id):
+    """
+    Most specific unexpired hint for this asset (asset, then company, then fleet-wide).
+    Returns:
+        tuple: (id, retry_after_seconds, slow_down_factor, expires_at epoch) or None.
+    """
+    cursor = connection.cursor(buffered=True)
+    try:
+        cursor.execute(
+            "SELECT id, retry_after_seconds, slow_down_factor, UNIX_TIMESTAMP(expires_at) "
+            "FROM agent_schedule_hints "
+            "WHERE (asset_id = %s OR asset_id IS NULL) AND (company_id = %s OR company_id IS NULL) "
+            "AND (expires_at IS NULL OR expires_at > NOW()) "
+            "ORDER BY asset_id IS NULL, company_id IS NULL, id DESC LIMIT 1",
+            (asset_id, company_id),
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        hint_id, values = row[0], row[1:]
+        return (int(hint_id),) + tuple(None if value is None else float(value) for value in values)
+    except mysql.connector.Error as err:
+        # Older schemas have no hints table; scheduling still works without it.
+        print(f"[WARN] Could not read schedule hints: {err}")
+        return None
+    finally:
+        cursor.close()
@@ -0,0 +1,171 @@
+"""
+schema.py
+
+Central registry describing every table the collectors write to.
+Column lists, INSERT/upsert SQL and parameter tuples are all generated from the record classes,
+so collectors never carry hand-written SQL of their own.
+"""
+
+import operator
+
+from src.lib.normalize import normalize_record
+from src.lib.records import (
+    HardwareRecord,
+    DriveRecord,
+    GraphicsCardRecord,
+    MemoryRecord,
+    NetworkAdapterRecord,
+    UtilizationRollupRecord,
+)
+
+
+class TableSchema:
+    """
+    Describes one table: its record class, the key used for upserts and any
+    columns that are stamped with NOW() by the database.
+    """
+    __slots__ = ("name", "table", "record_type", "key_columns", "touch_columns", "mode", "_getter", "_key_index")
+
+    def __init__(self, name, table, record_type, key_columns=("asset_id",), touch_columns=(), mode="sync"):
+        self.name = name
+        self.table = table
+        self.record_type = record_type
+        # How an asset's rows are written: "upsert", "sync" (replace-set) or "insert" (append).
+        self.mode = mode
+        self.key_columns = tuple(key_columns)
+        self.touch_columns = tuple(touch_columns)
+        self._getter = operator.attrgetter(*record_type.FIELDS)
+        self._key_index = tuple(record_type.FIELDS.index(c) for c in self.key_columns)
+
+    @property
+    def columns(self):
+        return self.record_type.FIELDS
+
+    @property
+    def update_columns(self):
+        return tuple(c for c in self.columns if c not in self.key_columns)
+
+    def column_list(self):
+        return ", ".join(self.columns + self.touch_columns)
+
+    def insert_sql(self):
+        placeholders = ", ".join(["%s"] * len(self.columns) + ["NOW()"] * len(self.touch_columns))
+        return f"INSERT INTO {self.table} ({self.column_list()}) VALUES ({placeholders})"
+
+    def upsert_sql(self):
+        assignments = [f"{c} = VALUES({c})" for c in self.update_columns]
+        assignments += [f"{c} = NOW()" for c in self.touch_columns]
+        return f"{self.insert_sql()} ON DUPLICATE KEY UPDATE {', '.join(assignments)}"
+
+    def select_sql(self):
+        """
+        SELECT every column of one asset's rows, locking them for a replace-set sync.
+        """
+        return f"SELECT {', '.join(self.columns)} FROM {self.table} WHERE asset_id = %s FOR UPDATE"
+
+    def update_sql(self):
+        assignments = [f"{c} = %s" for c in self.update_columns]
+        assignments += [f"{c} = NOW()" for c in self.touch_columns]
+        return f"UPDATE {self.table} SET {', '.join(assignments)} WHERE {self._key_predicate()}"
+
+    def delete_sql(self):
+        return f"DELETE FROM {self.table} WHERE {self._key_predicate()}"
+
+    def _key_predicate(self):
+        # NULL-safe comparison: serial numbers and bus ids are often missing.
+        return " AND ".join(f"{c} <=> %s" for c in self.key_columns)
+
+    def key_of(self, params):
+        """
+        Extract the natural key from a parameter tuple (or a fetched row in column order).
+        """
+        return tuple(params[i] for i in self._key_index)
+
+    def update_params(self, params):
+        """
+        Reorder a parameter tuple for update_sql(): non-key columns first, then the key.
+        """
+        key_index = self._key_index
+        values = tuple(v for i, v in enumerate(params) if i not in key_index)
+        return values + self.key_of(params)
+
+    def params(self, record):
+        """
+        Return the positional parameter tuple for one record, in column order.
+        """
+        return self._getter(record)
+
+    def params_many(self, records):
+        getter = self._getter
+        return [getter(record) for record in records]
+
+    def plan_sync(self, existing_rows, records, delete_missing=True):
+        """
+        Compute a replace-set sync of one asset's rows, independent of the storage backend.
+        Args:
+            existing_rows (list): The asset's stored rows in column order.
+            records (list): The complete current set of records for the asset.
+            delete_missing (bool): Delete rows whose key is absent from `records`.
+        Returns:
+            tuple: (inserts, updates in update_params order, delete keys, rows after the sync)
+        """
+        existing = {}
+        duplicated = set()
+        for row in existing_rows:
+            key = self.key_of(row)
+            if key in existing:
+                duplicated.add(key)
+            existing[key] = tuple(row)
+
+        incoming = {}
+        for params in self.params_many(records):
+            incoming[self.key_of(params)] = params
+
+        inserts = []
+        updates = []
+        deletes = []
+        for key, params in incoming.items():
+            if key in duplicated:
+                # Leftovers from plain-INSERT runs: drop every copy, keep one fresh row.
+                deletes.append(key)
+                inserts.append(params)
+            elif key not in existing:
+                inserts.append(params)
+            elif existing[key] != params:
+                updates.append(self.update_params(params))
+        if delete_missing:
+            deletes.extend(key for key in existing if key not in incoming)
+        current = incoming if delete_missing else {**existing, **incoming}
+        return inserts, updates, deletes, list(current.values())
+
+    def build(self, data, **extra):
+        """
+        Convert a collector dict into this table's record type, with numeric columns
+        normalized to canonical units (see normalize.py).
+        """
+        return normalize_record(self.name, self.record_type.from_dict(data, **extra))
+
+
+HARDWARE = TableSchema("hardware", "assets_hardware_info", HardwareRecord,
+                       touch_columns=("created_at",), mode="upsert")
+DRIVES = TableSchema("drives", "assets_drives_info", DriveRecord,
+                     key_columns=("asset_id", "device_id", "serial_number"))
+GRAPHICS = TableSchema("graphics", "assets_graphics_card_info", GraphicsCardRecord,
+                       key_columns=("asset_id", "name", "bus_info"))
+MEMORY = TableSchema("memory", "assets_memory_info", MemoryRecord,
+                     key_columns=("asset_id", "location"))
+NETWORK = TableSchema("network", "assets_network_adapter_info", NetworkAdapterRecord,
+                      key_columns=("asset_id", "adapter_name"))
+UTILIZATION = TableSchema("utilization", "assets_utilization_rollups", UtilizationRollupRecord,
+                          key_columns=("asset_id", "metric", "period_start"), mode="insert")
+
+SCHEMAS = {schema.name: schema for schema in (HARDWARE, DRIVES, GRAPHICS, MEMORY, NETWORK, UTILIZATION)}
+
+
+def get_schema(name):
+    """
+    Look up a table schema by its short name (e.g. "drives").
+    Raises:
+        KeyError: If no schema is registered under that name.
+    """
+    return SCHEMAS[name]
@@ -0,0 +1,192 @@
+"""
+shard_router.py
+
+Routes each company's inventory to one of several MySQL servers ("shards"), with a
+connection pool per shard. A company lives entirely on one shard, so per-company
+queries (uploads, the fleet summary, exports with --company) never span servers.
+
+Company -> shard comes from, in order:
+1. the "companies" map in the shard config file;
+2. the `company_shards` directory table on the directory shard (migration 6),
+   cached for DIRECTORY_TTL seconds;
+3. the "default" shard.
+
+Config file (JSON; path in ITAM_SHARDS or passed with --shards):
+
+    {
+      "pool_size": 5,
+      "default": "a",
+      "directory": "a",
+      "shards": {
+        "a": {"host": "127.0.0.1", "port": 3306},
+        "b": {"host": "127.0.0.1", "port": 3307}
+      },
+      "companies": {"12": "b"}
+    }
+
+Connection settings missing from a shard fall back to the base settings in db.py.
+Asset ids must be unique across shards (give each server its own
+auto_increment_offset with a shared auto_increment_increment), because child-table
+writes only carry an asset_id and are routed through the asset's company.
+"""
+
+import json
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import pooling
+
+
+DIRECTORY_TABLE = "company_shards"
+DIRECTORY_TTL = 300
+DEFAULT_POOL_SIZE = 5
+POOL_WAIT = 30
+
+
+class ShardRouter:
+    """
+    Args:
+        shards (dict): Shard name -> connection settings.
+        default (str): Shard for companies that are not mapped anywhere.
+        companies (dict): Static company_id -> shard name map.
+        directory (str): Shard holding the company_shards table, if any.
+        pool_size (int): Connections pooled per shard.
+        base (dict): Settings every shard inherits (host, user, password, database).
+    """
+
+    def __init__(self, shards, default=None, companies=None, directory=None, pool_size=DEFAULT_POOL_SIZE,
+                 base=None):
+        if not shards:
+            raise ValueError("shard config has no shards")
+        self.shards = {name: {**(base or {}), **settings} for name, settings in shards.items()}
+        self.default = default or sorted(self.shards)[0]
+        self.companies = {int(k): v for k, v in (companies or {}).items()}
+        self.directory = directory
+        self.pool_size = pool_size
+        for name in [self.default, self.directory, *self.companies.values()]:
+            if name is not None and name not in self.shards:
+                raise ValueError(f"shard config refers to unknown shard {name!r}")
+        self.lock = threading.Lock()
+        self.pools = {}
+        self.looked_up = {}
+        self.asset_companies = {}
+
+    # -- pools -----------------------------------------------------------------
+
+    def pool(self, shard):
+        with self.lock:
+            if shard not in self.pools:
+                self.pools[shard] = pooling.MySQLConnectionPool(
+                    pool_name=f"itam_{shard}", pool_size=self.pool_size, pool_reset_session=True,
+                    **self.shards[shard]
+                )
+            return self.pools[shard]
+
+    def connect(self, shard):
+        """
+        A pooled connection to `shard`; close() hands it back to the pool.
+        mysql.connector pools fail immediately when exhausted, so wait up to POOL_WAIT seconds.
+        """
+        pool = self.pool(shard)
+        deadline = time.monotonic() + POOL_WAIT
+        while True:
+            try:
+                return pool.get_connection()
+            except mysql.connector.errors.PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.01)
+
+    # -- routing ---------------------------------------------------------------
+
+    def _directory_lookup(self, company_id):
+        cached = self.looked_up.get(company_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        shard = None
+        connection = None
+        try:
+            connection = self.connect(self.directory)
+            cursor = connection.cursor()
+            cursor.execute(f"SELECT shard FROM {DIRECTORY_TABLE} WHERE company_id = %s", (company_id,))
+            row = cursor.fetchone()
+            cursor.close()
+            if row and row[0] in self.shards:
+                shard = row[0]
+            elif row:
+                print(f"[WARN] {DIRECTORY_TABLE} maps company {company_id} to unknown shard {row[0]!r}")
+        except mysql.connector.Error as err:
+            print(f"[WARN] Shard directory lookup failed for company {company_id}: {err}")
+            return None  # not cached, so the next call retries
+        finally:
+            if connection:
+                connection.close()
+        self.looked_up[company_id] = (shard, time.monotonic() + DIRECTORY_TTL)
+        return shard
+
+    def shard_for(self, company_id):
+        if company_id is None:
+            return self.default
+        company_id = int(company_id)
+        if company_id in self.companies:
+            return self.companies[company_id]
+        if self.directory:
+            shard = self._directory_lookup(company_id)
+            if shard:
+                return shard
+        return self.default
+
+    def bind_asset(self, asset_id, company_id):
+        """
+        Remember an asset's company so writes that only carry asset_id are routed with it.
+        """
+        if asset_id is not None and company_id is not None:
+            self.asset_companies[asset_id] = company_id
+
+    def company_of_asset(self, asset_id):
+        return self.asset_companies.get(asset_id)
+
+    def connection_for(self, company_id=None):
+        return self.connect(self.shard_for(company_id))
+
+    def find_serial(self, serial):
+        """
+        Look a serial up on every shard (the agent does not know its company yet).
+        Returns:
+            tuple: (open connection to the asset's shard, asset_id, company_id) or None.
+        """
+        for shard in sorted(self.shards):
+            connection = self.connect(shard)
+            try:
+                cursor = connection.cursor(buffered=True)
+                cursor.execute("SELECT id, company_id FROM assets WHERE serial = %s", (serial,))
+                row = cursor.fetchone()
+                cursor.close()
+            except mysql.connector.Error:
+                connection.close()
+                raise
+            if row:
+                if self.shard_for(row[1]) != shard:
+                    print(f"[WARN] Asset {serial} found on shard {shard} but company {row[1]} routes to "
+                          f"{self.shard_for(row[1])}")
+                self.bind_asset(row[0], row[1])
+                return connection, row[0], row[1]
+            connection.close()
+        return None
+
+
+def load_config(path, base=None):
+    """
+    Build a ShardRouter from a JSON config file (see the module docstring).
+    """
+    with open(path, "r") as f:
+        config = json.load(f)
+    return ShardRouter(
+        config.get("shards", {}),
+        default=config.get("default"),
+        companies=config.get("companies"),
+        directory=config.get("directory"),
+        pool_size=int(config.get("pool_size", DEFAULT_POOL_SIZE)),
+        base=base,
+    )
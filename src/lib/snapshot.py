@@ -0,0 +1,73 @@
+"""
+snapshot.py
+
+A snapshot is the complete inventory of one asset at one point in time:
+the records of every collector that ran, keyed by schema name, plus identifying metadata.
+It is the exchange format between batch collection, local history and the bulk loader.
+"""
+
+import datetime
+import json
+import os
+
+from src.lib.schema import get_schema
+
+
+SNAPSHOT_VERSION = 1
+
+
+def make_snapshot(records_by_collector, asset_id=None, company_id=None, **meta):
+    """
+    Build a JSON-serialisable snapshot.
+    Args:
+        records_by_collector (dict): Schema name -> list of records.
+        asset_id (int): Asset identifier, if known.
+        company_id (int): Company identifier, if known.
+        **meta: Extra metadata such as root, hostname or unique_id.
+    Returns:
+        dict: The snapshot.
+    """
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "collected_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "asset_id": asset_id,
+        "company_id": company_id,
+        "collectors": {
+            name: [record.as_dict() for record in records]
+            for name, records in records_by_collector.items()
+        },
+    }
+    snapshot.update(meta)
+    return snapshot
+
+
+def records_from_snapshot(snapshot, asset_id=None, company_id=None):
+    """
+    Rebuild typed records from a snapshot, optionally re-targeting them at another asset.
+    Returns:
+        dict: Schema name -> list of records.
+    """
+    asset_id = asset_id if asset_id is not None else snapshot.get("asset_id")
+    company_id = company_id if company_id is not None else snapshot.get("company_id")
+    result = {}
+    for name, rows in snapshot.get("collectors", {}).items():
+        schema = get_schema(name)
+        extra = {"asset_id": asset_id}
+        if "company_id" in schema.columns:
+            extra["company_id"] = company_id
+        result[name] = [schema.build(row, **extra) for row in rows]
+    return result
+
+
+def write_snapshot(snapshot, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f, default=str)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_snapshot(path):
+    with open(path, "r") as f:
+        return json.load(f)
@@ -0,0 +1,295 @@
+"""
+snapshot_history.py
+
+Local append-only history of this asset's inventory, so "when did this DIMM or disk
+change" can be answered on the endpoint itself.
+
+Two files live in the history directory:
+- history.dat: content-addressed section blobs. Each blob is a 20-byte header
+  (16-byte BLAKE2b digest, 4-byte length) followed by zlib-compressed canonical JSON of
+  one collector's rows. A section that has been seen before (even long ago) is never
+  stored twice.
+- history.idx: fixed-width entries, one per run that changed anything: a float timestamp
+  followed by (offset, length) of every section's blob. Sections a run did not collect
+  carry the previous entry's pointer forward, so every entry is a complete state.
+
+Both are read through mmap; "as of T" is a bisect over the index and a diff compares
+blob pointers before decompressing anything. Unchanged runs cost nothing, which keeps
+a year of hourly runs to a few hundred KB of index plus the distinct states.
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+
+from src.lib.boot_cache import default_cache_dir
+from src.lib.schema import get_schema
+
+
+SECTIONS = ("hardware", "drives", "graphics", "memory", "network")
+BLOB_HEADER = struct.Struct("<16sI")
+INDEX_ENTRY = struct.Struct("<d" + "QI" * len(SECTIONS))
+MISSING = (2 ** 64 - 1, 0)
+DATA_FILE = "history.dat"
+INDEX_FILE = "history.idx"
+
+
+def default_history_dir():
+    return os.path.join(default_cache_dir(), "history")
+
+
+def canonical(rows):
+    """
+    Stable serialization of one section: row order from the probes does not matter.
+    """
+    encoded = sorted(json.dumps(row, sort_keys=True, separators=(",", ":"), default=str) for row in rows)
+    return ("[" + ",".join(encoded) + "]").encode()
+
+
+class _Timestamps:
+    """
+    Sequence view of the index timestamps for bisect, without materializing them.
+    """
+
+    def __init__(self, index, count):
+        self.index = index
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return struct.unpack_from("<d", self.index, i * INDEX_ENTRY.size)[0]
+
+
+class SnapshotHistory:
+    """
+    Append-only, deduplicated, mmap-read history store.
+    Args:
+        directory (str): Where history.dat and history.idx live.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.data_path = os.path.join(directory, DATA_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+
+    # -- writing ---------------------------------------------------------------
+
+    def _blob_offsets(self):
+        """
+        digest -> (offset, length) for every stored blob, found by hopping over headers.
+        """
+        blobs = {}
+        position = 0
+        data = self._map(self.data_path)
+        if data is None:
+            return blobs, position
+        try:
+            while position + BLOB_HEADER.size <= len(data):
+                digest, length = BLOB_HEADER.unpack_from(data, position)
+                if position + BLOB_HEADER.size + length > len(data):
+                    break  # torn write at the tail
+                blobs[digest] = (position + BLOB_HEADER.size, length)
+                position += BLOB_HEADER.size + length
+        finally:
+            data.close()
+        return blobs, position
+
+    def append(self, sections, timestamp=None):
+        """
+        Record the sections collected by one run.
+        Args:
+            sections (dict): Section name -> list of row dicts (or records with as_dict()).
+            timestamp (float): Epoch seconds (defaults to now).
+        Returns:
+            bool: True if the state changed and an index entry was written.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        for path in (self.data_path, self.index_path):
+            if not os.path.exists(path):
+                open(path, "wb").close()
+        timestamp = time.time() if timestamp is None else timestamp
+        count, last = self._last_entry()
+        previous = list(last[1]) if last else [MISSING] * len(SECTIONS)
+        if last:
+            # The index must stay sorted for bisect; a clock step backwards is clamped.
+            timestamp = max(timestamp, last[0])
+
+        blobs, data_end = self._blob_offsets()
+        pointers = list(previous)
+        with open(self.data_path, "r+b") as data:
+            data.truncate(data_end)
+            data.seek(data_end)
+            for i, name in enumerate(SECTIONS):
+                if name not in sections:
+                    continue
+                rows = [r.as_dict() if hasattr(r, "as_dict") else r for r in sections[name]]
+                payload = canonical(rows)
+                digest = hashlib.blake2b(payload, digest_size=16).digest()
+                if digest not in blobs:
+                    compressed = zlib.compress(payload, 9)
+                    offset = data.tell() + BLOB_HEADER.size
+                    data.write(BLOB_HEADER.pack(digest, len(compressed)))
+                    data.write(compressed)
+                    blobs[digest] = (offset, len(compressed))
+                pointers[i] = blobs[digest]
+            data.flush()
+            os.fsync(data.fileno())
+
+        if last and pointers == previous:
+            return False
+        with open(self.index_path, "r+b") as index:
+            index.truncate(count * INDEX_ENTRY.size)
+            index.seek(0, os.SEEK_END)
+            index.write(INDEX_ENTRY.pack(timestamp, *[v for pointer in pointers for v in pointer]))
+            index.flush()
+            os.fsync(index.fileno())
+        return True
+
+    # -- reading ---------------------------------------------------------------
+
+    def _map(self, path):
+        with open(path, "rb") as f:
+            if not os.fstat(f.fileno()).st_size:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _last_entry(self):
+        """
+        (number of complete entries, last entry or None); a torn trailing entry is ignored.
+        """
+        count = os.path.getsize(self.index_path) // INDEX_ENTRY.size
+        if not count:
+            return 0, None
+        with open(self.index_path, "rb") as f:
+            f.seek((count - 1) * INDEX_ENTRY.size)
+            return count, self._unpack(f.read(INDEX_ENTRY.size), 0)
+
+    def _entries(self):
+        """
+        All index entries as (timestamp, ((offset, length), ...)).
+        """
+        if not os.path.exists(self.index_path):
+            return []
+        index = self._map(self.index_path)
+        if index is None:
+            return []
+        try:
+            return [self._unpack(index, i) for i in range(len(index) // INDEX_ENTRY.size)]
+        finally:
+            index.close()
+
+    @staticmethod
+    def _unpack(index, i):
+        values = INDEX_ENTRY.unpack_from(index, i * INDEX_ENTRY.size)
+        pointers = tuple((values[1 + 2 * s], values[2 + 2 * s]) for s in range(len(SECTIONS)))
+        return values[0], pointers
+
+    def _open(self):
+        if not os.path.exists(self.index_path) or not os.path.exists(self.data_path):
+            return None, None
+        index = self._map(self.index_path)
+        if index is None:
+            return None, None
+        return index, self._map(self.data_path)
+
+    @staticmethod
+    def _load(data, pointer):
+        offset, length = pointer
+        if pointer == MISSING or data is None:
+            return None
+        return json.loads(zlib.decompress(data[offset:offset + length]))
+
+    def _locate(self, index, timestamp):
+        count = len(index) // INDEX_ENTRY.size
+        position = bisect.bisect_right(_Timestamps(index, count), timestamp) - 1
+        return None if position < 0 else self._unpack(index, position)
+
+    def as_of(self, timestamp, sections=SECTIONS):
+        """
+        Inventory state as of `timestamp`.
+        Returns:
+            tuple: (entry timestamp, {section: rows}) or None if history starts later.
+        """
+        index, data = self._open()
+        if index is None:
+            return None
+        try:
+            entry = self._locate(index, timestamp)
+            if entry is None:
+                return None
+            at, pointers = entry
+            return at, {
+                name: self._load(data, pointers[SECTIONS.index(name)]) for name in sections
+            }
+        finally:
+            index.close()
+            if data is not None:
+                data.close()
+
+    def diff(self, t1, t2, sections=SECTIONS):
+        """
+        Row-level differences between the states as of t1 and t2, keyed on each table's natural key.
+        Returns:
+            dict: Section -> {"added": [...], "removed": [...], "changed": [(old, new), ...]}
+                for sections that differ.
+        """
+        index, data = self._open()
+        if index is None:
+            return {}
+        try:
+            first = self._locate(index, t1)
+            second = self._locate(index, t2)
+            result = {}
+            for name in sections:
+                i = SECTIONS.index(name)
+                old_pointer = first[1][i] if first else MISSING
+                new_pointer = second[1][i] if second else MISSING
+                if old_pointer == new_pointer:
+                    continue  # identical blob; nothing to decompress
+                result[name] = diff_rows(
+                    name, self._load(data, old_pointer) or [], self._load(data, new_pointer) or []
+                )
+            return result
+        finally:
+            index.close()
+            if data is not None:
+                data.close()
+
+    def changes(self, section):
+        """
+        Timestamps at which `section` changed, oldest first.
+        """
+        i = SECTIONS.index(section)
+        times = []
+        last = None
+        for timestamp, pointers in self._entries():
+            if pointers[i] != last:
+                if pointers[i] != MISSING:
+                    times.append(timestamp)
+                last = pointers[i]
+        return times
+
+    def size(self):
+        return sum(os.path.getsize(p) for p in (self.data_path, self.index_path) if os.path.exists(p))
+
+
+def diff_rows(section, old_rows, new_rows):
+    key_columns = [c for c in get_schema(section).key_columns if c != "asset_id"]
+
+    def key(row):
+        return tuple(row.get(c) for c in key_columns)
+
+    old = {key(row): row for row in old_rows}
+    new = {key(row): row for row in new_rows}
+    return {
+        "added": [new[k] for k in new if k not in old],
+        "removed": [old[k] for k in old if k not in new],
+        "changed": [(old[k], new[k]) for k in new if k in old and old[k] != new[k]],
+    }
@@ -0,0 +1,396 @@
+"""
+storage.py
+
+Where collected records go. Collectors and monitors write through the process-wide
+backend returned by get_backend():
+
+- mysql: the ITAMCloud database through db.py (the default).
+- sqlite: a local SQLite file with the same tables, for air-gapped sites, tests and
+  benchmarks that run the whole pipeline without a network.
+- jsonl: an append-only JSON Lines log of every write, to be shipped and replayed into
+  MySQL later with `python -m src.replay`.
+
+Every backend offers the write paths of db.py (write_records, sync_records, write_delta)
+with the same arguments and return values, plus find_asset() for the serial lookup.
+"""
+
+import datetime
+import json
+import os
+import sqlite3
+import threading
+
+import mysql.connector
+
+from src.lib import db
+from src.lib.boot_cache import default_cache_dir
+from src.lib.schema import SCHEMAS, get_schema
+
+
+BACKENDS = ("mysql", "sqlite", "jsonl")
+DEFAULT_FILES = {"sqlite": "inventory.sqlite", "jsonl": "inventory.jsonl"}
+
+
+class StorageBackend:
+    """
+    Base class; subclasses implement the write paths.
+    """
+    name = None
+
+    def find_asset(self, serial):
+        """
+        Returns:
+            tuple: (asset_id, company_id), or None if the serial is unknown.
+        """
+        raise NotImplementedError
+
+    def write_records(self, schema, records, upsert=False):
+        raise NotImplementedError
+
+    def sync_records(self, schema, asset_id, records, delete_missing=True):
+        raise NotImplementedError
+
+    def write_delta(self, schema, inserted=(), updated=(), deleted=()):
+        raise NotImplementedError
+
+    def upload_records(self, schema, asset_id, records):
+        """
+        Upload one asset's records using the write mode the schema declares (see db.upload_records).
+        """
+        if schema.mode == "sync":
+            return self.sync_records(schema, asset_id, records) is not None
+        return self.write_records(schema, records, upsert=schema.mode == "upsert")
+
+    def close(self):
+        pass
+
+
+class MySQLBackend(StorageBackend):
+    name = "mysql"
+
+    def find_asset(self, serial):
+        connection = None
+        try:
+            connection, asset = db.find_asset_connection(serial)
+            if asset:
+                db.bind_asset(*asset)
+            return asset
+        except mysql.connector.Error as err:
+            print(f"❌ MySQL error: {err}")
+        finally:
+            if connection and connection.is_connected():
+                connection.close()
+        return None
+
+    def write_records(self, schema, records, upsert=False):
+        return db.write_records(schema, records, upsert)
+
+    def sync_records(self, schema, asset_id, records, delete_missing=True):
+        return db.sync_records(schema, asset_id, records, delete_missing)
+
+    def write_delta(self, schema, inserted=(), updated=(), deleted=()):
+        return db.write_delta(schema, inserted, updated, deleted)
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Local SQLite copy of the inventory tables. Columns are untyped (SQLite stores what it
+    is given), writes are serialized by a lock so threaded monitors and the load generator
+    can share one connection, and the database runs in WAL mode.
+    Args:
+        path (str): Database file; created with its tables on first use.
+    """
+    name = "sqlite"
+
+    def __init__(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS assets ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, company_id, serial UNIQUE, "
+                "created_at DEFAULT CURRENT_TIMESTAMP)"
+            )
+            for schema in SCHEMAS.values():
+                columns = ", ".join(schema.columns + schema.touch_columns)
+                self.connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {schema.table} ({columns}, "
+                    f"updated_at DEFAULT CURRENT_TIMESTAMP)"
+                )
+                # Files created before a column was added get it here (SQLite has no IF NOT EXISTS for columns).
+                present = {row[1] for row in self.connection.execute(f"PRAGMA table_info({schema.table})")}
+                for column in schema.columns + schema.touch_columns:
+                    if column not in present:
+                        self.connection.execute(f"ALTER TABLE {schema.table} ADD COLUMN {column}")
+                # Sync tables may hold NULLs in their natural key, which SQLite's UNIQUE
+                # treats as distinct; the replace-set sync de-duplicates those itself.
+                unique = "UNIQUE " if schema.mode != "sync" else ""
+                self.connection.execute(
+                    f"CREATE {unique}INDEX IF NOT EXISTS idx_{schema.table}_key "
+                    f"ON {schema.table} ({', '.join(schema.key_columns)})"
+                )
+
+    def find_asset(self, serial, company_id=None):
+        """
+        Look up a serial, registering it locally (with a local id) the first time it is seen.
+        """
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT id, company_id FROM assets WHERE serial = ?", (serial,)
+            ).fetchone()
+            if row:
+                return row
+            cursor = self.connection.execute(
+                "INSERT INTO assets (company_id, serial) VALUES (?, ?)", (company_id, serial)
+            )
+            return cursor.lastrowid, company_id
+
+    @staticmethod
+    def _insert_sql(schema, upsert=False):
+        columns = schema.columns + schema.touch_columns
+        placeholders = ", ".join(["?"] * len(schema.columns) + ["CURRENT_TIMESTAMP"] * len(schema.touch_columns))
+        sql = f"INSERT INTO {schema.table} ({', '.join(columns)}) VALUES ({placeholders})"
+        if upsert:
+            assignments = [f"{c} = excluded.{c}" for c in schema.update_columns + schema.touch_columns]
+            assignments.append("updated_at = CURRENT_TIMESTAMP")
+            sql += f" ON CONFLICT ({', '.join(schema.key_columns)}) DO UPDATE SET {', '.join(assignments)}"
+        return sql
+
+    @staticmethod
+    def _key_predicate(schema):
+        return " AND ".join(f"{c} IS ?" for c in schema.key_columns)
+
+    def _apply(self, schema, inserts, updates, deletes):
+        if deletes:
+            self.connection.executemany(
+                f"DELETE FROM {schema.table} WHERE {self._key_predicate(schema)}", deletes
+            )
+        if updates:
+            assignments = [f"{c} = ?" for c in schema.update_columns]
+            assignments += [f"{c} = CURRENT_TIMESTAMP" for c in schema.touch_columns + ("updated_at",)]
+            self.connection.executemany(
+                f"UPDATE {schema.table} SET {', '.join(assignments)} WHERE {self._key_predicate(schema)}",
+                updates,
+            )
+        if inserts:
+            self.connection.executemany(self._insert_sql(schema), inserts)
+
+    def write_records(self, schema, records, upsert=False):
+        if not records:
+            print(f"❌ No records to insert into {schema.table}.")
+            return False
+        try:
+            with self.lock, self.connection:
+                self.connection.executemany(self._insert_sql(schema, upsert), schema.params_many(records))
+            if db.VERBOSE:
+                print(f"✅ Inserted {len(records)} records into {schema.table} ({self.path})")
+            return True
+        except sqlite3.Error as err:
+            print(f"❌ SQLite error: {err}")
+        return False
+
+    def sync_records(self, schema, asset_id, records, delete_missing=True):
+        try:
+            with self.lock, self.connection:
+                existing_rows = self.connection.execute(
+                    f"SELECT {', '.join(schema.columns)} FROM {schema.table} WHERE asset_id = ?", (asset_id,)
+                ).fetchall()
+                inserts, updates, deletes, _ = schema.plan_sync(existing_rows, records, delete_missing)
+                self._apply(schema, inserts, updates, deletes)
+            counts = {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
+            if db.VERBOSE:
+                print(f"✅ Synced {schema.table} for asset {asset_id}: {counts} ({self.path})")
+            return counts
+        except sqlite3.Error as err:
+            print(f"❌ SQLite error: {err}")
+        return None
+
+    def write_delta(self, schema, inserted=(), updated=(), deleted=()):
+        if not (inserted or updated or deleted):
+            return True
+        try:
+            with self.lock, self.connection:
+                self._apply(
+                    schema,
+                    schema.params_many(inserted),
+                    [schema.update_params(p) for p in schema.params_many(updated)],
+                    [schema.key_of(p) for p in schema.params_many(deleted)],
+                )
+            return True
+        except sqlite3.Error as err:
+            print(f"❌ SQLite error: {err}")
+        return False
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class JsonlBackend(StorageBackend):
+    """
+    Append-only log: one JSON object per write, flushed as it is written. Lines carry the
+    asset's serial so `src.replay` can resolve server-side asset ids later.
+    Args:
+        path (str): Log file; appended to across runs.
+    """
+    name = "jsonl"
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.serial = None
+        self.file = open(path, "a", encoding="utf-8")
+
+    def find_asset(self, serial):
+        # Ids are assigned by the server when the log is replayed.
+        self.serial = serial
+        return None, None
+
+    def _append(self, op, schema, **fields):
+        entry = {
+            "at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "serial": self.serial,
+            "op": op,
+            "schema": schema.name,
+        }
+        entry.update(fields)
+        line = json.dumps(entry, default=str) + "\n"
+        try:
+            with self.lock:
+                self.file.write(line)
+                self.file.flush()
+            return True
+        except OSError as e:
+            print(f"❌ Could not write {self.path}: {e}")
+        return False
+
+    @staticmethod
+    def _rows(records):
+        return [record.as_dict() for record in records]
+
+    def write_records(self, schema, records, upsert=False):
+        if not records:
+            print(f"❌ No records to insert into {schema.table}.")
+            return False
+        ok = self._append("upsert" if upsert else "insert", schema, records=self._rows(records))
+        if ok and db.VERBOSE:
+            print(f"✅ Logged {len(records)} {schema.name} records to {self.path}")
+        return ok
+
+    def sync_records(self, schema, asset_id, records, delete_missing=True):
+        if not self._append("sync", schema, asset_id=asset_id, records=self._rows(records),
+                            delete_missing=delete_missing):
+            return None
+        counts = {"logged": len(records)}
+        if db.VERBOSE:
+            print(f"✅ Logged {schema.name} for asset {asset_id}: {counts} ({self.path})")
+        return counts
+
+    def write_delta(self, schema, inserted=(), updated=(), deleted=()):
+        if not (inserted or updated or deleted):
+            return True
+        return self._append("delta", schema, inserted=self._rows(inserted), updated=self._rows(updated),
+                            deleted=self._rows(deleted))
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def default_path(name):
+    return os.path.join(default_cache_dir(), DEFAULT_FILES[name])
+
+
+def create_backend(name, path=None):
+    """
+    Args:
+        name (str): One of BACKENDS.
+        path (str): File for the sqlite/jsonl backends (defaults to the cache directory).
+    """
+    if name == "mysql":
+        return MySQLBackend()
+    if name == "sqlite":
+        return SQLiteBackend(path or default_path(name))
+    if name == "jsonl":
+        return JsonlBackend(path or default_path(name))
+    raise ValueError(f"Unknown storage backend: {name} (choose from {', '.join(BACKENDS)})")
+
+
+_backend = None
+
+
+def configure(name="mysql", path=None):
+    """
+    Select the process-wide backend used by collectors and monitors.
+    """
+    global _backend
+    if _backend is not None:
+        _backend.close()
+    _backend = create_backend(name, path)
+    return _backend
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = MySQLBackend()
+    return _backend
+
+
+def replay_log(path, backend):
+    """
+    Apply a JSON Lines log written by JsonlBackend to another backend, resolving each
+    serial to its asset once.
+    Returns:
+        tuple: (entries applied, entries skipped)
+    """
+    assets = {}
+    applied = skipped = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                print(f"[WARN] {path}:{number}: unreadable line skipped")
+                skipped += 1
+                continue
+            serial = entry.get("serial")
+            if serial not in assets:
+                assets[serial] = backend.find_asset(serial) if serial else None
+            asset = assets[serial]
+            if not asset:
+                print(f"[WARN] {path}:{number}: no asset for serial {serial!r}; skipped")
+                skipped += 1
+                continue
+            asset_id, company_id = asset
+            schema = get_schema(entry["schema"])
+            extra = {"asset_id": asset_id}
+            if "company_id" in schema.columns:
+                extra["company_id"] = company_id
+
+            def build(rows):
+                return [schema.build(row, **extra) for row in rows or ()]
+
+            op = entry["op"]
+            if op == "sync":
+                ok = backend.sync_records(schema, asset_id, build(entry["records"]),
+                                          entry.get("delete_missing", True)) is not None
+            elif op == "delta":
+                ok = backend.write_delta(schema, build(entry.get("inserted")), build(entry.get("updated")),
+                                         build(entry.get("deleted")))
+            else:
+                ok = backend.write_records(schema, build(entry["records"]), upsert=op == "upsert")
+            if ok:
+                applied += 1
+            else:
+                skipped += 1
+    return applied, skipped
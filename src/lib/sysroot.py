@@ -0,0 +1,50 @@
+"""
+sysroot.py
+
+Helpers for reading Linux system files under an alternate root prefix, e.g. a
+container rootfs, a chroot or a read-only mounted VM image. With no root (or "/")
+the paths resolve to the running system.
+"""
+
+import glob
+import os
+
+
+def rooted(path, root=None):
+    """
+    Resolve an absolute system path under `root`.
+    Args:
+        path (str): Absolute path such as "/proc/cpuinfo".
+        root (str): Root prefix, or None for the live system.
+    Returns:
+        str: The path to open.
+    """
+    if not root or root == "/":
+        return path
+    return os.path.join(root, path.lstrip("/"))
+
+
+def read_text(path, root=None, default=None):
+    """
+    Read and strip a small text file under `root`, returning `default` if it cannot be read.
+    """
+    try:
+        with open(rooted(path, root), "r") as f:
+            return f.read().strip()
+    except Exception:
+        return default
+
+
+def exists(path, root=None):
+    return os.path.exists(rooted(path, root))
+
+
+def glob_paths(pattern, root=None):
+    """
+    Glob an absolute pattern under `root`.
+    """
+    return glob.glob(rooted(pattern, root))
+
+
+def is_live(root=None):
+    return not root or os.path.realpath(root) == "/"
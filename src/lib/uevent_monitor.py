@@ -0,0 +1,157 @@
+"""
+uevent_monitor.py
+
+Hotplug-aware drive inventory for Linux. Listens on the kernel uevent netlink socket
+for block add/remove/change events and keeps an in-memory copy of the asset's drive
+rows. After each burst of events only the affected device is re-probed, and only the
+rows that were added, changed or removed are written. If the kernel drops events
+(ENOBUFS), every device is re-probed on the next refresh.
+"""
+
+import errno
+import os
+import select
+import socket
+import time
+
+from src.lib.storage import get_backend
+from src.lib.schema import DRIVES
+
+
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_KERNEL_GROUP = 1
+BLOCK_ACTIONS = {"add", "remove", "change"}
+
+
+def parse_uevent(data):
+    """
+    Parse a kernel uevent datagram ("action@devpath\\0KEY=VALUE\\0...") into a dict.
+    Returns None for messages that are not kernel uevents (e.g. libudev broadcasts).
+    """
+    parts = data.split(b"\0")
+    if not parts or b"@" not in parts[0]:
+        return None
+    event = {}
+    for part in parts[1:]:
+        key, sep, value = part.partition(b"=")
+        if sep:
+            event[key.decode(errors="ignore")] = value.decode(errors="ignore")
+    return event
+
+
+def parent_device(event):
+    """
+    Name of the whole-disk device an event refers to (a partition's parent disk, or the disk itself).
+    """
+    devname = event.get("DEVNAME", "")
+    if event.get("DEVTYPE") == "partition":
+        return os.path.basename(os.path.dirname(event.get("DEVPATH", ""))) or devname
+    return devname
+
+
+class UeventMonitor:
+    """
+    Mirrors the asset's assets_drives_info rows and emits deltas on block hotplug events.
+    Args:
+        collector (DriveInfoCollector): Supplies asset_id and the collection logic.
+        debounce (float): Quiet period (seconds) before re-collecting; gives automounters
+            time to mount a freshly attached partition.
+    """
+
+    def __init__(self, collector, debounce=3.0):
+        self.collector = collector
+        self.debounce = debounce
+        self.rows = {}
+        self.probe_cache = {}
+        self.sock = None
+
+    def open(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+        self.sock.bind((0, UEVENT_KERNEL_GROUP))
+        self.rows = self._index(self._collect())
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def _collect(self):
+        return self.collector.collect_drive_records(self.collector.asset_id, self.probe_cache)
+
+    @staticmethod
+    def _index(records):
+        return {DRIVES.key_of(DRIVES.params(record)): record for record in records}
+
+    def handle(self, data):
+        """
+        Process one datagram. Returns True if it was a relevant block event.
+        """
+        event = parse_uevent(data)
+        if not event or event.get("SUBSYSTEM") != "block" or event.get("ACTION") not in BLOCK_ACTIONS:
+            return False
+        device = parent_device(event)
+        if device.startswith(("loop", "ram", "zram")):
+            return False
+        print(f"🔌 Block {event['ACTION']}: {event.get('DEVNAME')}")
+        # Only this device is re-probed; every other device keeps its cached udevadm result.
+        self.probe_cache.pop(device, None)
+        return True
+
+    def overflowed(self):
+        """
+        Events were lost and it is unknown which devices they were for, so forget every
+        probe result; the next refresh() then re-probes all drives.
+        """
+        print("[WARN] Block uevents were dropped (ENOBUFS); re-probing all drives...")
+        self.probe_cache.clear()
+
+    def receive(self):
+        """
+        Read and process one datagram. Returns True if the drives need a refresh.
+        """
+        try:
+            data = self.sock.recv(65536)
+        except OSError as e:
+            if e.errno != errno.ENOBUFS:
+                raise
+            self.overflowed()
+            return True
+        return self.handle(data)
+
+    def refresh(self):
+        """
+        Re-collect and write only the rows that differ from the in-memory table.
+        Returns:
+            tuple: (inserted, updated, deleted) record lists.
+        """
+        current = self._index(self._collect())
+        inserted = [r for k, r in current.items() if k not in self.rows]
+        updated = [r for k, r in current.items() if k in self.rows and self.rows[k] != r]
+        deleted = [r for k, r in self.rows.items() if k not in current]
+        if (inserted or updated or deleted) and get_backend().write_delta(DRIVES, inserted, updated, deleted):
+            self.rows = current
+        # Forget probe results for devices that are gone so a re-attached disk is probed again.
+        live = {record.device_id for record in current.values()}
+        for device in list(self.probe_cache):
+            if device not in live:
+                del self.probe_cache[device]
+        return inserted, updated, deleted
+
+    def run(self, stop_event=None):
+        """
+        Process uevents until stop_event is set.
+        """
+        if self.sock is None:
+            self.open()
+        pending_since = None
+        try:
+            while not (stop_event and stop_event.is_set()):
+                timeout = 1.0 if pending_since is None else max(0.0, pending_since + self.debounce - time.monotonic())
+                readable, _, _ = select.select([self.sock], [], [], timeout)
+                if readable and self.receive():
+                    pending_since = time.monotonic()
+                if pending_since is not None and time.monotonic() - pending_since >= self.debounce:
+                    pending_since = None
+                    self.refresh()
+        finally:
+            self.close()
@@ -0,0 +1,151 @@
+"""
+utilization_sampler.py
+
+Low-overhead utilization sampling for the resident agent. CPU utilization, memory used,
+per-mount disk usage and per-NIC byte rates are read from psutil at a fixed interval into
+preallocated array-backed ring buffers (no per-sample objects). Once per rollup interval
+each series is reduced to min/avg/max and uploaded as one batch.
+"""
+
+import datetime
+import math
+import time
+from array import array
+
+import psutil
+
+from src.lib.storage import get_backend
+from src.lib.schema import UTILIZATION
+
+
+class RingBuffer:
+    """
+    Fixed-capacity ring of floats stored in a single array('d').
+    """
+    __slots__ = ("values", "capacity", "head", "count")
+
+    def __init__(self, capacity):
+        self.values = array("d", bytes(8 * capacity))
+        self.capacity = capacity
+        self.head = 0
+        self.count = 0
+
+    def append(self, value):
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def stats(self):
+        """
+        Returns:
+            tuple: (count, min, avg, max) over the buffered samples, or None if empty.
+        """
+        if not self.count:
+            return None
+        # clear() rewinds head, so a partially filled buffer always occupies values[:count].
+        window = self.values if self.count == self.capacity else self.values[:self.count]
+        return self.count, min(window), math.fsum(window) / self.count, max(window)
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+
+class UtilizationSampler:
+    """
+    Samples utilization metrics into ring buffers and produces periodic rollups.
+    Args:
+        asset_id (int): Asset the rollups belong to.
+        sample_interval (float): Seconds between samples.
+        rollup_interval (float): Seconds covered by each uploaded rollup.
+    """
+
+    def __init__(self, asset_id, sample_interval=10.0, rollup_interval=300.0):
+        self.asset_id = asset_id
+        self.sample_interval = sample_interval
+        self.rollup_interval = rollup_interval
+        # One spare slot: the rollup fires on the first sample at or after the boundary.
+        self.capacity = max(1, math.ceil(rollup_interval / sample_interval)) + 1
+        self.series = {}
+        self.mounts = [p.mountpoint for p in psutil.disk_partitions(all=False)]
+        self.last_net = None
+        self.last_net_time = None
+        self.period_start = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        psutil.cpu_percent(interval=None)  # prime; the first call always returns 0.0
+
+    def _record(self, metric, value):
+        buffer = self.series.get(metric)
+        if buffer is None:
+            buffer = self.series[metric] = RingBuffer(self.capacity)
+        buffer.append(value)
+
+    def sample(self, now):
+        """
+        Take one sample of every metric.
+        Args:
+            now (float): Monotonic timestamp of the sample, used for byte rates.
+        """
+        self._record("cpu.percent", psutil.cpu_percent(interval=None))
+        self._record("memory.used", psutil.virtual_memory().used)
+        for mount in self.mounts:
+            try:
+                self._record(f"disk.used:{mount}", psutil.disk_usage(mount).used)
+            except OSError:
+                pass
+        counters = psutil.net_io_counters(pernic=True)
+        if self.last_net is not None:
+            elapsed = now - self.last_net_time
+            if elapsed > 0:
+                for nic, current in counters.items():
+                    previous = self.last_net.get(nic)
+                    if previous is None:
+                        continue
+                    # Counters reset when an interface is re-created; skip the negative delta.
+                    if current.bytes_recv >= previous.bytes_recv:
+                        self._record(f"net.rx_bytes_per_s:{nic}", (current.bytes_recv - previous.bytes_recv) / elapsed)
+                    if current.bytes_sent >= previous.bytes_sent:
+                        self._record(f"net.tx_bytes_per_s:{nic}", (current.bytes_sent - previous.bytes_sent) / elapsed)
+        self.last_net = counters
+        self.last_net_time = now
+
+    def rollup(self):
+        """
+        Reduce every series to one record and reset the buffers for the next period.
+        Returns:
+            list: UtilizationRollupRecord per metric with samples.
+        """
+        period_end = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        records = []
+        for metric, buffer in self.series.items():
+            stats = buffer.stats()
+            if stats is None:
+                continue
+            count, low, avg, high = stats
+            records.append(UTILIZATION.record_type(
+                asset_id=self.asset_id,
+                metric=metric,
+                period_start=self.period_start,
+                period_end=period_end,
+                samples=count,
+                min_value=low,
+                avg_value=avg,
+                max_value=high,
+            ))
+            buffer.clear()
+        self.period_start = period_end
+        return records
+
+    def run(self, stop_event):
+        """
+        Sample until stop_event is set, uploading a rollup batch every rollup_interval.
+        """
+        next_rollup = time.monotonic() + self.rollup_interval
+        while not stop_event.wait(self.sample_interval):
+            now = time.monotonic()
+            self.sample(now)
+            if now >= next_rollup:
+                next_rollup = now + self.rollup_interval
+                records = self.rollup()
+                if records:
+                    get_backend().write_records(UTILIZATION, records)
@@ -0,0 +1,308 @@
+"""
+loadgen.py
+
+Fleet load generator. Synthesizes per-asset snapshots shaped like the five collectors'
+output and replays them at a configurable concurrency and arrival rate against a local
+database (or any upload function), then reports latency percentiles, throughput,
+connection counts and InnoDB row-lock waits.
+
+Usage:
+    python -m src.loadgen --host 127.0.0.1 --user root --password secret --database itam_local \\
+        --assets 10000 --concurrency 200 --rate 500 --duration 60
+    python -m src.loadgen --target sqlite:/tmp/loadgen.sqlite --assets 1000 --snapshots 5000
+    python -m src.loadgen --target mypackage.gateway:upload --assets 1000
+"""
+
+import argparse
+import importlib
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+from src.lib import db, storage
+from src.lib.fleet_synth import synthesize_asset
+from src.lib.schema import get_schema
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class LoadStats:
+    """
+    Thread-safe latency and row counters, grouped by label ("snapshot", or a table name).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.rows = 0
+        self.failures = 0
+        self.queue_delays = []
+
+    def add(self, label, seconds, ok=True, rows=0):
+        with self.lock:
+            self.latencies.setdefault(label, []).append(seconds)
+            if ok:
+                self.rows += rows
+            else:
+                self.failures += 1
+
+    def add_queue_delay(self, seconds):
+        with self.lock:
+            self.queue_delays.append(seconds)
+
+
+class ServerMonitor(threading.Thread):
+    """
+    Polls SHOW GLOBAL STATUS once a second for connection counts and row-lock waits.
+    """
+    VARIABLES = ("Threads_connected", "Threads_running", "Innodb_row_lock_waits", "Innodb_row_lock_time")
+
+    def __init__(self, interval=1.0):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.first = None
+        self.last = None
+        self.max_connected = 0
+        self.max_running = 0
+
+    def read(self, cursor):
+        placeholders = ", ".join(["%s"] * len(self.VARIABLES))
+        cursor.execute(f"SHOW GLOBAL STATUS WHERE Variable_name IN ({placeholders})", self.VARIABLES)
+        return {name: int(value) for name, value in cursor.fetchall()}
+
+    def run(self):
+        connection = None
+        try:
+            connection = db.get_connection()
+            cursor = connection.cursor()
+            while True:
+                status = self.read(cursor)
+                self.first = self.first or status
+                self.last = status
+                self.max_connected = max(self.max_connected, status.get("Threads_connected", 0))
+                self.max_running = max(self.max_running, status.get("Threads_running", 0))
+                if self.stop_event.wait(self.interval):
+                    break
+        except mysql.connector.Error as err:
+            print(f"[WARN] Server monitor stopped: {err}")
+        finally:
+            if connection and connection.is_connected():
+                connection.close()
+
+    def stop(self):
+        self.stop_event.set()
+        self.join(timeout=5)
+
+    def delta(self, name):
+        if not self.first or not self.last:
+            return None
+        return self.last.get(name, 0) - self.first.get(name, 0)
+
+
+def seed_assets(count, companies, prefix="LOADGEN-"):
+    """
+    Ensure `count` synthetic assets exist and return their (asset_id, company_id) pairs.
+    """
+    assets = []
+    for company_id in range(1, companies + 1):
+        # One company at a time, so each lands on its own shard when a router is configured.
+        connection = db.get_connection(company_id)
+        cursor = connection.cursor()
+        try:
+            rows = [(company_id, f"{prefix}{i:07d}") for i in range(count) if (i % companies) + 1 == company_id]
+            for start in range(0, len(rows), 1000):
+                cursor.executemany("INSERT IGNORE INTO assets (company_id, serial) VALUES (%s, %s)", rows[start:start + 1000])
+            connection.commit()
+            cursor.execute("SELECT id, company_id FROM assets WHERE company_id = %s AND serial LIKE %s",
+                           (company_id, f"{prefix}%"))
+            for asset_id, asset_company in cursor.fetchall():
+                db.bind_asset(asset_id, asset_company)
+                assets.append((asset_id, asset_company))
+        finally:
+            cursor.close()
+            connection.close()
+    return sorted(assets)[:count]
+
+
+def mysql_upload(asset_id, company_id, records, stats):
+    """
+    The agent's real upload path: hardware upsert plus a replace-set sync per child table.
+    """
+    for name, table_records in records.items():
+        started = time.perf_counter()
+        ok = db.upload_records(get_schema(name), asset_id, table_records)
+        stats.add(name, time.perf_counter() - started, ok, len(table_records))
+
+
+def backend_upload(backend):
+    """
+    Upload through a local storage backend (sqlite or jsonl), the same path collectors use.
+    """
+    def upload(asset_id, company_id, records, stats):
+        for name, table_records in records.items():
+            started = time.perf_counter()
+            ok = backend.upload_records(get_schema(name), asset_id, table_records)
+            stats.add(name, time.perf_counter() - started, ok, len(table_records))
+    return upload
+
+
+def null_upload(asset_id, company_id, records, stats):
+    """
+    Discards everything; measures the generator's own overhead.
+    """
+    stats.add("null", 0.0, True, sum(len(r) for r in records.values()))
+
+
+def load_target(spec):
+    """
+    Resolve --target: "mysql", "null", "sqlite[:PATH]", "jsonl[:PATH]" or "package.module:function".
+    A custom function is called as function(asset_id, company_id, records) and must raise on failure.
+    """
+    if spec == "mysql":
+        return mysql_upload
+    if spec == "null":
+        return null_upload
+    name, _, path = spec.partition(":")
+    if name in ("sqlite", "jsonl"):
+        return backend_upload(storage.create_backend(name, path or None))
+    module_name, _, function_name = spec.partition(":")
+    function = getattr(importlib.import_module(module_name), function_name)
+
+    def custom_upload(asset_id, company_id, records, stats):
+        started = time.perf_counter()
+        ok = True
+        try:
+            function(asset_id, company_id, records)
+        except Exception as e:
+            print(f"❌ Upload failed for asset {asset_id}: {e}")
+            ok = False
+        stats.add(spec, time.perf_counter() - started, ok, sum(len(r) for r in records.values()))
+    return custom_upload
+
+
+def run_load(assets, upload, concurrency, rate, duration, total, seed=0, change_rate=0.1):
+    """
+    Replay synthetic snapshots until `duration` seconds pass or `total` snapshots are sent.
+    Args:
+        assets (list): (asset_id, company_id) pairs to report as.
+        upload (callable): Upload function (see load_target).
+        concurrency (int): Concurrent uploads (worker threads, i.e. simultaneous agents).
+        rate (float): Mean arrivals per second (Poisson); 0 sends as fast as workers allow.
+        duration (float): Stop submitting after this many seconds (0 for no limit).
+        total (int): Stop after this many snapshots (0 for no limit).
+    Returns:
+        tuple: (LoadStats, elapsed seconds, snapshots sent)
+    """
+    stats = LoadStats()
+    rng = random.Random(seed)
+    generations = {}
+    slots = threading.Semaphore(concurrency * 2) if rate <= 0 else None
+
+    def send(asset_id, company_id, generation, submitted_at):
+        try:
+            stats.add_queue_delay(time.perf_counter() - submitted_at)
+            records = synthesize_asset(asset_id, company_id, seed=seed, generation=generation, change_rate=change_rate)
+            started = time.perf_counter()
+            upload(asset_id, company_id, records, stats)
+            stats.add("snapshot", time.perf_counter() - started)
+        finally:
+            if slots:
+                slots.release()
+
+    started = time.perf_counter()
+    sent = 0
+    next_arrival = started
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while (not total or sent < total) and (not duration or time.perf_counter() - started < duration):
+            if rate > 0:
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                next_arrival += rng.expovariate(rate)
+            else:
+                slots.acquire()
+            asset_id, company_id = assets[sent % len(assets)]
+            generation = generations.get(asset_id, 0)
+            generations[asset_id] = generation + 1
+            pool.submit(send, asset_id, company_id, generation, time.perf_counter())
+            sent += 1
+    return stats, time.perf_counter() - started, sent
+
+
+def report(stats, elapsed, sent, monitor=None):
+    print(f"\n📊 {sent} snapshots in {elapsed:.1f}s ({sent / elapsed:.1f} snapshots/s)")
+    print(f"   rows written: {stats.rows} ({stats.rows / elapsed:.0f} rows/s), failed uploads: {stats.failures}")
+    for label, values in sorted(stats.latencies.items()):
+        values.sort()
+        print(f"   {label:<10} n={len(values):<7} p50={percentile(values, 50) * 1000:8.1f}ms "
+              f"p99={percentile(values, 99) * 1000:8.1f}ms max={values[-1] * 1000:8.1f}ms")
+    delays = sorted(stats.queue_delays)
+    if delays:
+        print(f"   queue wait p50={percentile(delays, 50) * 1000:.1f}ms p99={percentile(delays, 99) * 1000:.1f}ms")
+    if monitor:
+        print(f"   connections: max Threads_connected={monitor.max_connected}, max Threads_running={monitor.max_running}")
+        print(f"   InnoDB row lock waits: {monitor.delta('Innodb_row_lock_waits')}, "
+              f"lock time: {monitor.delta('Innodb_row_lock_time')}ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure ingestion throughput with synthetic fleet snapshots.")
+    parser.add_argument("--host", help="MySQL host")
+    parser.add_argument("--port", type=int, help="MySQL port")
+    parser.add_argument("--user", help="MySQL user")
+    parser.add_argument("--password", help="MySQL password")
+    parser.add_argument("--database", help="Database name")
+    parser.add_argument("--shards", help="Shard config routing companies to database servers")
+    parser.add_argument("--target", default="mysql", help="mysql, null, sqlite[:PATH], jsonl[:PATH] or package.module:function")
+    parser.add_argument("--assets", type=int, default=1000, help="Number of distinct synthetic assets")
+    parser.add_argument("--companies", type=int, default=20, help="Companies the assets are spread across")
+    parser.add_argument("--concurrency", type=int, default=50, help="Simultaneous uploads")
+    parser.add_argument("--rate", type=float, default=0.0, help="Mean snapshot arrivals per second (0 = closed loop)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run (0 = until --snapshots)")
+    parser.add_argument("--snapshots", type=int, default=0, help="Snapshots to send (0 = until --duration)")
+    parser.add_argument("--change-rate", type=float, default=0.1,
+                        help="Probability that a volatile field changes between an asset's reports")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic fleet")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.duration and not args.snapshots:
+        print("❌ Give --duration or --snapshots.")
+        exit(1)
+    db.configure(verbose=False, host=args.host, port=args.port, user=args.user,
+                 password=args.password, database=args.database)
+    if args.target == "mysql":
+        db.configure_shards(args.shards)
+    upload = load_target(args.target)
+    monitor = None
+    if args.target == "mysql":
+        assets = seed_assets(args.assets, args.companies)
+        monitor = ServerMonitor()
+        monitor.start()
+    else:
+        assets = [(i + 1, (i % args.companies) + 1) for i in range(args.assets)]
+    print(f"🚀 Replaying {len(assets)} assets with concurrency {args.concurrency}...")
+    stats, elapsed, sent = run_load(assets, upload, args.concurrency, args.rate, args.duration,
+                                    args.snapshots, seed=args.seed, change_rate=args.change_rate)
+    if monitor:
+        monitor.stop()
+    report(stats, elapsed, sent, monitor)
+
+
+if __name__ == "__main__":
+    main()
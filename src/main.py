@@ -1,42 +1,27 @@
 import os
 import sys
+import argparse
 import mysql.connector
 import socket
 import subprocess
 import platform
 import shutil
 
-from src.lib.hardware_info_collector import HardwareInfoCollector
-from src.lib.drive_info_collector import DriveInfoCollector
-from src.lib.graphics_card_info_collector import GraphicsCardInfoCollector
-from src.lib.memory_info_collector import MemHardwareInfoCollector
-from src.lib.network_adapter_info_collector import NetworkAdapterInfoCollector
+from src.lib import boot_cache, capabilities, governor, storage
+from src.lib.db import bind_asset, configure_shards, find_asset_connection
+from src.lib.collector_registry import COLLECTORS, PROFILES, parse_names, select_collectors
+from src.lib.scheduler import Scheduler, fetch_server_hint
+from src.lib.snapshot_history import SnapshotHistory, default_history_dir
+from src.lib import sysroot
 
 
-# Database config (store securely in production!)
-DB_HOST="68.178.156.243"
-DB_USER="itamcloud"
-DB_PASSWORD="Kgl0b@ltech"
-DB_NAME="ITAMCloud"
-
-
-def check_serial_no(serial_number):
+def check_serial_no(serial_number, scheduler=None):
     connection = None
     cursor = None
     try:
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        cursor = connection.cursor(buffered=True)  # Use buffered cursor
-
-
         # Get asset id and company_id from assets table using the given serial_number
-        asset_id_query = "SELECT id, company_id FROM assets WHERE serial = %s"
-        cursor.execute(asset_id_query, (serial_number,))
-        asset_row = cursor.fetchone()
+        # (on whichever shard holds it when companies are sharded)
+        connection, asset_row = find_asset_connection(serial_number)
         if not asset_row:
             print(f"❌ No asset found for serial_number: {serial_number}")
             return None
@@ -47,10 +32,18 @@ def check_serial_no(serial_number):
         print(f"✅ Found asset_id: {asset_id}, company_id: {company_id} for serial_number: {serial_number}")
         # Store both in a tuple (or dict as needed) and return
         asset_info = (asset_id, company_id)
+        bind_asset(asset_id, company_id)
+        if scheduler:
+            hint = fetch_server_hint(connection, asset_id, company_id)
+            if hint:
+                hint_id, retry_after, slow_down, expires_at = hint
+                scheduler.apply_hint(retry_after, slow_down, expires_at, hint_id=hint_id)
         return asset_info
 
     except mysql.connector.Error as err:
         print(f"❌ MySQL error: {err}")
+        if scheduler:
+            scheduler.record_error(err)
     except Exception as e:
         print(f"❌ General error: {e}")
     finally:
@@ -59,34 +52,136 @@ def check_serial_no(serial_number):
         if connection and connection.is_connected():
             connection.close()
             
-def main():
-    company_id = None
-    serial = None
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Collect asset inventory and upload it to ITAMCloud.")
+    parser.add_argument("--serial", help="Asset serial number (prompted for if omitted)")
+    parser.add_argument("--only", help="Comma separated collectors to run, e.g. network,memory")
+    parser.add_argument("--skip", help="Comma separated collectors to leave out, e.g. graphics")
+    parser.add_argument("--profile", choices=PROFILES, default="full",
+                        help="fast skips sudo-requiring and multi-second probes; full runs everything")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Do not read or write the boot-scoped cache of static hardware facts")
+    parser.add_argument("--refresh-cache", action="store_true",
+                        help="Re-run every probe and overwrite the boot-scoped cache")
+    parser.add_argument("--refresh-capabilities", action="store_true",
+                        help="Re-discover installed tools, sudo and kernel interfaces instead of using the cached map")
+    parser.add_argument("--backend", choices=storage.BACKENDS, default="mysql",
+                        help="Where records go: the ITAMCloud database, a local SQLite file or a JSON Lines log")
+    parser.add_argument("--store", help="File for the sqlite/jsonl backends (defaults to the cache directory)")
+    parser.add_argument("--shards", help="Shard config routing companies to database servers (default: $ITAM_SHARDS)")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Do not record this run in the local snapshot history")
+    parser.add_argument("--root", help="Inventory an alternate root (container rootfs, chroot, mounted image)")
+    parser.add_argument("--batch-roots", nargs="+", metavar="ROOT",
+                        help="Inventory many roots in parallel and write one snapshot file per root")
+    parser.add_argument("--batch-output", default="snapshots", help="Directory for --batch-roots snapshots")
+    parser.add_argument("--workers", type=int, help="Process pool size for --batch-roots")
+    parser.add_argument("--schedule-window", type=float, default=0,
+                        help="Spread scheduled runs over this many seconds and honor server backoff hints")
+    parser.add_argument("--schedule-jitter", type=float,
+                        help="Random spread around the asset's slot (default 5%% of the window)")
+    parser.add_argument("--governed", action="store_true",
+                        help="Run at idle CPU/I/O priority and hold probes back while the host is busy")
+    parser.add_argument("--max-load", type=float, default=0.7,
+                        help="Governed mode: load average per CPU above which probes wait")
+    parser.add_argument("--cgroup", help="Governed mode: cgroup v2 group to run in")
+    parser.add_argument("--cpu-max", type=float, help="Governed mode: CPU limit in percent of one CPU (cgroup v2)")
+    parser.add_argument("--memory-max", help="Governed mode: memory limit such as 256M (cgroup v2)")
+    parser.add_argument("--list-collectors", action="store_true", help="List available collectors and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    capabilities.configure(refresh=args.refresh_capabilities)
+    if args.list_collectors:
+        host = capabilities.get_capabilities()
+        for spec in COLLECTORS:
+            slow = " (slow)" if spec.is_slow() else ""
+            missing = host.missing_tools(spec.probes_for())
+            missing = f" [missing: {', '.join(missing)}]" if missing else ""
+            print(f"{spec.name}{slow}: {', '.join(sorted(spec.probes_for())) or 'no external probes'}{missing}")
+        return
+    governed = None
+    if args.governed:
+        governed = governor.configure(max_load=args.max_load, cgroup=args.cgroup,
+                                      cpu_percent=args.cpu_max, memory_max=args.memory_max)
     try:
-        serial = input("Please enter the serial: ")
-    except ValueError:
-        print("Invalid input. serial must be given.")
+        # Batch workers apply the root-aware filter per root themselves.
+        root = None if args.batch_roots else args.root
+        collectors = select_collectors(parse_names(args.only), parse_names(args.skip), args.profile, root=root)
+    except (KeyError, ValueError) as e:
+        print(f"❌ {e}")
+        exit(1)
+    if not collectors:
+        print("❌ No collectors selected.")
         exit(1)
+    if args.batch_roots:
+        from src.lib.batch import inventory_roots
+        workers = governed.workers(args.workers) if governed else args.workers
+        inventory_roots(args.batch_roots, args.batch_output, [spec.name for spec in collectors], workers)
+        if governed:
+            governed.report()
+        return
+    boot_cache.configure(enabled=not args.no_cache, refresh=args.refresh_cache)
+    backend = storage.configure(args.backend, args.store)
+    if backend.name == "mysql":
+        configure_shards(args.shards)
+    if backend.name == "mysql" and not check_internet():
+        print("No internet connection.")
+        sys.exit(1)
+
+    company_id = None
+    serial = args.serial
+    if not serial:
+        try:
+            serial = input("Please enter the serial: ")
+        except ValueError:
+            print("Invalid input. serial must be given.")
+            exit(1)
     print("You entered serial:", serial)
-    asset_info = check_serial_no(serial)
+    scheduler = None
+    if args.schedule_window > 0 and backend.name == "mysql":
+        scheduler = Scheduler(serial, args.schedule_window, jitter=args.schedule_jitter)
+        if not scheduler.wait():
+            return
+        if scheduler.deferred():
+            # Still inside a retry-after; do not even look the asset up.
+            print("⏭️ Server asked agents to back off; this run will be retried later.")
+            return
+    if backend.name == "mysql":
+        asset_info = check_serial_no(serial, scheduler)
+    else:
+        asset_info = backend.find_asset(serial)
     if asset_info:
         asset_id, company_id = asset_info
         print(f"Asset ID: {asset_id}, Company ID: {company_id}")
     else:
         print("No asset found with the provided serial number.")
         exit(1)
-    hardware_collector = HardwareInfoCollector(company_id, asset_id)
-    drive_collector = DriveInfoCollector()
-    graphics_collector = GraphicsCardInfoCollector()
-    mac_hardware_collector = MemHardwareInfoCollector(company_id, asset_id)
-    network_collector = NetworkAdapterInfoCollector(company_id, asset_id)
+    if scheduler and scheduler.deferred():
+        print("⏭️ Server asked agents to back off; this run will be retried later.")
+        return
     # Collecting information
-    hardware_collector.get_system_info()
-    drive_collector.get_drive_info(asset_id)
-    graphics_collector.get_graphics_card_info(asset_id)
-    mac_hardware_collector.get_memnory_info()
-    network_collector.get_network_info()
-    print("Drive information collection completed.")
+    collected = {}
+    for spec in collectors:
+        print(f"🔍 Running {spec.name} collector...")
+        collector = spec.create(company_id, asset_id, root=args.root)
+        records = collector.collect()
+        collector.upload(records)
+        collected[spec.name] = records
+    if not args.no_history and sysroot.is_live(args.root):
+        try:
+            if SnapshotHistory(default_history_dir()).append(collected):
+                print("🗂️ Inventory changed; recorded in local history.")
+        except OSError as e:
+            print(f"[WARN] Could not update local history: {e}")
+    if scheduler:
+        scheduler.record_success()
+    print(f"Collection completed: {', '.join(spec.name for spec in collectors)}")
+    backend.close()
+    if governed:
+        governed.report()
 
 def check_internet(host="8.8.8.8", port=53, timeout=3):
     try:
@@ -129,8 +224,5 @@ def check_python_installed():
 
 
 if __name__ == "__main__":
-    if not check_internet():
-        print("No internet connection.")
-        sys.exit(1)
     check_python_installed()
     main()
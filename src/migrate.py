@@ -0,0 +1,88 @@
+"""
+migrate.py
+
+Create or upgrade the ITAMCloud schema.
+
+Usage:
+    python -m src.migrate --host 127.0.0.1 --user root --password secret --database itam_local --create-database
+    python -m src.migrate --status
+    python -m src.migrate --shards shards.json
+"""
+
+import argparse
+
+import mysql.connector
+
+from src.lib.db import configure, configure_shards, get_connection
+from src.lib.migrations import migrate, status
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Create or upgrade the ITAMCloud database schema.")
+    parser.add_argument("--host", help="MySQL host (defaults to the configured DB_HOST)")
+    parser.add_argument("--port", type=int, help="MySQL port")
+    parser.add_argument("--user", help="MySQL user")
+    parser.add_argument("--password", help="MySQL password")
+    parser.add_argument("--database", help="Database name")
+    parser.add_argument("--create-database", action="store_true", help="CREATE DATABASE IF NOT EXISTS first")
+    parser.add_argument("--partitions", type=int,
+                        help="Partition company-scoped tables by KEY(company_id) into this many partitions")
+    parser.add_argument("--target", type=int, help="Stop after this migration version")
+    parser.add_argument("--status", action="store_true", help="Show applied and pending migrations")
+    parser.add_argument("--shards", help="Shard config: migrate every shard in it")
+    return parser.parse_args(argv)
+
+
+def migrate_shards(args):
+    configure(host=args.host, port=args.port, user=args.user, password=args.password)
+    router = configure_shards(args.shards)
+    for shard in sorted(router.shards):
+        print(f"🔄 Shard {shard}")
+        connection = router.connect(shard)
+        try:
+            if args.status:
+                for version, description, applied in status(connection):
+                    print(f"{'✅' if applied else '⏳'} {version:>3} {description}")
+            else:
+                migrate(connection, target=args.target, partitions=args.partitions)
+        finally:
+            connection.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    overrides = dict(host=args.host, port=args.port, user=args.user, password=args.password)
+    if args.shards:
+        try:
+            migrate_shards(args)
+        except mysql.connector.Error as err:
+            print(f"❌ MySQL error: {err}")
+            exit(1)
+        return
+    connection = None
+    try:
+        if args.create_database:
+            if not args.database:
+                print("❌ --create-database needs --database")
+                exit(1)
+            bootstrap = get_connection(database="", **overrides)
+            bootstrap.cursor().execute(
+                f"CREATE DATABASE IF NOT EXISTS `{args.database}` DEFAULT CHARACTER SET utf8mb4"
+            )
+            bootstrap.close()
+        connection = get_connection(database=args.database, **overrides)
+        if args.status:
+            for version, description, applied in status(connection):
+                print(f"{'✅' if applied else '⏳'} {version:>3} {description}")
+            return
+        migrate(connection, target=args.target, partitions=args.partitions)
+    except mysql.connector.Error as err:
+        print(f"❌ MySQL error: {err}")
+        exit(1)
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+
+if __name__ == "__main__":
+    main()
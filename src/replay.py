@@ -0,0 +1,48 @@
+"""
+replay.py
+
+Replay a JSON Lines log written with `--backend jsonl` into the ITAMCloud database
+(or a local SQLite file), resolving each serial to its asset on the way.
+
+Usage:
+    python -m src.replay inventory.jsonl
+    python -m src.replay --host 127.0.0.1 --user root --password secret --database itam_local site-a/*.jsonl
+"""
+
+import argparse
+
+from src.lib import db, storage
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay JSON Lines inventory logs into a storage backend.")
+    parser.add_argument("paths", nargs="+", help="Logs written by the jsonl backend")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default="mysql", help="Where to replay into")
+    parser.add_argument("--store", help="SQLite file for --backend sqlite")
+    parser.add_argument("--host", help="MySQL host")
+    parser.add_argument("--port", type=int, help="MySQL port")
+    parser.add_argument("--user", help="MySQL user")
+    parser.add_argument("--password", help="MySQL password")
+    parser.add_argument("--database", help="Database name")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    db.configure(verbose=False, host=args.host, port=args.port, user=args.user,
+                 password=args.password, database=args.database)
+    backend = storage.create_backend(args.backend, args.store)
+    failed = False
+    try:
+        for path in args.paths:
+            applied, skipped = storage.replay_log(path, backend)
+            print(f"✅ {path}: {applied} writes replayed, {skipped} skipped")
+            failed = failed or skipped > 0
+    finally:
+        backend.close()
+    if failed:
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+soak.py
+
+Soak test for leaks in the collection path. Runs the full collect -> upload -> history
+cycle thousands of times in one process, with probes replayed from fixtures and records
+written to a local SQLite database, and tracks RSS, open file descriptors, child
+processes, threads and per-cycle latency. Fails (exit 1) if any of them grows past its
+threshold between the start and the end of the run.
+
+Usage:
+    python -m src.soak --record-fixtures fixtures/          # capture this host's probe output once
+    python -m src.soak --fixtures fixtures/ --cycles 5000 --metrics soak.csv
+"""
+
+import argparse
+import contextlib
+import csv
+import gc
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+import psutil
+
+from src.lib import boot_cache, capabilities, db, probes, storage
+from src.lib.collector_registry import parse_names, select_collectors
+from src.lib.governor import parse_size
+from src.lib.snapshot_history import SnapshotHistory
+
+SOAK_SERIAL = "SOAK-0001"
+METRICS = ("rss", "fds", "children", "threads", "latency")
+
+
+def sample(process):
+    """
+    One reading of the process-level resources a leak would show up in.
+    """
+    with process.oneshot():
+        rss = process.memory_info().rss
+        fds = process.num_fds() if hasattr(process, "num_fds") else process.num_handles()
+        threads = process.num_threads()
+    children = process.children(recursive=True)
+    zombies = 0
+    for child in children:
+        try:
+            zombies += child.status() == psutil.STATUS_ZOMBIE
+        except psutil.Error:
+            pass
+    return {"rss": rss, "fds": fds, "children": len(children), "zombies": zombies,
+            "threads": max(threads, threading.active_count())}
+
+
+def run_cycle(collectors, asset_id, company_id, history):
+    collected = {}
+    for spec in collectors:
+        collector = spec.create(company_id, asset_id)
+        records = collector.collect()
+        collector.upload(records)
+        collected[spec.name] = records
+    history.append(collected)
+
+
+def window_median(rows, metric, start, size):
+    values = [row[metric] for row in rows[start:start + size]]
+    return statistics.median(values) if values else 0
+
+
+def check_growth(rows, warmup, window, limits):
+    """
+    Compare the median of each metric over the first window after warmup with the median
+    over the last window. Medians keep one slow cycle or a GC pause from failing the run.
+    Returns:
+        list: (metric, start value, end value, limit) for every metric over its limit.
+    """
+    failures = []
+    if len(rows) < warmup + 2 * window:
+        window = max(1, (len(rows) - warmup) // 2)
+    for metric, limit in limits.items():
+        start = window_median(rows, metric, warmup, window)
+        end = window_median(rows, metric, len(rows) - window, window)
+        if metric == "latency":
+            grew = start > 0 and end / start > limit
+        else:
+            grew = end - start > limit
+        if grew:
+            failures.append((metric, start, end, limit))
+    return failures
+
+
+def format_value(metric, value):
+    if metric == "rss":
+        return f"{value / 1024 ** 2:.1f} MiB"
+    if metric == "latency":
+        return f"{value * 1000:.1f} ms"
+    return f"{value:g}"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the collection cycle repeatedly and fail on resource growth.")
+    parser.add_argument("--fixtures", help="Directory of recorded probe output to replay")
+    parser.add_argument("--record-fixtures", metavar="DIR", help="Run one live cycle, save probe output to DIR and exit")
+    parser.add_argument("--cycles", type=int, default=2000, help="Collection cycles to run")
+    parser.add_argument("--only", help="Comma separated collectors to run")
+    parser.add_argument("--skip", help="Comma separated collectors to leave out")
+    parser.add_argument("--store", help="SQLite database to upload into (default: a temp file)")
+    parser.add_argument("--warmup", type=int, default=50, help="Cycles ignored while caches and pools fill")
+    parser.add_argument("--window", type=int, default=100, help="Cycles averaged at the start and end of the run")
+    parser.add_argument("--max-rss-growth", default="16M", help="Allowed RSS growth, e.g. 16M")
+    parser.add_argument("--max-fd-growth", type=int, default=2, help="Allowed growth in open file descriptors")
+    parser.add_argument("--max-children", type=int, default=0, help="Allowed growth in child processes")
+    parser.add_argument("--max-thread-growth", type=int, default=1, help="Allowed growth in threads")
+    parser.add_argument("--max-latency-growth", type=float, default=1.5,
+                        help="Allowed end/start ratio of the per-cycle latency")
+    parser.add_argument("--metrics", help="Write per-cycle metrics to this CSV file")
+    parser.add_argument("--verbose", action="store_true", help="Keep the collectors' own output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    collectors = select_collectors(parse_names(args.only), parse_names(args.skip))
+    work_dir = tempfile.mkdtemp(prefix="itam-soak-")
+    backend = storage.configure("sqlite", args.store or os.path.join(work_dir, "soak.sqlite"))
+    db.configure(verbose=False)
+    # Every cycle must run every probe; the boot cache would skip most of them.
+    boot_cache.configure(enabled=False)
+    capabilities.configure(cache_dir=work_dir)
+    asset_id, company_id = backend.find_asset(SOAK_SERIAL)
+    history = SnapshotHistory(os.path.join(work_dir, "history"))
+    devnull = open(os.devnull, "w")
+    quiet = contextlib.nullcontext if args.verbose else (lambda: contextlib.redirect_stdout(devnull))
+
+    try:
+        if args.record_fixtures:
+            probes.configure_fixtures(args.record_fixtures, record=True)
+            run_cycle(collectors, asset_id, company_id, history)
+            print(f"✅ Recorded {len(os.listdir(args.record_fixtures))} probe fixtures in {args.record_fixtures}")
+            return
+        if args.fixtures:
+            probes.configure_fixtures(args.fixtures)
+        else:
+            print("[WARN] No --fixtures given; probing the live system every cycle.")
+
+        process = psutil.Process()
+        rows = []
+        writer = None
+        metrics_file = open(args.metrics, "w", newline="") if args.metrics else None
+        if metrics_file:
+            writer = csv.DictWriter(metrics_file, fieldnames=("cycle",) + METRICS + ("zombies",))
+            writer.writeheader()
+        print(f"🚀 Soaking {', '.join(spec.name for spec in collectors)} for {args.cycles} cycles...")
+        try:
+            for cycle in range(1, args.cycles + 1):
+                started = time.perf_counter()
+                with quiet():
+                    run_cycle(collectors, asset_id, company_id, history)
+                latency = time.perf_counter() - started
+                gc.collect()
+                row = dict(sample(process), cycle=cycle, latency=latency)
+                rows.append(row)
+                if writer:
+                    writer.writerow(row)
+                if cycle % max(1, args.cycles // 10) == 0:
+                    print(f"  cycle {cycle}: rss={format_value('rss', row['rss'])} fds={row['fds']} "
+                          f"children={row['children']} threads={row['threads']} "
+                          f"latency={format_value('latency', latency)}")
+        finally:
+            if metrics_file:
+                metrics_file.close()
+    finally:
+        probes.configure_fixtures(None)
+        devnull.close()
+        backend.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    limits = {
+        "rss": parse_size(args.max_rss_growth),
+        "fds": args.max_fd_growth,
+        "children": args.max_children,
+        "threads": args.max_thread_growth,
+        "latency": args.max_latency_growth,
+    }
+    failures = check_growth(rows, min(args.warmup, len(rows) // 2), args.window, limits)
+    zombies = max((row["zombies"] for row in rows), default=0)
+    if zombies:
+        failures.append(("zombies", 0, zombies, 0))
+    for metric, start, end, limit in failures:
+        print(f"❌ {metric} grew from {format_value(metric, start)} to {format_value(metric, end)} "
+              f"(limit {format_value(metric, limit)}{'x' if metric == 'latency' else ''})")
+    if failures:
+        exit(1)
+    print(f"✅ No resource growth over {len(rows)} cycles.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+summary.py
+
+Show or rebuild the fleet summary used by dashboards.
+
+Usage:
+    python -m src.summary --company 12
+    python -m src.summary --company 12 --dimension bios
+    python -m src.summary --rebuild
+"""
+
+import argparse
+
+import mysql.connector
+
+from src.lib.db import get_connection
+from src.lib.fleet_summary import DIMENSIONS, read_summary, rebuild
+from src.lib.normalize import memory_type_name
+
+
+def parse_args(argv=None):
+    dimensions = sorted(d.name for group in DIMENSIONS.values() for d in group)
+    parser = argparse.ArgumentParser(description="Show or rebuild the per-company fleet summary.")
+    parser.add_argument("--host", help="MySQL host")
+    parser.add_argument("--port", type=int, help="MySQL port")
+    parser.add_argument("--user", help="MySQL user")
+    parser.add_argument("--password", help="MySQL password")
+    parser.add_argument("--database", help="Database name")
+    parser.add_argument("--company", type=int, help="Company to show (or to limit --rebuild to)")
+    parser.add_argument("--dimension", choices=dimensions, help="Only show this dimension")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the summary from the raw tables")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.rebuild and args.company is None:
+        print("❌ Give --company to show a summary, or --rebuild.")
+        exit(1)
+    connection = None
+    cursor = None
+    try:
+        connection = get_connection(host=args.host, port=args.port, user=args.user,
+                                    password=args.password, database=args.database)
+        cursor = connection.cursor()
+        if args.rebuild:
+            rebuild(cursor, args.company)
+            connection.commit()
+            print("✅ Fleet summary rebuilt" + (f" for company {args.company}" if args.company is not None else ""))
+            return
+        for dimension, value, items, total in read_summary(cursor, args.company, args.dimension):
+            if dimension == "memory_type" and value:
+                value = f"{memory_type_name(value)} ({value})"
+            extra = f"  total={total}" if total else ""
+            print(f"{dimension:<12} {value or '(none)':<60} {items:>8}{extra}")
+    except mysql.connector.Error as err:
+        print(f"❌ MySQL error: {err}")
+        exit(1)
+    finally:
+        if cursor:
+            cursor.close()
+        if connection and connection.is_connected():
+            connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+test_migrations.py
+
+Runs every migration, in order, against an empty scratch database. Needs a MySQL server
+the test may create and drop databases on; point it there with ITAM_TEST_DB_HOST,
+ITAM_TEST_DB_PORT, ITAM_TEST_DB_USER and ITAM_TEST_DB_PASSWORD, otherwise it is skipped.
+
+    ITAM_TEST_DB_HOST=127.0.0.1 ITAM_TEST_DB_USER=root python -m pytest tests
+"""
+
+import os
+import unittest
+import uuid
+
+import mysql.connector
+
+from src.lib.migrations import MIGRATIONS, migrate, status
+from src.lib.schema import SCHEMAS
+from src.lib.staging import staging_table
+
+HOST = os.environ.get("ITAM_TEST_DB_HOST")
+
+
+@unittest.skipUnless(HOST, "needs a MySQL server in ITAM_TEST_DB_HOST")
+class MigrationsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.database = f"itam_migrations_{uuid.uuid4().hex[:12]}"
+        settings = dict(
+            host=HOST,
+            port=int(os.environ.get("ITAM_TEST_DB_PORT", 3306)),
+            user=os.environ.get("ITAM_TEST_DB_USER", "root"),
+            password=os.environ.get("ITAM_TEST_DB_PASSWORD", ""),
+        )
+        self.server = mysql.connector.connect(**settings)
+        self.server.cursor().execute(f"CREATE DATABASE `{self.database}` DEFAULT CHARACTER SET utf8mb4")
+        self.connection = mysql.connector.connect(database=self.database, **settings)
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.cursor().execute(f"DROP DATABASE IF EXISTS `{self.database}`")
+        self.server.close()
+
+    def columns(self, table):
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_schema = %s AND table_name = %s",
+            (self.database, table),
+        )
+        names = {row[0] for row in cursor.fetchall()}
+        cursor.close()
+        return names
+
+    def test_all_migrations_apply_to_an_empty_schema(self):
+        applied = migrate(self.connection)
+
+        self.assertEqual(applied, [m.version for m in MIGRATIONS])
+        self.assertTrue(all(done for _, _, done in status(self.connection)))
+        for schema in SCHEMAS.values():
+            self.assertLessEqual(set(schema.columns), self.columns(schema.table), schema.table)
+            self.assertLessEqual(set(schema.columns) | {"load_id"}, self.columns(staging_table(schema)), schema.name)
+
+    def test_migrate_is_a_no_op_once_current(self):
+        migrate(self.connection)
+        self.assertEqual(migrate(self.connection), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+test_netlink_monitor.py
+
+InterfaceTable driven by hand-packed rtnetlink payloads, as the kernel would send them.
+"""
+
+import socket
+import unittest
+
+from src.lib.netlink_monitor import (
+    IFA_LOCAL, IFADDRMSG, IFF_UP, IFINFOMSG, IFLA_ADDRESS, IFLA_IFNAME, RTATTR, RTA_GATEWAY, RTMSG,
+    RT_TABLE_MAIN, RTM_DELADDR, RTM_DELLINK, RTM_DELROUTE, RTM_NEWADDR, RTM_NEWLINK, RTM_NEWROUTE,
+    InterfaceTable,
+)
+
+
+def attribute(attr_type, value):
+    length = RTATTR.size + len(value)
+    return RTATTR.pack(length, attr_type) + value + b"\0" * (-length % 4)
+
+
+def link(index, name, up=True, mac=b"\x52\x54\x00\x12\x34\x56"):
+    header = IFINFOMSG.pack(socket.AF_UNSPEC, 1, index, IFF_UP if up else 0, 0)
+    return header + attribute(IFLA_IFNAME, name.encode() + b"\0") + attribute(IFLA_ADDRESS, mac)
+
+
+def address(index, ip, prefixlen=24, family=socket.AF_INET):
+    return IFADDRMSG.pack(family, prefixlen, 0, 0, index) + attribute(IFA_LOCAL, socket.inet_aton(ip))
+
+
+def default_route(gateway):
+    header = RTMSG.pack(socket.AF_INET, 0, 0, 0, RT_TABLE_MAIN, 0, 0, 0, 0)
+    return header + attribute(RTA_GATEWAY, socket.inet_aton(gateway))
+
+
+class InterfaceTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = InterfaceTable()
+        self.table.apply(RTM_NEWLINK, link(2, "eth0"))
+        self.table.dirty.clear()
+
+    def apply(self, msg_type, payload):
+        self.table.dirty.clear()
+        self.table.apply(msg_type, payload)
+        return self.table.dirty
+
+    def test_address_events(self):
+        # (description, message type, payload, addresses of eth0 afterwards, eth0 marked dirty)
+        steps = [
+            ("first address", RTM_NEWADDR, address(2, "10.0.0.1"), [("10.0.0.1", 24)], True),
+            ("repeat is ignored", RTM_NEWADDR, address(2, "10.0.0.1"), [("10.0.0.1", 24)], False),
+            ("secondary is kept", RTM_NEWADDR, address(2, "10.0.0.2", 16),
+             [("10.0.0.1", 24), ("10.0.0.2", 16)], False),
+            ("IPv6 is ignored", RTM_NEWADDR, address(2, "10.0.0.3", family=socket.AF_INET6),
+             [("10.0.0.1", 24), ("10.0.0.2", 16)], False),
+            ("deleting the primary promotes the next", RTM_DELADDR, address(2, "10.0.0.1"),
+             [("10.0.0.2", 16)], True),
+            ("unknown address is ignored", RTM_DELADDR, address(2, "10.0.0.9"), [("10.0.0.2", 16)], False),
+            ("last address removed", RTM_DELADDR, address(2, "10.0.0.2", 16), None, True),
+        ]
+        for description, msg_type, payload, addresses, dirty in steps:
+            with self.subTest(description):
+                changed = self.apply(msg_type, payload)
+                self.assertEqual(self.table.addresses.get(2), addresses)
+                self.assertEqual("eth0" in changed, dirty)
+
+    def test_deleting_a_secondary_keeps_the_primary_clean(self):
+        self.apply(RTM_NEWADDR, address(2, "10.0.0.1"))
+        self.apply(RTM_NEWADDR, address(2, "10.0.0.2"))
+        self.assertEqual(self.apply(RTM_DELADDR, address(2, "10.0.0.2")), set())
+        self.assertEqual(self.table.addresses[2], [("10.0.0.1", 24)])
+
+    def test_link_events(self):
+        self.assertEqual(self.table.links[2], {"name": "eth0", "mac": "52:54:00:12:34:56", "up": True})
+        self.assertEqual(self.apply(RTM_NEWLINK, link(2, "eth0")), set())
+        self.assertEqual(self.apply(RTM_NEWLINK, link(2, "eth0", up=False)), {"eth0"})
+        self.apply(RTM_NEWLINK, link(2, "lan0", up=False))
+        self.assertEqual(self.table.removed, {"eth0"})
+        self.apply(RTM_NEWADDR, address(2, "10.0.0.1"))
+        self.apply(RTM_DELLINK, link(2, "lan0"))
+        self.assertNotIn(2, self.table.links)
+        self.assertNotIn(2, self.table.addresses)
+        self.assertEqual(self.table.removed, {"eth0", "lan0"})
+
+    def test_default_route_marks_every_adapter(self):
+        self.table.apply(RTM_NEWLINK, link(3, "wlan0"))
+        self.assertEqual(self.apply(RTM_NEWROUTE, default_route("10.0.0.254")), {"eth0", "wlan0"})
+        self.assertEqual(self.table.default_gateway, "10.0.0.254")
+        self.assertEqual(self.apply(RTM_DELROUTE, default_route("10.0.0.1")), set())
+        self.apply(RTM_DELROUTE, default_route("10.0.0.254"))
+        self.assertIsNone(self.table.default_gateway)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+test_normalize.py
+
+Size and number parsing used to bring every platform's records to canonical units.
+"""
+
+import unittest
+
+from src.lib.normalize import parse_bytes, parse_int
+
+
+class ParseBytesTest(unittest.TestCase):
+
+    CASES = [
+        (None, None),
+        (True, None),
+        (0, 0),
+        (4294967296, 4294967296),
+        (1536.0, 1536),
+        ("512", 512),
+        ("512B", 512),
+        ("1536 MB", 1536 * 1024 ** 2),
+        ("8GiB", 8 * 1024 ** 3),
+        ("8 gib", 8 * 1024 ** 3),
+        ("1.5G", int(1.5 * 1024 ** 3)),
+        ("2T", 2 * 1024 ** 4),
+        # An lshw address range is a PCI aperture, not a memory size.
+        ("fc000000-fcffffff", None),
+        ("", None),
+        ("unknown", None),
+    ]
+
+    def test_parse_bytes(self):
+        for value, expected in self.CASES:
+            with self.subTest(value=value):
+                self.assertEqual(parse_bytes(value), expected)
+
+    def test_output_is_stable(self):
+        for value, expected in self.CASES:
+            with self.subTest(value=value):
+                self.assertEqual(parse_bytes(expected), expected)
+
+
+class ParseIntTest(unittest.TestCase):
+
+    CASES = [
+        (None, None),
+        (False, None),
+        (1920, 1920),
+        (59.95, 60),
+        ("1920", 1920),
+        ("60.00", 60),
+        ("59.95 Hz", 60),
+        ("-12", -12),
+        ("1.2 V", 1),
+        ("", None),
+        ("n/a", None),
+    ]
+
+    def test_parse_int(self):
+        for value, expected in self.CASES:
+            with self.subTest(value=value):
+                self.assertEqual(parse_int(value), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
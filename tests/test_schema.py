@@ -0,0 +1,64 @@
+"""
+test_schema.py
+
+Replace-set planning in TableSchema.plan_sync, using the drives table: its key
+(asset_id, device_id, serial_number) often has a NULL serial number.
+"""
+
+import unittest
+
+from src.lib.records import DriveRecord
+from src.lib.schema import DRIVES
+
+
+def drive(device_id, serial_number=None, size=100, asset_id=1):
+    return DriveRecord(asset_id=asset_id, device_id=device_id, model="Disk", serial_number=serial_number,
+                       drive_type="SSD", interface_type="NVMe", size=size, partitions=1)
+
+
+def row(record):
+    return DRIVES.params(record)
+
+
+class PlanSyncTest(unittest.TestCase):
+
+    CASES = [
+        # (description, existing rows, incoming records, inserts, updates, deletes)
+        ("new asset", [], [drive("sda", "S1")], [drive("sda", "S1")], [], []),
+        ("unchanged", [drive("sda", "S1")], [drive("sda", "S1")], [], [], []),
+        ("changed size", [drive("sda", "S1")], [drive("sda", "S1", size=200)],
+         [], [drive("sda", "S1", size=200)], []),
+        ("removed drive", [drive("sda", "S1"), drive("sdb", "S2")], [drive("sda", "S1")],
+         [], [], [(1, "sdb", "S2")]),
+        ("NULL serial matches NULL serial", [drive("sda")], [drive("sda")], [], [], []),
+        ("NULL serial updated in place", [drive("sda")], [drive("sda", size=200)],
+         [], [drive("sda", size=200)], []),
+        ("serial appearing is a new key", [drive("sda")], [drive("sda", "S1")],
+         [drive("sda", "S1")], [], [(1, "sda", None)]),
+        ("incoming duplicates collapse to the last", [], [drive("sda", size=100), drive("sda", size=200)],
+         [drive("sda", size=200)], [], []),
+        ("duplicated stored rows are replaced", [drive("sda"), drive("sda")], [drive("sda")],
+         [drive("sda")], [], [(1, "sda", None)]),
+    ]
+
+    def test_plan_sync(self):
+        for description, existing, incoming, inserts, updates, deletes in self.CASES:
+            with self.subTest(description):
+                planned = DRIVES.plan_sync([row(r) for r in existing], incoming)
+                self.assertEqual(planned[0], [row(r) for r in inserts])
+                self.assertEqual(planned[1], [DRIVES.update_params(row(r)) for r in updates])
+                self.assertEqual(planned[2], deletes)
+                # One row per key afterwards, the last incoming record winning.
+                current = {DRIVES.key_of(row(r)): row(r) for r in incoming}
+                self.assertEqual(planned[3], list(current.values()))
+
+    def test_keep_missing_rows(self):
+        inserts, updates, deletes, current = DRIVES.plan_sync(
+            [row(drive("sda", "S1"))], [drive("sdb", "S2")], delete_missing=False)
+        self.assertEqual(inserts, [row(drive("sdb", "S2"))])
+        self.assertEqual(deletes, [])
+        self.assertEqual(current, [row(drive("sda", "S1")), row(drive("sdb", "S2"))])
+
+
+if __name__ == "__main__":
+    unittest.main()